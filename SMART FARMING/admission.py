@@ -0,0 +1,142 @@
+"""Admission control for the expensive endpoints.
+
+A Lane runs at most `concurrency` requests at once and lets at most
+`queue_depth` more wait, each for up to `queue_timeout` seconds. Anything
+beyond that is shed at once with Overloaded, which the API answers with 503
+and Retry-After, instead of piling up until every request times out. Image
+work and bulk jobs get separate lanes. Cheap endpoints (/calculate_water,
+/get_crops, ...) are in neither, so a burst of uploads never queues them.
+
+DegradeSwitch watches model latency and says when single-image requests
+should be answered by the demo heuristic instead, letting one request
+through to the model every probe interval to notice recovery.
+"""
+import math
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """A lane is full; the request should be retried after retry_after seconds"""
+
+    def __init__(self, lane, reason, retry_after):
+        super().__init__(f'Server busy ({lane} lane: {reason.replace("_", " ")}), retry in {retry_after:g}s')
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self):
+        """Retry-After value: whole seconds, rounded up"""
+        return str(math.ceil(self.retry_after))
+
+
+class Lane:
+    """Bounded concurrency plus a bounded wait queue; concurrency <= 0 admits everything"""
+
+    def __init__(self, name, concurrency, queue_depth=0, queue_timeout=5.0, retry_after=2.0):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_depth = max(0, queue_depth)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.enabled = concurrency > 0
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = Counter()
+        self.wait_total = 0.0
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if there is room; raises Overloaded otherwise"""
+        if not self.enabled:
+            return
+        with self._cond:
+            if self.active >= self.concurrency:
+                if self.waiting >= self.queue_depth:
+                    self.shed['queue_full'] += 1
+                    raise Overloaded(self.name, 'queue_full', self.retry_after)
+                started = time.perf_counter()
+                self.waiting += 1
+                try:
+                    admitted = self._cond.wait_for(lambda: self.active < self.concurrency, self.queue_timeout)
+                finally:
+                    self.waiting -= 1
+                    self.wait_total += time.perf_counter() - started
+                if not admitted:
+                    self.shed['timeout'] += 1
+                    raise Overloaded(self.name, 'timeout', self.retry_after)
+            self.active += 1
+            self.admitted += 1
+
+    def release(self):
+        if not self.enabled:
+            return
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'enabled': self.enabled,
+                'concurrency': self.concurrency,
+                'queue_depth': self.queue_depth,
+                'active': self.active,
+                'queued': self.waiting,
+                'admitted': self.admitted,
+                'shed': dict(self.shed),
+                'avg_queue_wait_ms': round(self.wait_total / self.admitted * 1000, 3) if self.admitted else 0
+            }
+
+
+class DegradeSwitch:
+    """Exponentially weighted model latency, compared against threshold_ms (0 never degrades)"""
+
+    def __init__(self, threshold_ms, probe_seconds=5.0, alpha=0.2):
+        self.threshold = threshold_ms / 1000.0
+        self.probe_seconds = probe_seconds
+        self.alpha = alpha
+        self.latency = None
+        self.degraded_requests = 0
+        self._last_probe = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.latency = seconds if self.latency is None else self.alpha * seconds + (1 - self.alpha) * self.latency
+
+    @property
+    def active(self):
+        return bool(self.threshold) and self.latency is not None and self.latency > self.threshold
+
+    def should_degrade(self):
+        """True if this request should skip the model; now and then one is let through as a probe"""
+        if not self.active:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_probe >= self.probe_seconds:
+                self._last_probe = now
+                return False
+            self.degraded_requests += 1
+            return True
+
+    def stats(self):
+        return {
+            'threshold_ms': self.threshold * 1000,
+            'latency_ms': round(self.latency * 1000, 3) if self.latency is not None else None,
+            'degraded': self.active,
+            'degraded_requests': self.degraded_requests
+        }
@@ -1,31 +1,229 @@
-from flask import Flask, request, jsonify
+import time
+IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, request, jsonify, Response, g, has_request_context, stream_with_context
 from flask_cors import CORS
-from PIL import Image
+from werkzeug.exceptions import RequestEntityTooLarge
 import numpy as np
 import io
+import contextvars
+import csv
+import sys
 import os
 import json
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 from datetime import datetime
 
+from admission import DegradeSwitch, Lane, Overloaded
+from batching import BatchScheduler
+from cache import ResultCache, stream_content_key
+from crop_calendar import CROPS, CropCalendar
+from history import open_history
+from image_io import TILED_MAX_DECODED_MB, TILED_MAX_IMAGE_PIXELS, ImageTooLarge, decode_image, dhash, mean_color
+from irrigation import IrrigationPlanner, WeatherSeries, build_schedule, read_records
+from inference import MODEL_PATHS, load_backend
+from metrics import Metrics
+from model_registry import ModelRegistry
+from water_table import FACTORS, WaterTable
+from offload import AnalysisPool
+from responses import compact_response, is_compact_request, is_set
+from similarity import SimilarityIndex
+from video import (
+    can_decode_video, is_video_file, iter_distinct_frames, iter_image_sequence, iter_uploaded_frames, iter_video_frames
+)
+from tiling import iter_tile_batches, open_for_tiling, tile_boxes
+from features import (
+    SOIL_REGION_START, extract_image_features, analyze_features, analyze_image, detect_crop_type, detect_growth_stage,
+    detect_soil_type, detect_soil_moisture, detect_weather_condition,
+    generate_demo_predictions
+)
+
 app = Flask(__name__)
 CORS(app)
 
-# Check if model file exists and is not empty
-model = None
+# Single-image uploads larger than MAX_UPLOAD_MB are rejected with 413 before the
+# body is read; MAX_REQUEST_MB caps every request, including batch archives
+MAX_UPLOAD_MB = float(os.environ.get('MAX_UPLOAD_MB', '32'))
+MAX_REQUEST_MB = float(os.environ.get('MAX_REQUEST_MB', '1024'))
+app.config['MAX_CONTENT_LENGTH'] = int(MAX_REQUEST_MB * 1024 * 1024)
+# Per-stage latency and request counters exported on /metrics
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+METRICS_WINDOW = int(os.environ.get('METRICS_WINDOW', '2048'))
+metrics = Metrics(window=METRICS_WINDOW, enabled=METRICS_ENABLED)
+
+# Add X-Peak-RSS-KB / X-RSS-Growth-KB headers to every response, for sizing workers
+REPORT_REQUEST_MEMORY = os.environ.get('REPORT_REQUEST_MEMORY', '0') == '1'
+
+# Micro-batching of model inference across concurrent requests
+BATCH_INFERENCE = os.environ.get('BATCH_INFERENCE', '0') == '1'
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', '16'))
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', '5'))
+
+# Admission control: single-image work (/predict, /predict_water) and bulk jobs each run at most
+# *_CONCURRENCY at once with *_QUEUE more waiting up to ADMISSION_QUEUE_TIMEOUT seconds; the rest
+# get 503 with Retry-After (a concurrency of 0 disables that lane)
+# Active and queued requests both hold a server thread, so the defaults split the threads left after
+# ADMISSION_RESERVED_THREADS between the lanes; the reserved ones always serve the cheap endpoints
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', os.environ.get('GUNICORN_THREADS', '4')))
+ADMISSION_RESERVED_THREADS = int(os.environ.get('ADMISSION_RESERVED_THREADS', '1'))
+ADMISSION_THREADS = max(2, SERVER_THREADS - ADMISSION_RESERVED_THREADS)
+BULK_THREADS = max(1, ADMISSION_THREADS // 3)
+IMAGE_THREADS = ADMISSION_THREADS - BULK_THREADS
+ADMISSION_IMAGE_CONCURRENCY = int(os.environ.get('ADMISSION_IMAGE_CONCURRENCY', str(min(os.cpu_count() or 1, IMAGE_THREADS))))
+ADMISSION_IMAGE_QUEUE = int(os.environ.get('ADMISSION_IMAGE_QUEUE', str(max(0, IMAGE_THREADS - ADMISSION_IMAGE_CONCURRENCY))))
+ADMISSION_BULK_CONCURRENCY = int(os.environ.get('ADMISSION_BULK_CONCURRENCY', str(min(2, BULK_THREADS))))
+ADMISSION_BULK_QUEUE = int(os.environ.get('ADMISSION_BULK_QUEUE', str(max(0, BULK_THREADS - ADMISSION_BULK_CONCURRENCY))))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '5'))
+ADMISSION_RETRY_AFTER = float(os.environ.get('ADMISSION_RETRY_AFTER', '2'))
+# Answer single images with the demo heuristic while model latency exceeds DEGRADE_LATENCY_MS (0 disables)
+DEGRADE_LATENCY_MS = float(os.environ.get('DEGRADE_LATENCY_MS', '0'))
+DEGRADE_PROBE_SECONDS = float(os.environ.get('DEGRADE_PROBE_SECONDS', '5'))
+
+# Compact responses: gzip bodies of at least COMPRESS_MIN_BYTES at COMPRESS_LEVEL (1-9) for clients that accept it
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '512'))
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', '6'))
+
+# Bulk /predict_batch limits
+PREDICT_BATCH_MAX_IMAGES = int(os.environ.get('PREDICT_BATCH_MAX_IMAGES', '1000'))
+PREDICT_BATCH_SIZE = int(os.environ.get('PREDICT_BATCH_SIZE', '32'))
+DECODE_WORKERS = int(os.environ.get('DECODE_WORKERS', str(min(8, os.cpu_count() or 1))))
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+# Prediction result cache (RESULT_CACHE_SIZE=0 disables it, RESULT_CACHE_TTL=0 means no expiry)
+RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', '1024'))
+RESULT_CACHE_MAX_MB = float(os.environ.get('RESULT_CACHE_MAX_MB', '64'))
+RESULT_CACHE_TTL = float(os.environ.get('RESULT_CACHE_TTL', '0'))
+# Near-duplicate reuse (opt-in): uploads whose dHash is within SIMILARITY_MAX_DISTANCE bits of one
+# of the last SIMILARITY_INDEX_SIZE results, and whose mean R, G and B are each within
+# SIMILARITY_MAX_COLOR_DELTA levels of it, get that result (-1, the default, or a size of 0 disables it)
+SIMILARITY_MAX_DISTANCE = int(os.environ.get('SIMILARITY_MAX_DISTANCE', '-1'))
+SIMILARITY_MAX_COLOR_DELTA = int(os.environ.get('SIMILARITY_MAX_COLOR_DELTA', '4'))
+SIMILARITY_INDEX_SIZE = int(os.environ.get('SIMILARITY_INDEX_SIZE', '20000'))
+
+# Worker processes for image analysis and demo predictions (0 runs them in the request thread)
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', '0'))
+
+# Most field records scored by one /calculate_water_bulk call
+WATER_BULK_MAX_RECORDS = int(os.environ.get('WATER_BULK_MAX_RECORDS', '100000'))
+
+# SQLite file recording every /predict and /predict_water result; history is off unless
+# this is set, ideally to an absolute path on persistent storage shared by all workers
+HISTORY_DB = os.environ.get('HISTORY_DB', '')
+HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', '500'))
+HISTORY_MAX_ROWS = int(os.environ.get('HISTORY_MAX_ROWS', '1000'))
+
+# /irrigation_schedule: default weather feed (CSV or JSON records, used when a request sends none) and limits
+IRRIGATION_WEATHER_FILE = os.environ.get('IRRIGATION_WEATHER_FILE', '')
+IRRIGATION_MAX_PLOTS = int(os.environ.get('IRRIGATION_MAX_PLOTS', '100000'))
+IRRIGATION_MAX_DAYS = int(os.environ.get('IRRIGATION_MAX_DAYS', '366'))
+
+# /predict_video: frames analysed per second of video, dHash bits within which a frame
+# counts as a duplicate of the last analysed one (-1 disables), frames per batch and cap
+VIDEO_SAMPLE_FPS = float(os.environ.get('VIDEO_SAMPLE_FPS', '1'))
+VIDEO_DEDUP_DISTANCE = int(os.environ.get('VIDEO_DEDUP_DISTANCE', '6'))
+VIDEO_BATCH_SIZE = int(os.environ.get('VIDEO_BATCH_SIZE', '16'))
+VIDEO_MAX_FRAMES = int(os.environ.get('VIDEO_MAX_FRAMES', '3600'))
+
+# Tiled /predict_water_tiled analysis of large field images (drone shots, orthomosaics)
+TILE_SIZE = int(os.environ.get('TILE_SIZE', '512'))
+TILE_OVERLAP = float(os.environ.get('TILE_OVERLAP', '0.25'))
+TILE_ANALYSIS_SIZE = int(os.environ.get('TILE_ANALYSIS_SIZE', '256'))
+TILED_MAX_TILES = int(os.environ.get('TILED_MAX_TILES', '10000'))
+
+# Model loading: 'eager' (at import), 'background' (thread started at import)
+# or 'lazy' (started by the first request that needs the model)
+MODEL_LOADING = os.environ.get('MODEL_LOADING', 'eager')
+# Under `python app.py`, ANALYSIS_WORKERS processes (started with 'spawn') re-import this file as
+# __mp_main__. They only run functions from features.py, so they never load a model.
+if __name__ == '__mp_main__':
+    MODEL_LOADING = 'lazy'
+# While the model is loading: 'wait' up to MODEL_WAIT_TIMEOUT seconds, or answer in 'demo' mode
+MODEL_FALLBACK = os.environ.get('MODEL_FALLBACK', 'wait')
+MODEL_WAIT_TIMEOUT = float(os.environ.get('MODEL_WAIT_TIMEOUT', '30'))
+# Inference backend: 'auto', 'keras' (model.h5) or 'tflite' (model.tflite, no TensorFlow import)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'auto')
+# Versioned per-crop models (MODEL_DIR/<crop or default>/<version>/model.*), polled every
+# MODEL_POLL_SECONDS and hot-swapped; MODEL_MEMORY_MB caps their memory (0 means no cap)
+MODEL_DIR = os.environ.get('MODEL_DIR', 'models')
+MODEL_POLL_SECONDS = float(os.environ.get('MODEL_POLL_SECONDS', '5'))
+MODEL_MEMORY_MB = float(os.environ.get('MODEL_MEMORY_MB', '0'))
+
+model = None  # an InferenceBackend once loaded
 model_available = False
+model_status = 'not_loaded'  # not_loaded -> loading -> ready / demo / failed
+model_loaded = threading.Event()
+model_status_lock = threading.Lock()
 
-try:
-    if os.path.exists('model.h5') and os.path.getsize('model.h5') > 0:
-        from tensorflow.keras.models import load_model # pyright: ignore[reportMissingImports]
-        from tensorflow.keras.preprocessing.image import img_to_array # pyright: ignore[reportMissingImports]
-        model = load_model('model.h5')
-        model_available = True
-        print("✅ Model loaded successfully!")
+# Seconds since this module started importing
+startup_timings = {
+    'import_seconds': None,
+    'model_load_seconds': None,
+    'first_prediction_seconds': None
+}
+
+def load_disease_model():
+    """Load the configured inference backend, falling back to demo mode"""
+    global model, model_available, model_status
+    started = time.perf_counter()
+    try:
+        # None when the model file is missing or empty
+        backend = load_backend(INFERENCE_BACKEND)
+        if backend is not None:
+            model = backend
+            model_available = True
+            model_status = 'ready'
+            print(f"✅ Model loaded successfully! ({backend.name}: {backend.path})")
+        else:
+            model_status = 'demo'
+            print("⚠️  Model file is missing or empty. Using demo mode.")
+    except Exception as e:
+        model_status = 'failed'
+        print(f"⚠️  Could not load model: {e}")
+        print("⚠️  Using demo mode with simulated predictions.")
+    finally:
+        startup_timings['model_load_seconds'] = round(time.perf_counter() - started, 3)
+        model_loaded.set()
+
+def start_model_loading(background):
+    """Start loading the model once, either in this thread or in a background thread"""
+    global model_status
+    with model_status_lock:
+        if model_status != 'not_loaded':
+            return
+        model_status = 'loading'
+    if background:
+        threading.Thread(target=load_disease_model, name='model-loader', daemon=True).start()
     else:
-        print("⚠️  Model file is missing or empty. Using demo mode.")
-except Exception as e:
-    print(f"⚠️  Could not load model: {e}")
-    print("⚠️  Using demo mode with simulated predictions.")
+        load_disease_model()
+
+def ensure_model_loaded():
+    """Return False if the model is still loading and this request should not proceed"""
+    if not model_loaded.is_set():
+        start_model_loading(background=True)
+        if MODEL_FALLBACK == 'wait':
+            return model_loaded.wait(MODEL_WAIT_TIMEOUT)
+    return True
+
+def model_loading_response():
+    response = jsonify({'error': 'Model is still loading, please retry shortly', 'model_status': model_status})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+if MODEL_LOADING == 'eager':
+    start_model_loading(background=False)
+elif MODEL_LOADING == 'background':
+    start_model_loading(background=True)
 
 # Define class names (edit these as per your model)
 class_names = ['Healthy', 'Early Blight', 'Late Blight']
@@ -55,6 +253,25 @@ disease_info = {
     }
 }
 
+# Versioned per-crop models; the model.h5 / demo path above answers whenever none is loaded
+model_registry = ModelRegistry(MODEL_DIR, class_names, disease_info, MODEL_POLL_SECONDS, MODEL_MEMORY_MB)
+if MODEL_LOADING == 'eager':
+    model_registry.scan()
+
+def resolve_model(crop=None):
+    """The registry model for crop (or the registry default), or None to use the model.h5 / demo path"""
+    return model_registry.resolve(crop)
+
+def model_classes(version):
+    """(class_names, disease_info) for predictions of a registry model (None: the model.h5 / demo path)"""
+    if version is None:
+        return class_names, disease_info
+    return version.class_names, version.disease_info
+
+def model_crop(value):
+    """Crop name from a 'crop' form field or query parameter, selecting that crop's model"""
+    return (value or '').strip().lower() or None
+
 # Water requirement database
 water_requirements = {
     'tomato': {
@@ -134,6 +351,15 @@ water_requirements = {
     }
 }
 
+# Typical length of each growth stage in days, in growth_stages order (used by /irrigation_schedule)
+growth_stage_days = {
+    'tomato': {'seedling': 25, 'vegetative': 30, 'flowering': 20, 'fruiting': 35, 'mature': 15},
+    'potato': {'seedling': 20, 'vegetative': 30, 'flowering': 20, 'tuber_formation': 30, 'mature': 20},
+    'corn': {'seedling': 20, 'vegetative': 35, 'tasseling': 10, 'silking': 15, 'mature': 40},
+    'wheat': {'seedling': 20, 'vegetative': 40, 'flowering': 15, 'grain_filling': 30, 'mature': 15},
+    'rice': {'seedling': 25, 'vegetative': 40, 'flowering': 20, 'grain_filling': 30, 'mature': 15}
+}
+
 # Weather conditions impact
 weather_impact = {
     'sunny': 1.3,
@@ -144,40 +370,65 @@ weather_impact = {
     'cool': 0.8
 }
 
+# Soil moisture adjustment (if soil is already wet, reduce water)
+soil_moisture_adjustment = {
+    'wet': 0.3,
+    'moist': 0.7,
+    'dry': 1.3
+}
+
+# Every water multiplier combination, precomputed once at startup
+water_table = WaterTable(water_requirements, weather_impact, disease_info, soil_moisture_adjustment)
+irrigation_planner = IrrigationPlanner(water_table, growth_stage_days)
+crop_calendar = CropCalendar(CROPS, water_requirements)
+
+# Optional process pool for the CPU-bound image heuristics
+analysis_pool = AnalysisPool(ANALYSIS_WORKERS) if ANALYSIS_WORKERS > 0 else None
+
+# Separate lanes, so a burst of uploads never queues cheap endpoints (which have no lane at all)
+image_lane = Lane('image', ADMISSION_IMAGE_CONCURRENCY, ADMISSION_IMAGE_QUEUE, ADMISSION_QUEUE_TIMEOUT, ADMISSION_RETRY_AFTER)
+bulk_lane = Lane('bulk', ADMISSION_BULK_CONCURRENCY, ADMISSION_BULK_QUEUE, ADMISSION_QUEUE_TIMEOUT, ADMISSION_RETRY_AFTER)
+BULK_ENDPOINTS = {'predict_batch', 'predict_video', 'predict_water_tiled', 'calculate_water_bulk', 'irrigation_schedule'}
+# A disabled lane admits everything, so it can take every thread
+if not (image_lane.enabled and bulk_lane.enabled) \
+        or sum(lane.concurrency + lane.queue_depth for lane in (image_lane, bulk_lane)) > SERVER_THREADS - ADMISSION_RESERVED_THREADS:
+    print(f"⚠️  Admission lanes leave fewer than {ADMISSION_RESERVED_THREADS} of {SERVER_THREADS} server threads "
+          "(SERVER_THREADS) for cheap endpoints")
+
+degrade_switch = DegradeSwitch(DEGRADE_LATENCY_MS, DEGRADE_PROBE_SECONDS)
+DEGRADED_NOTE = 'Degraded mode: the model is responding slowly, so this is a quick heuristic estimate.'
+
+def run_image_task(fn, img_array):
+    """Run a CPU-bound image function in the analysis process pool when enabled"""
+    if analysis_pool is not None:
+        return analysis_pool.run(fn, img_array)
+    return fn(img_array)
+
+# Water-analysis detectors, in the order they are run
+DETECTORS = {
+    'crop_type': detect_crop_type,
+    'growth_stage': detect_growth_stage,
+    'soil_type': detect_soil_type,
+    'soil_moisture': detect_soil_moisture,
+    'weather_condition': detect_weather_condition
+}
+
 def analyze_image_for_water_prediction(image_data):
     """Analyze image to extract features for water prediction using PIL only"""
     try:
-        # Convert PIL image to numpy array
-        img_array = np.array(image_data)
-        
-        # Ensure RGB format
-        if len(img_array.shape) == 2:
-            # Convert grayscale to RGB
-            img_array = np.stack([img_array] * 3, axis=-1)
-        elif img_array.shape[2] == 4:  # RGBA
-            img_array = img_array[:, :, :3]
+        if analysis_pool is not None:
+            # Features and detectors run together in a worker process
+            with timed('analysis'):
+                return analysis_pool.run(analyze_image, np.asarray(image_data))
         
-        # Analyze image characteristics
+        # Compute all image statistics once, then run the detectors over them
+        with timed('extract_features'):
+            features = extract_image_features(image_data)
         analysis = {}
-        
-        # 1. Detect crop type based on color and texture
-        analysis['crop_type'] = detect_crop_type(img_array)
-        
-        # 2. Detect growth stage based on plant size and structure
-        analysis['growth_stage'] = detect_growth_stage(img_array)
-        
-        # 3. Detect soil type based on visible soil characteristics
-        analysis['soil_type'] = detect_soil_type(img_array)
-        
-        # 4. Detect soil moisture based on soil color and texture
-        analysis['soil_moisture'] = detect_soil_moisture(img_array)
-        
-        # 5. Detect weather conditions based on image brightness and color temperature
-        analysis['weather_condition'] = detect_weather_condition(img_array)
-        
-        # 6. Detect disease status (using existing model)
+        for key, detector in DETECTORS.items():
+            with timed(detector.__name__):
+                analysis[key] = detector(features)
         analysis['disease_status'] = 'Healthy'  # Will be updated by disease detection
-        
         return analysis
         
     except Exception as e:
@@ -192,215 +443,76 @@ def analyze_image_for_water_prediction(image_data):
             'disease_status': 'Healthy'
         }
 
-def detect_crop_type(img_array):
-    """Detect crop type based on image characteristics using PIL/numpy"""
-    # Calculate color histograms
-    red_channel = np.mean(img_array[:, :, 0])
-    green_channel = np.mean(img_array[:, :, 1])
-    blue_channel = np.mean(img_array[:, :, 2])
-    
-    # Green channel analysis (for plant detection)
-    green_ratio = green_channel / (red_channel + blue_channel + 1e-8)
-    
-    # Brightness analysis
-    brightness = np.mean(img_array)
-    
-    # Simple heuristics for crop detection
-    if green_ratio > 1.3 and brightness > 120:
-        # High green content and bright - likely tomato or leafy vegetables
-        if red_channel > green_channel * 0.8:
-            return 'tomato'
-        else:
-            return 'lettuce'
-    elif green_ratio > 1.1 and brightness < 100:
-        # Medium green, darker - likely potato or root vegetables
-        return 'potato'
-    elif brightness > 150 and green_channel > 100:
-        # Very bright with good green - likely corn
-        return 'corn'
-    elif brightness < 80:
-        # Dark image - likely wheat or rice
-        if green_ratio < 0.8:
-            return 'wheat'
-        else:
-            return 'rice'
-    else:
-        # Default to tomato
-        return 'tomato'
-
-def detect_growth_stage(img_array):
-    """Detect growth stage based on plant characteristics"""
-    # Analyze plant size and structure using simple metrics
-    gray = np.mean(img_array, axis=2)  # Convert to grayscale
-    
-    # Calculate edge-like features (simple gradient)
-    height, width = gray.shape
-    edge_density = 0
-    
-    # Simple edge detection using differences
-    for i in range(1, height-1):
-        for j in range(1, width-1):
-            diff_h = abs(gray[i, j] - gray[i, j-1]) + abs(gray[i, j] - gray[i, j+1])
-            diff_v = abs(gray[i, j] - gray[i-1, j]) + abs(gray[i, j] - gray[i+1, j])
-            edge_density += (diff_h + diff_v) / 255.0
-    
-    edge_density = edge_density / (height * width)
-    
-    # Brightness analysis
-    brightness = np.mean(img_array)
-    
-    # Simple heuristics for growth stage
-    if edge_density < 0.1:
-        return 'seedling'
-    elif edge_density < 0.2:
-        return 'vegetative'
-    elif edge_density < 0.3:
-        return 'flowering'
-    elif edge_density < 0.4:
-        return 'fruiting'
-    else:
-        return 'mature'
-
-def detect_soil_type(img_array):
-    """Detect soil type based on visible soil characteristics"""
-    # Focus on bottom portion of image (likely soil)
-    height, width = img_array.shape[:2]
-    soil_region = img_array[int(height*0.7):, :]
-    
-    if len(soil_region) == 0:
-        return 'loamy'
-    
-    # Color analysis of soil region
-    soil_brightness = np.mean(soil_region)
-    soil_red = np.mean(soil_region[:, :, 0])
-    soil_green = np.mean(soil_region[:, :, 1])
-    soil_blue = np.mean(soil_region[:, :, 2])
-    
-    # Simple heuristics for soil type
-    if soil_brightness > 150:
-        return 'sandy'  # Light colored soil
-    elif soil_brightness < 80:
-        return 'clay'   # Dark colored soil
-    else:
-        return 'loamy'  # Medium colored soil
-
-def detect_soil_moisture(img_array):
-    """Detect soil moisture based on soil color and texture"""
-    # Focus on bottom portion of image
-    height, width = img_array.shape[:2]
-    soil_region = img_array[int(height*0.7):, :]
-    
-    if len(soil_region) == 0:
-        return 'moist'
-    
-    # Analyze soil color for moisture
-    soil_brightness = np.mean(soil_region)
-    
-    # Simple heuristics for soil moisture
-    if soil_brightness < 60:
-        return 'wet'    # Dark soil indicates wetness
-    elif soil_brightness > 140:
-        return 'dry'    # Light soil indicates dryness
-    else:
-        return 'moist'  # Medium brightness indicates moist soil
-
-def detect_weather_condition(img_array):
-    """Detect weather condition based on image characteristics"""
-    # Analyze overall brightness and color temperature
-    brightness = np.mean(img_array)
-    
-    # Color temperature analysis
-    red_channel = np.mean(img_array[:, :, 0])
-    blue_channel = np.mean(img_array[:, :, 2])
-    color_temp = red_channel / (blue_channel + 1e-8)
-    
-    # Simple heuristics for weather
-    if brightness > 180:
-        return 'sunny'
-    elif brightness > 140:
-        return 'partly_cloudy'
-    elif brightness > 100:
-        return 'cloudy'
-    elif brightness < 80:
-        return 'rainy'
-    elif color_temp > 1.5:
-        return 'hot'
-    else:
-        return 'cool'
+def image_to_array(img):
+    """Convert a PIL image to a float32 H x W x C array (0-255), like keras img_to_array"""
+    img_array = np.asarray(img, dtype=np.float32)
+    if img_array.ndim == 2:
+        img_array = img_array[:, :, np.newaxis]
+    return img_array
 
-def generate_demo_prediction(image_data):
-    """Generate realistic demo predictions based on image characteristics"""
-    # Simple heuristic: analyze image brightness and color distribution
-    img_array = np.array(image_data)
-    
-    # Calculate average brightness
-    if len(img_array.shape) == 3:
-        brightness = np.mean(img_array)
+def predict_disease_batch(batch, version=None):
+    """Class probabilities for a stacked batch of images (0-255 pixel values), from a registry model if given"""
+    if version is not None:
+        predictions = version.predict(batch / 255.0)
+        metrics.inc('predictions_total', len(batch), 'Images classified, by inference mode', mode='model')
+        metrics.inc('model_predictions_total', len(batch), 'Images classified by each registry model', model=version.key)
+    elif model_available and model is not None:
+        predictions = model.predict(batch / 255.0)
+        metrics.inc('predictions_total', len(batch), 'Images classified, by inference mode', mode='model')
     else:
-        brightness = np.mean(img_array)
-    
-    # Calculate green channel dominance (for plant images)
-    if len(img_array.shape) == 3 and img_array.shape[2] >= 3:
-        green_ratio = np.mean(img_array[:, :, 1]) / (np.mean(img_array[:, :, 0]) + np.mean(img_array[:, :, 2]) + 1e-8)
-    else:
-        green_ratio = 0.5
-    
-    # Generate predictions based on image characteristics
-    if brightness > 150 and green_ratio > 1.2:  # Bright and green = likely healthy
-        prediction = np.array([0.7, 0.2, 0.1])  # High probability for healthy
-    elif brightness < 100:  # Dark = likely late blight
-        prediction = np.array([0.1, 0.2, 0.7])  # High probability for late blight
-    else:  # Medium brightness = likely early blight
-        prediction = np.array([0.2, 0.6, 0.2])  # High probability for early blight
+        # Demo mode: score each image with the heuristic predictor
+        predictions = run_image_task(generate_demo_predictions, batch)
+        metrics.inc('predictions_total', len(batch), 'Images classified, by inference mode', mode='demo')
     
-    # Add some randomness
-    prediction += np.random.normal(0, 0.05, 3)
-    prediction = np.maximum(prediction, 0)  # Ensure non-negative
-    prediction = prediction / np.sum(prediction)  # Normalize
-    
-    return prediction
+    if startup_timings['first_prediction_seconds'] is None:
+        startup_timings['first_prediction_seconds'] = round(time.perf_counter() - IMPORT_STARTED, 3)
+    return predictions
+
+# Gathers concurrent requests into shared predict calls when enabled
+batch_scheduler = None
+if BATCH_INFERENCE:
+    batch_scheduler = BatchScheduler(predict_disease_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
+
+def predict_disease(img, version=None):
+    """Class probabilities for a single image, micro-batched with other requests when enabled"""
+    img_array = image_to_array(img)
+    if batch_scheduler is not None:
+        return batch_scheduler.predict(img_array, key=version)
+    return predict_disease_batch(img_array[np.newaxis], version)[0]
+
+def predict_single(img, version=None):
+    """Class probabilities for one request's image, and whether the demo heuristic answered because the model is slow"""
+    if degrade_switch.should_degrade():
+        metrics.inc('predictions_total', 1, 'Images classified, by inference mode', mode='degraded')
+        return run_image_task(generate_demo_predictions, image_to_array(img)[np.newaxis])[0], True
+    started = time.perf_counter()
+    prediction = predict_disease(img, version)
+    if version is not None or model_available:
+        degrade_switch.observe(time.perf_counter() - started)
+    return prediction, False
 
 def calculate_water_requirement(crop_type, soil_type, growth_stage, weather_condition, disease_status, soil_moisture):
     """Calculate water requirement based on multiple factors"""
     
-    if crop_type not in water_requirements:
+    # All multipliers come from the table precomputed at startup
+    idx = water_table.index(crop_type, growth_stage, soil_type, weather_condition, disease_status, soil_moisture)
+    
+    if idx is None:
         return {
             'error': 'Crop type not found in database',
             'water_needed': 0
         }
     
-    crop_data = water_requirements[crop_type]
-    
-    # Base water requirement
-    base_water = crop_data['base_water']
-    
-    # Growth stage adjustment
-    growth_multiplier = crop_data['growth_stages'].get(growth_stage, 1.0)
-    
-    # Soil type adjustment
-    soil_multiplier = crop_data['soil_preferences'].get(soil_type, 1.0)
-    
-    # Weather adjustment
-    weather_multiplier = weather_impact.get(weather_condition, 1.0)
-    
-    # Disease adjustment
-    disease_data = disease_info.get(disease_status, {})
-    disease_multiplier = disease_data.get('water_adjustment', 1.0)
-    
-    # Soil moisture adjustment (if soil is already wet, reduce water)
-    moisture_adjustment = 1.0
-    if soil_moisture == 'wet':
-        moisture_adjustment = 0.3
-    elif soil_moisture == 'moist':
-        moisture_adjustment = 0.7
-    elif soil_moisture == 'dry':
-        moisture_adjustment = 1.3
-    
-    # Calculate final water requirement
-    water_needed = base_water * growth_multiplier * soil_multiplier * weather_multiplier * disease_multiplier * moisture_adjustment
+    factors = water_table.factors(idx)
+    base_water = factors['base_water']
+    growth_multiplier = factors['growth_multiplier']
+    soil_multiplier = factors['soil_multiplier']
+    weather_multiplier = factors['weather_multiplier']
+    disease_multiplier = factors['disease_multiplier']
+    moisture_adjustment = factors['moisture_adjustment']
     
     # Round to 2 decimal places
-    water_needed = round(water_needed, 2)
+    water_needed = round(float(water_table.table[idx]), 2)
     
     return {
         'water_needed': water_needed,
@@ -420,213 +532,1078 @@ def calculate_water_requirement(crop_type, soil_type, growth_stage, weather_cond
         }
     }
 
-def generate_water_recommendations(crop_type, water_needed, disease_status, soil_moisture):
-    """Generate specific watering recommendations"""
-    recommendations = []
+# Watering advice by code; compact responses (codes=1) send the codes instead of the sentences
+RECOMMENDATIONS = {
+    'drip_irrigation': "High water requirement - consider drip irrigation for efficiency",
+    'avoid_overwatering': "Low water requirement - avoid overwatering",
+    'reduce_overhead_watering': "Reduce overhead watering to prevent fungal spread",
+    'water_at_base': "Water at the base of plants only",
+    'minimize_watering': "Minimize watering until disease is controlled",
+    'improve_drainage': "Improve soil drainage immediately",
+    'skip_watering': "Soil is already wet - skip watering for now",
+    'check_drainage': "Check drainage to prevent root rot",
+    'water_now': "Soil is dry - water immediately",
+    'mulch': "Consider mulching to retain moisture",
+    'keep_flooded': "Maintain flooded conditions as required for rice",
+    'deep_watering': "Water deeply but less frequently to encourage deep roots"
+}
+RECOMMENDATION_CODES = {text: code for code, text in RECOMMENDATIONS.items()}
+
+def water_recommendation_codes(crop_type, water_needed, disease_status, soil_moisture):
+    """Codes of the watering recommendations that apply (see RECOMMENDATIONS)"""
+    codes = []
     
     # Base recommendations
     if water_needed > 2.0:
-        recommendations.append("High water requirement - consider drip irrigation for efficiency")
+        codes.append('drip_irrigation')
     elif water_needed < 0.5:
-        recommendations.append("Low water requirement - avoid overwatering")
+        codes.append('avoid_overwatering')
     
     # Disease-specific recommendations
     if disease_status == 'Early Blight':
-        recommendations.append("Reduce overhead watering to prevent fungal spread")
-        recommendations.append("Water at the base of plants only")
+        codes.extend(['reduce_overhead_watering', 'water_at_base'])
     elif disease_status == 'Late Blight':
-        recommendations.append("Minimize watering until disease is controlled")
-        recommendations.append("Improve soil drainage immediately")
+        codes.extend(['minimize_watering', 'improve_drainage'])
     
     # Soil moisture recommendations
     if soil_moisture == 'wet':
-        recommendations.append("Soil is already wet - skip watering for now")
-        recommendations.append("Check drainage to prevent root rot")
+        codes.extend(['skip_watering', 'check_drainage'])
     elif soil_moisture == 'dry':
-        recommendations.append("Soil is dry - water immediately")
-        recommendations.append("Consider mulching to retain moisture")
+        codes.extend(['water_now', 'mulch'])
     
     # Crop-specific recommendations
     if crop_type == 'rice':
-        recommendations.append("Maintain flooded conditions as required for rice")
+        codes.append('keep_flooded')
     elif crop_type in ['tomato', 'pepper']:
-        recommendations.append("Water deeply but less frequently to encourage deep roots")
+        codes.append('deep_watering')
+    
+    return codes
+
+def generate_water_recommendations(crop_type, water_needed, disease_status, soil_moisture):
+    """Generate specific watering recommendations"""
+    return [RECOMMENDATIONS[code] for code in water_recommendation_codes(crop_type, water_needed, disease_status, soil_moisture)]
+
+def analyze_image_batch(arrays, soil_region_start=SOIL_REGION_START):
+    """Crop/soil/moisture/disease analysis and water requirement for a batch of RGB arrays"""
+    with timed('analysis'):
+        analyses = [analyze_features(extract_image_features(arr, soil_region_start=soil_region_start))
+                    for arr in arrays]
+    
+    # Each image is classified by the model for the crop detected in it
+    groups = {}
+    for i, analysis in enumerate(analyses):
+        groups.setdefault(resolve_model(analysis['crop_type']), []).append(i)
+    with timed('inference'):
+        for version, indexes in groups.items():
+            names, _ = model_classes(version)
+            predictions = predict_disease_batch(np.stack([arrays[i] for i in indexes]).astype(np.float32), version)
+            for i, prediction in zip(indexes, predictions):
+                analyses[i]['disease_status'] = names[int(np.argmax(prediction))]
+                analyses[i]['disease_confidence'] = round(float(np.max(prediction)) * 100, 2)
+    
+    with timed('water_calculation'):
+        water_needed, known = water_table.bulk({name: [a[name] for a in analyses] for name in FACTORS})
+    for analysis, water, ok in zip(analyses, water_needed, known):
+        analysis['water_needed'] = float(water) if ok else None
+    return analyses
+
+def analyze_tile_batch(batch):
+    """Crop/soil/moisture/disease results for one batch of (row, col, box, RGB array) tiles"""
+    # Top-down tiles show soil anywhere in the frame, not just the bottom 30%
+    analyses = analyze_image_batch([arr for _, _, _, arr in batch], soil_region_start=0.0)
+    return [dict(analysis, row=row, col=col, box=list(box))
+            for (row, col, box, _), analysis in zip(batch, analyses)]
+
+def summarize_field(tiles):
+    """Aggregate scored tiles into a field-level result"""
+    columns = {name: [tile[name] for tile in tiles] for name in FACTORS}
+    scored = np.array([tile['water_needed'] for tile in tiles if tile['water_needed'] is not None])
+    
+    # Majority conditions across tiles drive the field-level recommendations
+    dominant = {name: max(set(values), key=values.count) for name, values in columns.items()}
+    field_water = round(float(scored.mean()), 2) if scored.size else 0
+    return {
+        'water_needed': field_water,
+        'water_needed_min': round(float(scored.min()), 2) if scored.size else 0,
+        'water_needed_max': round(float(scored.max()), 2) if scored.size else 0,
+        'tiles_scored': int(scored.size),
+        'dominant_conditions': dominant,
+        'disease_tiles': {name: columns['disease_status'].count(name) for name in set(columns['disease_status'])},
+        'recommendations': generate_water_recommendations(
+            dominant['crop_type'], field_water, dominant['disease_status'], dominant['soil_moisture'])
+    }
+
+def build_disease_response(prediction, version=None):
+    """Turn class probabilities into the /predict response body"""
+    class_names, disease_info = model_classes(version)
+    predicted_class = class_names[np.argmax(prediction)]
+    confidence = float(np.max(prediction) * 100)
+    
+    # Get disease information
+    disease_data = disease_info.get(predicted_class, {})
+    
+    # Get all class probabilities
+    all_probabilities = {}
+    for i, class_name in enumerate(class_names):
+        all_probabilities[class_name] = float(prediction[i] * 100)
+
+    response_data = {
+        'prediction': predicted_class,
+        'confidence': round(confidence, 2),
+        'description': disease_data.get('description', ''),
+        'recommendation': disease_data.get('recommendation', ''),
+        'severity': disease_data.get('severity', ''),
+        'color': disease_data.get('color', '#000000'),
+        'all_probabilities': all_probabilities
+    }
+    
+    if version is not None:
+        response_data['model'] = version.key
+    # Add demo mode indicator if using demo predictions
+    elif not model_available:
+        response_data['demo_mode'] = True
+        response_data['note'] = 'Demo mode: Using simulated predictions. Upload a real model.h5 file for actual predictions.'
+
+    return response_data
+
+def is_archive(filename):
+    return (filename or '').lower().endswith(ARCHIVE_EXTENSIONS)
+
+def is_image_file(filename):
+    return (filename or '').lower().endswith(IMAGE_EXTENSIONS)
+
+def read_batch_uploads(files):
+    """Collect (filename, bytes) pairs from uploaded images and ZIP/tar archives"""
+    uploads = []
+    for file in files:
+        # Archives are read in place from the spooled upload stream
+        stream = file.stream
+        is_zip = zipfile.is_zipfile(stream)
+        stream.seek(0)
+        if is_zip:
+            with zipfile.ZipFile(stream) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and is_image_file(info.filename):
+                        uploads.append((info.filename, archive.read(info)))
+        elif is_archive(file.filename):
+            with tarfile.open(fileobj=stream, mode='r:*') as archive:
+                for member in archive.getmembers():
+                    if member.isfile() and is_image_file(member.name):
+                        uploads.append((member.name, archive.extractfile(member).read()))
+        else:
+            uploads.append((file.filename, stream.read()))
+    return uploads
+
+def decode_batch_image(data):
+    """Decode one upload to the RGB array the disease model expects"""
+    img = decode_image(io.BytesIO(data), (128, 128), mode='RGB')
+    return image_to_array(img)
+
+def try_decode_batch_image(data):
+    try:
+        return decode_batch_image(data), None
+    except Exception as e:
+        return None, str(e)
+
+def stream_batch_predictions(uploads, crop=None):
+    """Yield one NDJSON line per image, decoding in parallel and classifying in batches"""
+    errors = 0
+    version = resolve_model(crop)
+    with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as executor:
+        for start in range(0, len(uploads), PREDICT_BATCH_SIZE):
+            chunk = uploads[start:start + PREDICT_BATCH_SIZE]
+            decoded = list(executor.map(try_decode_batch_image, [data for _, data in chunk]))
+            
+            # Images that failed to decode are reported individually
+            ok = [i for i, (img_array, _) in enumerate(decoded) if img_array is not None]
+            predictions = predict_disease_batch(np.stack([decoded[i][0] for i in ok]), version) if ok else []
+            results = dict(zip(ok, predictions))
+            
+            for i, (filename, _) in enumerate(chunk):
+                record = {'index': start + i, 'filename': filename}
+                if i in results:
+                    record.update(build_disease_response(results[i], version))
+                else:
+                    errors += 1
+                    record['error'] = f'Prediction failed: {decoded[i][1]}'
+                yield json.dumps(record) + '\n'
+    
+    yield json.dumps({'done': True, 'count': len(uploads), 'errors': errors}) + '\n'
+
+def spool_uploads(files):
+    """Copy uploads to temporary files, which outlive the request (and OpenCV reads videos from a path)"""
+    paths = []
+    try:
+        for file in files:
+            fd, path = tempfile.mkstemp(suffix=os.path.splitext(file.filename or '')[1])
+            paths.append(path)
+            with os.fdopen(fd, 'wb') as tmp:
+                shutil.copyfileobj(file.stream, tmp)
+    except BaseException:
+        remove_files(paths)
+        raise
+    return paths
+
+def remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def iter_spooled_frames(paths, is_video, sample_fps, fps):
+    """Frames of spooled uploads: several stills, one video or one animated image; the files are removed when done"""
+    try:
+        if len(paths) > 1:
+            yield from iter_uploaded_frames(paths, sample_fps, fps)
+        elif is_video:
+            yield from iter_video_frames(paths[0], sample_fps)
+        else:
+            yield from iter_image_sequence(paths[0], sample_fps)
+    finally:
+        remove_files(paths)
+
+def analyze_video_batch(batch, summary):
+    """NDJSON lines for buffered (record, RGB array or None for duplicates) frames, in frame order"""
+    arrays = [arr for _, arr in batch if arr is not None]
+    analyses = iter(analyze_image_batch(arrays) if arrays else [])
+    for record, arr in batch:
+        if arr is not None:
+            record.update(next(analyses))
+            diseases = summary['disease_frames']
+            diseases[record['disease_status']] = diseases.get(record['disease_status'], 0) + 1
+            summary['water_total'] += record['water_needed'] or 0.0
+        yield json.dumps(record) + '\n'
+
+def stream_video_analysis(frames, max_distance):
+    """Yield one NDJSON line per sampled frame, analysing distinct frames in batches of VIDEO_BATCH_SIZE"""
+    summary = {'frames_sampled': 0, 'frames_analysed': 0, 'duplicates_skipped': 0, 'truncated': False,
+               'disease_frames': {}, 'water_total': 0.0}
+    batch, pending = [], 0
+    try:
+        for index, seconds, img, signature, duplicate_of in iter_distinct_frames(frames, max_distance):
+            record = {'frame': index, 'time': round(seconds, 3), 'signature': f'{signature:016x}'}
+            if duplicate_of is None and summary['frames_analysed'] == VIDEO_MAX_FRAMES:
+                summary['truncated'] = True
+                break
+            summary['frames_sampled'] += 1
+            if duplicate_of is not None:
+                summary['duplicates_skipped'] += 1
+                batch.append((dict(record, duplicate_of=duplicate_of), None))
+                continue
+            
+            summary['frames_analysed'] += 1
+            batch.append((record, image_to_array(img.resize((256, 256)))))
+            pending += 1
+            if pending == VIDEO_BATCH_SIZE:
+                yield from analyze_video_batch(batch, summary)
+                batch, pending = [], 0
+        yield from analyze_video_batch(batch, summary)
+    except Exception as e:
+        yield json.dumps({'error': f'Video analysis failed: {str(e)}'}) + '\n'
+    
+    water_total = summary.pop('water_total')
+    analysed = summary['frames_analysed']
+    summary['water_needed_mean'] = round(water_total / analysed, 2) if analysed else None
+    yield json.dumps(dict(summary, done=True)) + '\n'
+
+# Results of /predict and /predict_water keyed on a hash of the uploaded bytes
+result_cache = ResultCache(RESULT_CACHE_SIZE, int(RESULT_CACHE_MAX_MB * 1024 * 1024), RESULT_CACHE_TTL)
+
+def model_signature():
+    """Identifies the model currently answering; cached results are dropped when it changes"""
+    try:
+        stat = os.stat(model.path if model is not None else MODEL_PATHS['keras'])
+        return (model_status, stat.st_mtime_ns, stat.st_size, model_registry.versions())
+    except OSError:
+        return (model_status, None, None, model_registry.versions())
+
+def cached_result(cache_key):
+    if not result_cache.enabled:
+        return None
+    result_cache.check_version(model_signature())
+    return result_cache.get(cache_key)
+
+# Results of recent uploads keyed on a perceptual hash of the decoded image
+similar_results = SimilarityIndex(SIMILARITY_INDEX_SIZE, SIMILARITY_MAX_DISTANCE, SIMILARITY_MAX_COLOR_DELTA)
+
+def similar_result(cache_key, img):
+    """((dHash, mean colour) signature, result of an earlier near-duplicate upload or None) for a decoded image"""
+    if not similar_results.enabled:
+        return None, None
+    with timed('similarity_lookup'):
+        signature = (dhash(img), mean_color(img))
+        similar_results.check_version(model_signature())
+        # Only results from the same endpoint and requested crop are reused
+        result, distance = similar_results.lookup(cache_key.rsplit(':', 1)[0], *signature)
+    if result is None:
+        return signature, None
+    return signature, dict(result, near_duplicate={'distance': distance})
+
+def remember_similar(cache_key, signature, result):
+    if signature is not None:
+        similar_results.add(cache_key.rsplit(':', 1)[0], *signature, result)
+
+history = open_history(HISTORY_DB, batch_size=HISTORY_BATCH_SIZE)
+
+def record_history(endpoint, cache_key, disease, confidence, conditions=None, water_needed=None, probabilities=None):
+    """Queue one prediction for the history store (written in batches off the request path)"""
+    if history is None:
+        return
+    conditions = conditions or {}
+    history.record(
+        endpoint=endpoint,
+        image_hash=cache_key.rsplit(':', 1)[1],
+        crop=conditions.get('crop_type'),
+        disease=disease,
+        confidence=confidence,
+        growth_stage=conditions.get('growth_stage'),
+        soil_type=conditions.get('soil_type'),
+        soil_moisture=conditions.get('soil_moisture'),
+        weather_condition=conditions.get('weather_condition'),
+        water_needed=water_needed,
+        probabilities=probabilities
+    )
+
+def predict_upload(stream, crop=None):
+    """The /predict response body for an uploaded image stream, from crop's model when it has one"""
+    # Re-uploads of the same photo are answered from the result cache
+    with timed('cache_lookup'):
+        cache_key = stream_content_key(f'predict:{crop}' if crop else 'predict', stream)
+        cached = cached_result(cache_key)
+    if cached is None:
+        # The lane bounds decoding only; inference waits in the batch scheduler, which
+        # fills its micro-batches from every request thread, not just the admitted ones
+        with image_lane.slot():
+            with timed('decode'):
+                img = decode_image(stream, (128, 128))
+            
+            # Burst shots of the same plant reuse the result of the first one
+            signature, cached = similar_result(cache_key, img)
+        if cached is None:
+            # Real model prediction, or simulated prediction in demo or degraded mode
+            version = resolve_model(crop)
+            with timed('inference'):
+                prediction, degraded = predict_single(img, version)
+            
+            if degraded:
+                # Heuristic answers are not cached, so the model answers again once it recovers
+                cached = dict(build_disease_response(prediction), degraded=True, note=DEGRADED_NOTE)
+            else:
+                cached = build_disease_response(prediction, version)
+                remember_similar(cache_key, signature, cached)
+                result_cache.set(cache_key, cached)
+        else:
+            result_cache.set(cache_key, cached)
+    
+    record_history('predict', cache_key, cached['prediction'], cached['confidence'],
+                   probabilities=cached['all_probabilities'])
+    return cached
+
+def predict_water_upload(stream, crop=None):
+    """The /predict_water response body and status for an uploaded image stream.
+
+    Disease is classified by the model for crop, or else for the crop detected in the image.
+    """
+    # Re-uploads of the same photo are answered from the result cache
+    with timed('cache_lookup'):
+        cache_key = stream_content_key(f'predict_water:{crop}' if crop else 'predict_water', stream)
+        cached = cached_result(cache_key)
+    if cached is None:
+        # The lane bounds decoding and image analysis; inference runs after the slot is released
+        with image_lane.slot():
+            with timed('decode'):
+                img = decode_image(stream, (256, 256))
+            
+            # Burst shots of the same plant reuse the result of the first one
+            signature, cached = similar_result(cache_key, img)
+            if cached is None:
+                # Analyze image for water prediction
+                image_analysis = analyze_image_for_water_prediction(img)
+        if cached is None:
+            return predict_water_image(img, image_analysis, crop, cache_key, signature)
+        result_cache.set(cache_key, cached)
+    
+    # Probabilities are not part of the /predict_water response, so only conditions are recorded
+    analysis = cached['image_analysis']
+    record_history('predict_water', cache_key, analysis['disease_status'], None, analysis, cached['water_needed'])
+    return dict(cached, timestamp=datetime.now().isoformat()), 200
+
+def predict_water_image(img, image_analysis, crop, cache_key, signature):
+    """The /predict_water response body and status for a decoded, analysed image that no cached result covers"""
+    # Get disease prediction
+    version = resolve_model(crop or image_analysis['crop_type'])
+    with timed('inference'):
+        prediction, degraded = predict_single(img, version)
+    if degraded:
+        version = None
+    names, _ = model_classes(version)
+    predicted_class = names[np.argmax(prediction)]
+    
+    # Update disease status in analysis
+    image_analysis['disease_status'] = predicted_class
+    
+    # Calculate water requirement
+    with timed('water_calculation'):
+        result = calculate_water_requirement(
+            image_analysis['crop_type'],
+            image_analysis['soil_type'],
+            image_analysis['growth_stage'],
+            image_analysis['weather_condition'],
+            image_analysis['disease_status'],
+            image_analysis['soil_moisture']
+        )
     
-    return recommendations
+    if 'error' in result:
+        return result, 400
+    
+    # Add image analysis results
+    result['image_analysis'] = image_analysis
+    if version is not None:
+        result['model'] = version.key
+    if degraded:
+        # Heuristic answers are not cached, so the model answers again once it recovers
+        result.update(degraded=True, note=DEGRADED_NOTE)
+    else:
+        result_cache.set(cache_key, dict(result))
+        remember_similar(cache_key, signature, dict(result))
+    record_history('predict_water', cache_key, predicted_class, round(float(np.max(prediction)) * 100, 2),
+                   image_analysis, result['water_needed'],
+                   {name: float(p * 100) for name, p in zip(names, prediction)})
+    result['timestamp'] = datetime.now().isoformat()
+    return result, 200
+
+def calculate_water_from_params(data):
+    """The /calculate_water response body and status for a JSON payload"""
+    # Extract parameters
+    crop_type = data.get('crop_type', '').lower()
+    soil_type = data.get('soil_type', 'loamy')
+    growth_stage = data.get('growth_stage', 'vegetative')
+    weather_condition = data.get('weather_condition', 'sunny')
+    disease_status = data.get('disease_status', 'Healthy')
+    soil_moisture = data.get('soil_moisture', 'moist')
+    
+    # Calculate water requirement
+    with timed('water_calculation'):
+        result = calculate_water_requirement(
+            crop_type, soil_type, growth_stage, 
+            weather_condition, disease_status, soil_moisture
+        )
+    
+    if 'error' in result:
+        return result, 400
+    
+    # Add additional information
+    result['timestamp'] = datetime.now().isoformat()
+    result['parameters'] = {
+        'crop_type': crop_type,
+        'soil_type': soil_type,
+        'growth_stage': growth_stage,
+        'weather_condition': weather_condition,
+        'disease_status': disease_status,
+        'soil_moisture': soil_moisture
+    }
+    return result, 200
+
+def crop_options():
+    return {
+        'crops': list(water_requirements.keys()),
+        'soil_types': ['sandy', 'loamy', 'clay'],
+        'growth_stages': ['seedling', 'vegetative', 'flowering', 'fruiting', 'mature'],
+        'weather_conditions': list(weather_impact.keys()),
+        'soil_moisture_levels': ['dry', 'moist', 'wet']
+    }
+
+def server_status(message):
+    """The /test response body"""
+    return {
+        'message': message,
+        'model_available': model_available,
+        'model_status': model_status,
+        'model': model.describe() if model is not None else None,
+        'status': 'loading' if model_status in ('not_loaded', 'loading') else 'ready',
+        'startup': startup_timings,
+        'batching': batch_scheduler.stats() if batch_scheduler is not None else None,
+        'registry_models': model_registry.versions(),
+        'admission': {'image': image_lane.stats(), 'bulk': bulk_lane.stats(), 'degrade': degrade_switch.stats()}
+    }
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    if request.max_content_length == int(MAX_UPLOAD_MB * 1024 * 1024):
+        return upload_too_large_response()
+    return jsonify({'error': f'Request too large (limit {MAX_REQUEST_MB:g} MB)'}), 413
+
+def upload_too_large():
+    """True if a single-image upload declares a body larger than MAX_UPLOAD_MB.
+
+    Chunked uploads declare no length, so the limit also becomes this request's
+    max_content_length, which Werkzeug enforces while the body is read.
+    """
+    request.max_content_length = int(MAX_UPLOAD_MB * 1024 * 1024)
+    return (request.content_length or 0) > MAX_UPLOAD_MB * 1024 * 1024
+
+def upload_too_large_response():
+    return jsonify({'error': f'Upload too large (limit {MAX_UPLOAD_MB:g} MB)'}), 413
+
+def respond(body, status=200):
+    """body as JSON, or compacted per the request's compact=, fields=, codes=, Accept and Accept-Encoding"""
+    compact = is_set(request.args.get('compact') or request.form.get('compact'))
+    fields = request.args.get('fields') or request.form.get('fields')
+    codes = is_set(request.args.get('codes') or request.form.get('codes'))
+    accept = request.headers.get('Accept', '')
+    accept_encoding = request.headers.get('Accept-Encoding', '')
+    if not is_compact_request(compact, fields, codes, accept):
+        return jsonify(body), status
+    data, headers = compact_response(body, RECOMMENDATION_CODES, fields, codes, accept, accept_encoding,
+                                     COMPRESS_MIN_BYTES, COMPRESS_LEVEL)
+    return Response(data, status=status, headers=headers)
+
+def peak_rss_kb():
+    """High-water mark of this process' resident memory, in KB (None where unsupported)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+# Endpoint that stage timings are recorded under outside a Flask request (set by asgi.py)
+current_endpoint = contextvars.ContextVar('current_endpoint', default='background')
+
+def timed(stage):
+    """Time one stage of the current request under its endpoint name"""
+    endpoint = request.endpoint if has_request_context() else None
+    return metrics.time(endpoint or current_endpoint.get(), stage)
+
+@app.before_request
+def record_request_start():
+    g.request_started = time.perf_counter()
+    if REPORT_REQUEST_MEMORY:
+        g.peak_rss_before = peak_rss_kb()
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or 'unknown'
+    if 'request_started' in g:
+        metrics.observe(endpoint, 'total', time.perf_counter() - g.request_started)
+    metrics.inc('requests_total', description='HTTP requests handled', endpoint=endpoint)
+    if response.status_code >= 400:
+        metrics.inc('errors_total', description='HTTP requests answered with an error status',
+                    endpoint=endpoint, status=response.status_code)
+    return response
+
+def overloaded_response(e):
+    response = jsonify({'error': str(e), 'lane': e.lane, 'reason': e.reason})
+    response.headers['Retry-After'] = e.retry_after_header
+    return response, 503
+
+@app.before_request
+def admit_bulk_request():
+    # Bulk jobs hold their slot until the (often streamed) response is closed
+    if request.endpoint in BULK_ENDPOINTS and bulk_lane.enabled:
+        # Receive the whole body first (uploads are spooled, JSON/CSV cached for the view),
+        # so a slow uploader never holds a slot while it is still sending
+        request.get_data(parse_form_data=True)
+        try:
+            bulk_lane.acquire()
+        except Overloaded as e:
+            return overloaded_response(e)
+        g.admission_lane = bulk_lane
+
+@app.after_request
+def release_bulk_on_close(response):
+    lane = g.pop('admission_lane', None)
+    if lane is not None:
+        response.call_on_close(lane.release)
+    return response
+
+@app.teardown_request
+def release_bulk_on_error(exc):
+    # Reached with the slot still held only when no response was produced
+    lane = g.pop('admission_lane', None)
+    if lane is not None:
+        lane.release()
+
+@app.after_request
+def vary_on_negotiation(response):
+    # The compact endpoints negotiate on these headers, and caches must not mix up their variants
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+@app.after_request
+def report_request_memory(response):
+    if REPORT_REQUEST_MEMORY and g.get('peak_rss_before') is not None:
+        # Growth of the high-water mark is the extra peak memory this request needed
+        peak = peak_rss_kb()
+        response.headers['X-Peak-RSS-KB'] = str(peak)
+        response.headers['X-RSS-Growth-KB'] = str(peak - g.peak_rss_before)
+    return response
 
 @app.route('/predict', methods=['POST'])
 def predict():
+    # Checked before request.files, so an oversized body is never parsed
+    if upload_too_large():
+        return upload_too_large_response()
     if 'image' not in request.files:
         return jsonify({'error': 'No image uploaded'}), 400
+    if not ensure_model_loaded():
+        return model_loading_response()
 
     try:
-        file = request.files['image']
-        img = Image.open(io.BytesIO(file.read())).resize((128, 128))
-        
-        if model_available and model is not None:
-            # Use real model prediction
-            from tensorflow.keras.preprocessing.image import img_to_array # pyright: ignore[reportMissingImports]
-            img_array = img_to_array(img) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
-            prediction = model.predict(img_array)[0]
-        else:
-            # Use demo prediction
-            prediction = generate_demo_prediction(img)
-        
-        predicted_class = class_names[np.argmax(prediction)]
-        confidence = float(np.max(prediction) * 100)
-        
-        # Get disease information
-        disease_data = disease_info.get(predicted_class, {})
-        
-        # Get all class probabilities
-        all_probabilities = {}
-        for i, class_name in enumerate(class_names):
-            all_probabilities[class_name] = float(prediction[i] * 100)
-
-        response_data = {
-            'prediction': predicted_class,
-            'confidence': round(confidence, 2),
-            'description': disease_data.get('description', ''),
-            'recommendation': disease_data.get('recommendation', ''),
-            'severity': disease_data.get('severity', ''),
-            'color': disease_data.get('color', '#000000'),
-            'all_probabilities': all_probabilities
-        }
-        
-        # Add demo mode indicator if using demo predictions
-        if not model_available:
-            response_data['demo_mode'] = True
-            response_data['note'] = 'Demo mode: Using simulated predictions. Upload a real model.h5 file for actual predictions.'
-
-        return jsonify(response_data)
+        # Decoded straight from the spooled upload stream, never copied into one bytes object
+        response_data = predict_upload(request.files['image'].stream, model_crop(request.values.get('crop')))
+        with timed('serialize'):
+            return respond(response_data)
         
+    except Overloaded as e:
+        return overloaded_response(e)
+    except ImageTooLarge as e:
+        return jsonify({'error': str(e)}), 413
     except Exception as e:
         return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
 
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """Classify many images (multipart 'images' and/or ZIP/tar 'archive') as streamed NDJSON"""
+    files = request.files.getlist('images') + request.files.getlist('archive')
+    if not files:
+        return jsonify({'error': 'No images uploaded'}), 400
+    if not ensure_model_loaded():
+        return model_loading_response()
+
+    try:
+        uploads = read_batch_uploads(files)
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        return jsonify({'error': f'Could not read archive: {str(e)}'}), 400
+
+    if not uploads:
+        return jsonify({'error': 'No images found in upload'}), 400
+    if len(uploads) > PREDICT_BATCH_MAX_IMAGES:
+        return jsonify({'error': f'Too many images: {len(uploads)} (limit {PREDICT_BATCH_MAX_IMAGES})'}), 400
+
+    return Response(stream_batch_predictions(uploads, model_crop(request.values.get('crop'))),
+                    mimetype='application/x-ndjson')
+
 @app.route('/predict_water', methods=['POST'])
 def predict_water():
     """Predict water requirements directly from image"""
+    # Checked before request.files, so an oversized body is never parsed
+    if upload_too_large():
+        return upload_too_large_response()
     if 'image' not in request.files:
         return jsonify({'error': 'No image uploaded'}), 400
+    if not ensure_model_loaded():
+        return model_loading_response()
 
     try:
-        file = request.files['image']
-        img = Image.open(io.BytesIO(file.read())).resize((256, 256))
-        
-        # Analyze image for water prediction
-        image_analysis = analyze_image_for_water_prediction(img)
-        
-        # Get disease prediction
-        if model_available and model is not None:
-            from tensorflow.keras.preprocessing.image import img_to_array # pyright: ignore[reportMissingImports]
-            img_array = img_to_array(img) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
-            prediction = model.predict(img_array)[0]
-            predicted_class = class_names[np.argmax(prediction)]
-        else:
-            prediction = generate_demo_prediction(img)
-            predicted_class = class_names[np.argmax(prediction)]
+        # Decoded straight from the spooled upload stream, never copied into one bytes object
+        result, status = predict_water_upload(request.files['image'].stream, model_crop(request.values.get('crop')))
+        with timed('serialize'):
+            return respond(result, status)
         
-        # Update disease status in analysis
-        image_analysis['disease_status'] = predicted_class
+    except Overloaded as e:
+        return overloaded_response(e)
+    except ImageTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except Exception as e:
+        return jsonify({'error': f'Water prediction failed: {str(e)}'}), 500
+
+@app.route('/predict_video', methods=['POST'])
+def predict_video():
+    """Disease and water analysis of a video, animated image or 'frames' sequence, streamed as NDJSON per sampled frame"""
+    files = request.files.getlist('video') + request.files.getlist('frames')
+    if not files:
+        return jsonify({'error': 'No video or frames uploaded'}), 400
+    if not ensure_model_loaded():
+        return model_loading_response()
+    
+    try:
+        sample_fps = float(request.form.get('sample_fps', VIDEO_SAMPLE_FPS))
+        # Frame rate at which separately uploaded stills were taken
+        fps = float(request.form.get('fps', 1))
+        max_distance = int(request.form.get('dedup_distance', VIDEO_DEDUP_DISTANCE))
+    except ValueError:
+        return jsonify({'error': 'sample_fps and fps must be numbers and dedup_distance an integer'}), 400
+    if fps <= 0:
+        return jsonify({'error': 'fps must be positive'}), 400
+    
+    is_video = len(files) == 1 and is_video_file(files[0].filename)
+    if is_video and not can_decode_video():
+        return jsonify({'error': 'Video decoding is not available on this server (OpenCV is not installed); '
+                                 'upload an animated GIF/WebP or individual frames instead'}), 415
+    
+    # Frames are decoded lazily while the response streams, after the request (and its
+    # upload streams) has been closed, so the uploads are copied to temporary files first
+    paths = spool_uploads(files)
+    frames = iter_spooled_frames(paths, is_video, sample_fps, fps)
+    response = Response(stream_with_context(stream_video_analysis(frames, max_distance)),
+                        mimetype='application/x-ndjson')
+    # Also covers a client that disconnects before the first frame is read
+    response.call_on_close(lambda: remove_files(paths))
+    return response
+
+@app.route('/predict_water_tiled', methods=['POST'])
+def predict_water_tiled():
+    """Per-tile crop/moisture/disease grid and field-level water requirement for large field images"""
+    # Orthomosaics are far larger than MAX_UPLOAD_MB, so only MAX_REQUEST_MB applies here
+    if 'image' not in request.files:
+        return jsonify({'error': 'No image uploaded'}), 400
+    if not ensure_model_loaded():
+        return model_loading_response()
+    
+    try:
+        tile_size = int(request.form.get('tile_size', TILE_SIZE))
+        overlap = float(request.form.get('overlap', TILE_OVERLAP))
+    except ValueError:
+        return jsonify({'error': 'tile_size must be an integer and overlap a number'}), 400
+    if tile_size < 32 or not 0 <= overlap < 1:
+        return jsonify({'error': 'tile_size must be at least 32 and overlap in [0, 1)'}), 400
+    
+    try:
+        # Only the header is read here; pixels are decoded when the first tile is cut
+        with timed('decode'):
+            tile_source, (width, height) = open_for_tiling(
+                request.files['image'].stream, tile_size, TILE_ANALYSIS_SIZE, TILED_MAX_IMAGE_PIXELS, TILED_MAX_DECODED_MB)
+        boxes = tile_boxes(width, height, tile_size, overlap)
+        if len(boxes) > TILED_MAX_TILES:
+            return jsonify({'error': f'Too many tiles: {len(boxes)} (limit {TILED_MAX_TILES}), use a larger tile_size'}), 400
         
-        # Calculate water requirement
-        result = calculate_water_requirement(
-            image_analysis['crop_type'],
-            image_analysis['soil_type'],
-            image_analysis['growth_stage'],
-            image_analysis['weather_condition'],
-            image_analysis['disease_status'],
-            image_analysis['soil_moisture']
-        )
+        # Tiles are cut and analysed one batch at a time to keep memory bounded
+        tiles = []
+        for batch in iter_tile_batches(tile_source, boxes, TILE_ANALYSIS_SIZE, PREDICT_BATCH_SIZE):
+            tiles.extend(analyze_tile_batch(batch))
         
-        if 'error' in result:
-            return jsonify(result), 400
+        with timed('summarize'):
+            field = summarize_field(tiles)
         
-        # Add image analysis results
-        result['image_analysis'] = image_analysis
-        result['timestamp'] = datetime.now().isoformat()
+        result = {
+            'grid': {
+                'rows': boxes[-1][0] + 1,
+                'cols': boxes[-1][1] + 1,
+                'tile_size': tile_size,
+                'overlap': overlap,
+                'image_size': [width, height]
+            },
+            'field': field,
+            'tiles': tiles,
+            'timestamp': datetime.now().isoformat()
+        }
+        if not model_available:
+            result['demo_mode'] = True
         
-        return jsonify(result)
+        with timed('serialize'):
+            return jsonify(result)
         
+    except ImageTooLarge as e:
+        return jsonify({'error': str(e)}), 413
     except Exception as e:
-        return jsonify({'error': f'Water prediction failed: {str(e)}'}), 500
+        return jsonify({'error': f'Tiled water prediction failed: {str(e)}'}), 500
 
 @app.route('/calculate_water', methods=['POST'])
 def calculate_water():
     """Calculate water requirements based on multiple factors"""
     try:
-        data = request.get_json()
+        result, status = calculate_water_from_params(request.get_json())
+        with timed('serialize'):
+            return respond(result, status)
         
-        # Extract parameters
-        crop_type = data.get('crop_type', '').lower()
-        soil_type = data.get('soil_type', 'loamy')
-        growth_stage = data.get('growth_stage', 'vegetative')
-        weather_condition = data.get('weather_condition', 'sunny')
-        disease_status = data.get('disease_status', 'Healthy')
-        soil_moisture = data.get('soil_moisture', 'moist')
+    except Exception as e:
+        return jsonify({'error': f'Water calculation failed: {str(e)}'}), 500
+
+def check_record_fields(record, label):
+    """Raise ValueError unless every field of a JSON/CSV record is a string, number or empty"""
+    for key, value in record.items():
+        # CSV rows longer than the header collect the extra cells under None; they are ignored
+        if key is not None and value is not None and not isinstance(value, (str, int, float)):
+            raise ValueError(f'{label} field {key!r} must be a string or number')
+
+def read_water_records():
+    """Field records for /calculate_water_bulk from a JSON array or CSV (body or 'file' upload)"""
+    if 'file' in request.files:
+        text = request.files['file'].read().decode('utf-8-sig')
+        return list(csv.DictReader(io.StringIO(text)))
+    if request.mimetype == 'text/csv':
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('records')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of records, {"records": [...]} or CSV')
+    for i, record in enumerate(data):
+        if not isinstance(record, dict):
+            raise ValueError(f'Record {i} is not an object')
+        check_record_fields(record, f'Record {i}')
+    return data
+
+@app.route('/calculate_water_bulk', methods=['POST'])
+def calculate_water_bulk():
+    """Calculate water requirements for many field records in one vectorized pass"""
+    try:
+        records = read_water_records()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if len(records) > WATER_BULK_MAX_RECORDS:
+        return jsonify({'error': f'Too many records: {len(records)} (limit {WATER_BULK_MAX_RECORDS})'}), 400
+    
+    try:
+        # Same defaults as /calculate_water
+        columns = {
+            'crop_type': [str(r.get('crop_type') or '').lower() for r in records],
+            'soil_type': [r.get('soil_type') or 'loamy' for r in records],
+            'growth_stage': [r.get('growth_stage') or 'vegetative' for r in records],
+            'weather_condition': [r.get('weather_condition') or 'sunny' for r in records],
+            'disease_status': [r.get('disease_status') or 'Healthy' for r in records],
+            'soil_moisture': [r.get('soil_moisture') or 'moist' for r in records]
+        }
+        water_needed, known = water_table.bulk(columns)
         
-        # Calculate water requirement
-        result = calculate_water_requirement(
-            crop_type, soil_type, growth_stage, 
-            weather_condition, disease_status, soil_moisture
-        )
+        errors = [{'index': int(i), 'error': 'Crop type not found in database'}
+                  for i in np.flatnonzero(~known)]
         
-        if 'error' in result:
-            return jsonify(result), 400
+        return jsonify({
+            'count': len(records),
+            'water_needed': water_needed.tolist(),
+            'errors': errors,
+            'timestamp': datetime.now().isoformat()
+        })
         
-        # Add additional information
-        result['timestamp'] = datetime.now().isoformat()
-        result['parameters'] = {
-            'crop_type': crop_type,
-            'soil_type': soil_type,
-            'growth_stage': growth_stage,
-            'weather_condition': weather_condition,
-            'disease_status': disease_status,
-            'soil_moisture': soil_moisture
-        }
+    except Exception as e:
+        return jsonify({'error': f'Water calculation failed: {str(e)}'}), 500
+
+def parse_time(value):
+    """Unix seconds from a query parameter given as a number or an ISO 8601 timestamp"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def read_irrigation_request():
+    """Plots, weather records and options for /irrigation_schedule (JSON body, or 'plots'/'weather' CSV or JSON uploads)"""
+    if request.files:
+        def uploaded(name):
+            upload = request.files.get(name)
+            return read_records(upload.read(), upload.filename or '') if upload else None
+        plots, weather, options = uploaded('plots'), uploaded('weather'), request.form
+    else:
+        options = request.get_json(silent=True)
+        if not isinstance(options, dict):
+            raise ValueError('Expected a JSON object with "plots" (and "weather") or CSV uploads')
+        plots, weather = options.get('plots'), options.get('weather')
+    
+    if not isinstance(plots, list) or not plots:
+        raise ValueError('No plots given')
+    for i, plot in enumerate(plots):
+        if not isinstance(plot, dict):
+            raise ValueError(f'Plot {i} is not an object')
+        check_record_fields(plot, f'Plot {i}')
+    if weather is not None:
+        if not (isinstance(weather, list) and all(isinstance(r, dict) for r in weather)):
+            raise ValueError('weather must be a list of records')
+        for i, record in enumerate(weather):
+            check_record_fields(record, f'Weather record {i}')
+    if weather is None and IRRIGATION_WEATHER_FILE:
+        with open(IRRIGATION_WEATHER_FILE, 'rb') as f:
+            weather = read_records(f.read(), IRRIGATION_WEATHER_FILE)
+    return plots, weather or [], options
+
+@app.route('/irrigation_schedule', methods=['POST'])
+def irrigation_schedule():
+    """Season-long daily water needs and irrigation dates for many plots, from planting dates and a weather feed"""
+    try:
+        plots, weather_records, options = read_irrigation_request()
+        if len(plots) > IRRIGATION_MAX_PLOTS:
+            return jsonify({'error': f'Too many plots: {len(plots)} (limit {IRRIGATION_MAX_PLOTS})'}), 400
+        weather = WeatherSeries(weather_records, water_table)
+        irrigation_depth = float(options.get('irrigation_depth', 1.0))
+        if irrigation_depth <= 0:
+            raise ValueError('irrigation_depth must be positive')
+        include_daily = str(options.get('include_daily', '')).lower() in ('1', 'true')
         
-        return jsonify(result)
+        # Per-request stage lengths override the defaults crop by crop
+        planner = irrigation_planner
+        if isinstance(options.get('stage_days'), dict):
+            planner = IrrigationPlanner(water_table, {
+                crop: dict(stages, **{k: max(1, int(v)) for k, v in options['stage_days'].get(crop, {}).items() if k in stages})
+                for crop, stages in growth_stage_days.items()
+            })
+    except (KeyError, ValueError, TypeError, AttributeError) as e:
+        return jsonify({'error': f'Invalid irrigation request: {str(e)}'}), 400
+    
+    try:
+        with timed('simulation'):
+            schedule, errors = build_schedule(planner, plots, weather, irrigation_depth,
+                                              IRRIGATION_MAX_DAYS, include_daily)
+        schedule['errors'] = errors
+        schedule['timestamp'] = datetime.now().isoformat()
+        with timed('serialize'):
+            return jsonify(schedule)
         
     except Exception as e:
-        return jsonify({'error': f'Water calculation failed: {str(e)}'}), 500
+        return jsonify({'error': f'Irrigation scheduling failed: {str(e)}'}), 500
+
+@app.route('/history', methods=['GET'])
+def prediction_history():
+    """Recorded predictions, newest first, filtered by time range, crop, disease or image hash"""
+    if history is None:
+        return jsonify({'error': 'Prediction history is disabled (set HISTORY_DB)'}), 404
+    try:
+        start = parse_time(request.args.get('start'))
+        end = parse_time(request.args.get('end'))
+        limit = min(int(request.args.get('limit', 100)), HISTORY_MAX_ROWS)
+        records, next_cursor = history.query(
+            start=start, end=end, limit=max(1, limit), cursor=request.args.get('cursor'),
+            crop=request.args.get('crop'), disease=request.args.get('disease'),
+            image_hash=request.args.get('image_hash'), endpoint=request.args.get('endpoint')
+        )
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query parameter: {str(e)}'}), 400
+    
+    with timed('serialize'):
+        return jsonify({'count': len(records), 'records': records, 'next_cursor': next_cursor})
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Per-stage latency, request/error/prediction counts and service gauges (Prometheus text format)"""
+    cache = result_cache.stats()
+    gauges = [
+        ('model_ready', 'Whether the real model is loaded (0 means demo mode)', {(): int(model_available)}),
+        ('cache_entries', 'Prediction results held in the result cache', {(): cache['entries']})
+    ]
+    # Lifetime totals kept by the components themselves (they restart from 0 with the process)
+    counters = [
+        ('cache_lookups_total', 'Result cache lookups', {(('result', 'hit'),): cache['hits'],
+                                                         (('result', 'miss'),): cache['misses']})
+    ]
+    lanes = {'image': image_lane.stats(), 'bulk': bulk_lane.stats()}
+    gauges.append(('admission_active', 'Requests running in each admission lane',
+                   {(('lane', name),): lane['active'] for name, lane in lanes.items()}))
+    gauges.append(('admission_queue_depth', 'Requests waiting for a slot in each admission lane',
+                   {(('lane', name),): lane['queued'] for name, lane in lanes.items()}))
+    counters.append(('admission_shed_total', 'Requests shed with 503, by lane and reason',
+                     {(('lane', name), ('reason', reason)): lane['shed'].get(reason, 0)
+                      for name, lane in lanes.items() for reason in ('queue_full', 'timeout')}))
+    if degrade_switch.threshold:
+        degrade = degrade_switch.stats()
+        gauges.append(('degraded_mode', 'Whether single images are answered by the heuristic because the model is slow',
+                       {(): int(degrade['degraded'])}))
+        gauges.append(('inference_latency_ewma_seconds', 'Smoothed model latency that degraded mode is based on',
+                       {(): (degrade['latency_ms'] or 0) / 1000}))
+    if similar_results.enabled:
+        similar = similar_results.stats()
+        gauges.append(('similarity_entries', 'Results held in the near-duplicate index', {(): similar['entries']}))
+        counters.append(('similarity_lookups_total', 'Near-duplicate index lookups',
+                         {(('result', 'hit'),): similar['hits'], (('result', 'miss'),): similar['misses']}))
+    if history is not None:
+        stored = history.stats()
+        gauges.append(('history_queue_depth', 'Predictions waiting to be written to the history store', {(): stored['queued']}))
+        counters.append(('history_rows_total', 'Predictions written to or dropped by the history store',
+                         {(('result', 'written'),): stored['written'], (('result', 'dropped'),): stored['dropped']}))
+    registry = model_registry.stats()
+    if registry['active'] or registry['retired']:
+        gauges.append(('model_memory_bytes', 'Approximate memory held by each loaded registry model',
+                       {(('model', e['model']), ('state', state)): int(e['memory_mb'] * 1024 * 1024)
+                        for state in ('active', 'retired') for e in registry[state]}))
+        counters.append(('model_evictions_total', 'Registry models unloaded to stay under MODEL_MEMORY_MB',
+                         {(): registry['evictions']}))
+    if registry['swaps']:
+        swap = registry['swaps'][-1]
+        gauges.append(('model_last_swap_seconds', 'Stages of the most recent model hot swap',
+                       {(('stage', 'load'),): swap['load_seconds'], (('stage', 'warmup'),): swap['warmup_seconds'],
+                        (('stage', 'swap'),): swap['swap_ms'] / 1000}))
+    if batch_scheduler is not None:
+        batching = batch_scheduler.stats()
+        gauges.append(('batch_queue_depth', 'Images waiting for a batched model call', {(): batching['queued']}))
+        gauges.append(('batch_avg_size', 'Average images per batched model call', {(): batching['avg_batch_size']}))
+    return Response(metrics.render(gauges, counters), mimetype='text/plain; version=0.0.4')
+
+@app.route('/models', methods=['GET'])
+def list_models():
+    """Registry models: active and retired versions, their memory, and recent swap timings"""
+    return jsonify(model_registry.stats())
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters and size of the prediction result cache and the near-duplicate index"""
+    return jsonify(dict(result_cache.stats(), similarity=similar_results.stats()))
+
+@app.route('/clear_cache', methods=['POST'])
+def clear_cache():
+    """Drop every cached prediction (e.g. after replacing model.h5)"""
+    result_cache.clear()
+    similar_results.clear()
+    return jsonify({'message': 'Result cache cleared', 'cache': result_cache.stats(),
+                    'similarity': similar_results.stats()})
 
 @app.route('/get_crops', methods=['GET'])
 def get_crops():
     """Get list of available crops for water calculation"""
-    return jsonify({
-        'crops': list(water_requirements.keys()),
-        'soil_types': ['sandy', 'loamy', 'clay'],
-        'growth_stages': ['seedling', 'vegetative', 'flowering', 'fruiting', 'mature'],
-        'weather_conditions': list(weather_impact.keys()),
-        'soil_moisture_levels': ['dry', 'moist', 'wet']
-    })
+    return jsonify(crop_options())
+
+@app.route('/crop_calendar', methods=['GET'])
+def get_crop_calendar():
+    """Planting calendar for a month and/or crop, answered from the precomputed index with an ETag"""
+    month = request.args.get('month', '').strip().lower()
+    crop = request.args.get('crop', '').strip().lower()
+    answer = crop_calendar.lookup(month, crop)
+    if answer is None:
+        return jsonify({'error': 'Unknown month or crop', 'months': crop_calendar.months,
+                        'crops': crop_calendar.names}), 404
+    
+    body, etag = answer
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    # Answers 304 Not Modified when If-None-Match carries the same ETag
+    return response.make_conditional(request)
+
+@app.route('/codes', methods=['GET'])
+def response_codes():
+    """Lookup tables for compact (codes=1) responses: recommendation codes and per-disease details"""
+    return jsonify({'recommendations': RECOMMENDATIONS, 'diseases': disease_info})
 
 @app.route('/test', methods=['GET'])
 def test():
-    return jsonify({
-        'message': 'Flask server is running!',
-        'model_available': model_available,
-        'status': 'ready'
-    })
+    return jsonify(server_status('Flask server is running!'))
 
 @app.route('/', methods=['GET'])
 def home():
     return jsonify({
         'message': 'Plant Disease Detection API',
         'model_available': model_available,
+        'model_status': model_status,
         'endpoints': {
             'test': '/test',
             'predict': '/predict (POST)',
+            'predict_batch': '/predict_batch (POST)',
             'predict_water': '/predict_water (POST)',
+            'predict_water_tiled': '/predict_water_tiled (POST)',
+            'predict_video': '/predict_video (POST)',
             'calculate_water': '/calculate_water (POST)',
-            'get_crops': '/get_crops (GET)'
+            'calculate_water_bulk': '/calculate_water_bulk (POST)',
+            'irrigation_schedule': '/irrigation_schedule (POST)',
+            'get_crops': '/get_crops (GET)',
+            'crop_calendar': '/crop_calendar (GET)',
+            'codes': '/codes (GET)',
+            'history': '/history (GET)',
+            'models': '/models (GET)',
+            'metrics': '/metrics (GET)',
+            'cache_stats': '/cache_stats (GET)',
+            'clear_cache': '/clear_cache (POST)'
         }
     })
 
+startup_timings['import_seconds'] = round(time.perf_counter() - IMPORT_STARTED, 3)
+print(f"⏱️  App imported in {startup_timings['import_seconds']}s (model loading: {MODEL_LOADING})")
+
 if __name__ == '__main__':
     print("🚀 Starting Plant Disease Detection Server...")
-    print(f"📊 Model Status: {'✅ Available' if model_available else '⚠️  Demo Mode'}")
+    if model_status in ('not_loaded', 'loading'):
+        print(f"📊 Model Status: ⏳ Loading ({MODEL_LOADING})")
+    else:
+        print(f"📊 Model Status: {'✅ Available' if model_available else '⚠️  Demo Mode'}")
     print("🌐 Server will be available at: http://localhost:5000")
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
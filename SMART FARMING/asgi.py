@@ -0,0 +1,182 @@
+"""Async ASGI entry point serving the prediction API from app.py.
+
+Run from the SMART FARMING folder with an ASGI server, e.g.:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+The Flask app ties up one worker thread per request, for as long as a slow
+client takes to upload its photo. Here uploads are received on the event loop,
+so a slow client only holds a coroutine. Once the body has arrived, decoding,
+image analysis and inference run on a dedicated thread pool
+(ASGI_WORKER_THREADS). Model state, the result cache, metrics and the water
+table are shared with app.py, so both entry points behave identically.
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import app as api
+from admission import Overloaded
+from image_io import ImageTooLarge
+from responses import compact_response, is_compact_request, is_set
+
+# Threads running CPU-bound request work (decode, analysis, inference)
+ASGI_WORKER_THREADS = int(os.environ.get('ASGI_WORKER_THREADS', str(min(32, (os.cpu_count() or 1) + 4))))
+
+executor = ThreadPoolExecutor(ASGI_WORKER_THREADS, thread_name_prefix='asgi-worker')
+
+
+async def run_cpu(fn, *args):
+    """Run fn(*args) on the worker pool, keeping the request's endpoint for stage timings"""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(context.run, fn, *args))
+
+
+async def record_request_metrics(request, call_next):
+    # Route names match the Flask endpoint names, so both servers share metric labels
+    endpoint = request.url.path.strip('/') or 'home'
+    api.current_endpoint.set(endpoint)
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Same Vary on every response as the Flask app, see vary_on_negotiation
+    vary = [v.strip() for v in response.headers.get('vary', '').split(',') if v.strip()]
+    response.headers['Vary'] = ', '.join(vary + [v for v in ('Accept', 'Accept-Encoding') if v not in vary])
+    api.metrics.observe(endpoint, 'total', time.perf_counter() - started)
+    api.metrics.inc('requests_total', description='HTTP requests handled', endpoint=endpoint)
+    if response.status_code >= 400:
+        api.metrics.inc('errors_total', description='HTTP requests answered with an error status',
+                        endpoint=endpoint, status=response.status_code)
+    return response
+
+
+def model_loading_response():
+    return JSONResponse({'error': 'Model is still loading, please retry shortly', 'model_status': api.model_status},
+                        status_code=503, headers={'Retry-After': '5'})
+
+
+async def respond(request, body, status=200):
+    """body as JSON, or compacted per the request's compact=, fields=, codes=, Accept and Accept-Encoding"""
+    # Form fields count as well as query parameters, like the Flask routes
+    form = {}
+    if request.headers.get('content-type', '').startswith(('multipart/form-data', 'application/x-www-form-urlencoded')):
+        # Already parsed by receive_image, so this returns the cached form
+        form = await request.form()
+    compact = is_set(request.query_params.get('compact') or form.get('compact'))
+    fields = request.query_params.get('fields') or form.get('fields')
+    codes = is_set(request.query_params.get('codes') or form.get('codes'))
+    accept = request.headers.get('accept', '')
+    accept_encoding = request.headers.get('accept-encoding', '')
+    if not is_compact_request(compact, fields, codes, accept):
+        return JSONResponse(body, status_code=status)
+    data, headers = compact_response(body, api.RECOMMENDATION_CODES, fields, codes, accept, accept_encoding,
+                                     api.COMPRESS_MIN_BYTES, api.COMPRESS_LEVEL)
+    return Response(data, status_code=status, headers=headers)
+
+
+def overloaded_response(e):
+    return JSONResponse({'error': str(e), 'lane': e.lane, 'reason': e.reason}, status_code=503,
+                        headers={'Retry-After': e.retry_after_header})
+
+
+async def receive_image(request):
+    """Read the multipart body without blocking, returning (upload, crop, None) or (None, None, error response)"""
+    # Checked before the body is read, like the Flask routes. Chunked bodies declare no length
+    # and the form parser has no size cap of its own, so they are refused outright.
+    if 'content-length' not in request.headers:
+        return None, None, JSONResponse({'error': 'Content-Length required for uploads'}, status_code=411)
+    if int(request.headers['content-length']) > api.MAX_UPLOAD_MB * 1024 * 1024:
+        return None, None, JSONResponse({'error': f'Upload too large (limit {api.MAX_UPLOAD_MB:g} MB)'}, status_code=413)
+    form = await request.form()
+    upload = form.get('image')
+    if not isinstance(upload, UploadFile):
+        return None, None, JSONResponse({'error': 'No image uploaded'}, status_code=400)
+    # Waiting for the model can block for MODEL_WAIT_TIMEOUT, so keep it off the event loop
+    if not await run_in_threadpool(api.ensure_model_loaded):
+        await upload.close()
+        return None, None, model_loading_response()
+    return upload, api.model_crop(form.get('crop') or request.query_params.get('crop')), None
+
+
+async def predict(request):
+    upload, crop, error = await receive_image(request)
+    if error is not None:
+        return error
+    try:
+        response_data = await run_cpu(api.predict_upload, upload.file, crop)
+        return await respond(request, response_data)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except ImageTooLarge as e:
+        return JSONResponse({'error': str(e)}, status_code=413)
+    except Exception as e:
+        return JSONResponse({'error': f'Prediction failed: {str(e)}'}, status_code=500)
+    finally:
+        await upload.close()
+
+
+async def predict_water(request):
+    upload, crop, error = await receive_image(request)
+    if error is not None:
+        return error
+    try:
+        result, status = await run_cpu(api.predict_water_upload, upload.file, crop)
+        return await respond(request, result, status)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except ImageTooLarge as e:
+        return JSONResponse({'error': str(e)}, status_code=413)
+    except Exception as e:
+        return JSONResponse({'error': f'Water prediction failed: {str(e)}'}, status_code=500)
+    finally:
+        await upload.close()
+
+
+async def calculate_water(request):
+    try:
+        # A single table lookup, cheap enough to run on the event loop
+        result, status = api.calculate_water_from_params(await request.json())
+        return await respond(request, result, status)
+    except Exception as e:
+        return JSONResponse({'error': f'Water calculation failed: {str(e)}'}, status_code=500)
+
+
+async def get_crops(request):
+    return JSONResponse(api.crop_options())
+
+
+async def test(request):
+    return JSONResponse(api.server_status('ASGI server is running!'))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    executor.shutdown(wait=False)
+
+
+application = Starlette(
+    routes=[
+        Route('/predict', predict, methods=['POST']),
+        Route('/predict_water', predict_water, methods=['POST']),
+        Route('/calculate_water', calculate_water, methods=['POST']),
+        Route('/get_crops', get_crops, methods=['GET']),
+        Route('/test', test, methods=['GET'])
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        Middleware(BaseHTTPMiddleware, dispatch=record_request_metrics)
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,125 @@
+"""Dynamic micro-batching for model inference.
+
+Request threads submit single images to a BatchScheduler; one background
+worker gathers whatever is queued (up to max_batch_size, waiting at most
+max_wait_ms after the oldest request arrived) and runs a single predict call
+per input shape. Each caller gets its own row of the result back.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class _Pending:
+    __slots__ = ('item', 'key', 'future', 'enqueued_at')
+
+    def __init__(self, item, key=None):
+        self.item = item
+        self.key = key
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchScheduler:
+    """Gather concurrent single-item requests into batched predict_fn calls.
+
+    predict_fn receives a stacked array of shape (n, *item.shape) and the key
+    the items were submitted with, and must return an array whose first
+    dimension is n. Items submitted with different keys (e.g. different
+    models) never share a call.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._requests = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def submit(self, item, key=None):
+        """Queue one item and return a Future for its row of the result"""
+        self._ensure_started()
+        pending = _Pending(np.asarray(item), key)
+        self._queue.put(pending)
+        return pending.future
+
+    def predict(self, item, timeout=None, key=None):
+        """Queue one item and block until its prediction is ready"""
+        return self.submit(item, key).result(timeout)
+
+    def _ensure_started(self):
+        # Started lazily so a pre-forking server never forks a live thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='batch-scheduler', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = batch[0].enqueued_at + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        self._record(batch, started)
+
+        # Requests with different keys or input sizes cannot share a predict call
+        groups = {}
+        for pending in batch:
+            groups.setdefault((pending.key, pending.item.shape), []).append(pending)
+
+        for (key, _), group in groups.items():
+            try:
+                results = self.predict_fn(np.stack([pending.item for pending in group]), key)
+            except Exception as e:
+                for pending in group:
+                    pending.future.set_exception(e)
+                continue
+            for pending, row in zip(group, results):
+                pending.future.set_result(row)
+
+    def _record(self, batch, started):
+        waits = [started - pending.enqueued_at for pending in batch]
+        with self._stats_lock:
+            self._batch_sizes[len(batch)] += 1
+            self._requests += len(batch)
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+    def stats(self):
+        """Batch-size distribution and queue-wait figures since startup"""
+        with self._stats_lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'queued': self._queue.qsize(),
+                'batches': batches,
+                'requests': self._requests,
+                'avg_batch_size': round(self._requests / batches, 2) if batches else 0,
+                'batch_size_histogram': dict(sorted(self._batch_sizes.items())),
+                'avg_queue_wait_ms': round(self._wait_total / self._requests * 1000, 3) if self._requests else 0,
+                'max_queue_wait_ms': round(self._wait_max * 1000, 3)
+            }
@@ -0,0 +1 @@
+"""Offline benchmarks for the Smart Farming API (run from the SMART FARMING folder)."""
@@ -0,0 +1,59 @@
+"""Benchmark suite command line.
+
+Usage (from the SMART FARMING folder):
+    python -m benchmarks run [--target http://localhost:5000] [--iterations 20] [--output results.json]
+    python -m benchmarks compare baseline.json candidate.json [--threshold 0.10]
+
+'run' uses the in-process Flask test client unless --target is given.
+'compare' prints the p50 change of every benchmark present in both files
+and exits with status 1 if any slowed down by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+from benchmarks import suite
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run the suite and write results as JSON')
+    run.add_argument('--target', help='base URL of a running server (default: in-process test client)')
+    run.add_argument('--iterations', type=int, default=20)
+    run.add_argument('--output', default='benchmark_results.json')
+
+    compare = commands.add_parser('compare', help='flag regressions between two result files')
+    compare.add_argument('baseline')
+    compare.add_argument('candidate')
+    compare.add_argument('--threshold', type=float, default=0.10, help='allowed slowdown, as a fraction')
+    compare.add_argument('--stat', default='p50_ms', choices=['mean_ms', 'p50_ms', 'p95_ms', 'min_ms'])
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = suite.run(args.target, args.iterations)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        for name, stats in results['results'].items():
+            print(f"{name:<60} p50 {stats['p50_ms']:>10.3f}ms  p95 {stats['p95_ms']:>10.3f}ms")
+        print(f"\n📄 Results written to {args.output} (model available: {results['meta']['model_available']})")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = suite.compare(baseline, candidate, args.threshold, args.stat)
+    regressions = [row for row in rows if row[4]]
+    for name, before, after, ratio, regressed in rows:
+        flag = '❌ REGRESSION' if regressed else ''
+        print(f"{name:<60} {before:>10.3f} -> {after:>10.3f}ms {ratio:>6.2f}x {flag}")
+    print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%} in {args.stat}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Many slow uploaders: the Flask app under gunicorn vs. the ASGI app under uvicorn.
+
+Usage (from the SMART FARMING folder, with gunicorn and uvicorn installed):
+    python -m benchmarks.asgi [--clients 64] [--upload-seconds 5] [--threads 8] [--endpoint /predict]
+
+Each server is started on a local port. Every client uploads a distinct
+image, trickling the body out over --upload-seconds the way a phone on a
+weak mobile link does. While the uploads are in flight, a probe sends a
+cheap GET /get_crops every 100 ms. A thread-per-request server whose
+threads are all busy receiving uploads can't answer the probe until an
+upload finishes. The report gives upload completion times, probe latency
+and failures for each server.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.suite import encode_multipart, summarize
+from benchmarks.synthetic import random_image
+
+HOST = '127.0.0.1'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+SERVERS = {
+    'flask (gunicorn gthread)': lambda port, threads: [
+        sys.executable, '-m', 'gunicorn', '-w', '1', '-k', 'gthread', '--threads', str(threads),
+        '-b', f'{HOST}:{port}', 'app:app'],
+    'asgi (uvicorn)': lambda port, threads: [
+        sys.executable, '-m', 'uvicorn', 'asgi:application', '--host', HOST, '--port', str(port),
+        '--log-level', 'warning']
+}
+
+
+async def request(port, head, body=b'', chunks=1, upload_seconds=0.0, timeout=120):
+    """Send one HTTP/1.1 request, optionally trickling the body; returns (status, seconds)"""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        writer.write(head)
+        step = max(1, -(-len(body) // chunks))
+        for offset in range(0, len(body), step):
+            writer.write(body[offset:offset + step])
+            await writer.drain()
+            await asyncio.sleep(upload_seconds / chunks)
+        response = await asyncio.wait_for(reader.read(), timeout)
+        status = int(response.split(b' ', 2)[1]) if response else 0
+    except (asyncio.TimeoutError, ConnectionError):
+        status = 0
+    finally:
+        writer.close()
+    return status, time.perf_counter() - started
+
+
+def upload_head(endpoint, content_type, length):
+    return (f'POST {endpoint} HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Length: {length}\r\nConnection: close\r\n\r\n').encode()
+
+
+GET_CROPS = f'GET /get_crops HTTP/1.1\r\nHost: {HOST}\r\nConnection: close\r\n\r\n'.encode()
+
+
+async def wait_until_ready(port, process, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('server exited during start-up')
+        try:
+            status, _ = await request(port, GET_CROPS, timeout=5)
+            if status == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError('server did not start in time')
+
+
+async def load(port, uploads, endpoint, upload_seconds, chunks):
+    """Run every slow upload concurrently while probing /get_crops"""
+    done = asyncio.Event()
+    probes = []
+
+    async def probe():
+        while not done.is_set():
+            probes.append(await request(port, GET_CROPS, timeout=60))
+            await asyncio.sleep(0.1)
+
+    async def upload(data, n):
+        body, content_type = encode_multipart(f'{n}.png', data)
+        return await request(port, upload_head(endpoint, content_type, len(body)), body, chunks, upload_seconds)
+
+    prober = asyncio.ensure_future(probe())
+    results = await asyncio.gather(*(upload(data, n) for n, data in enumerate(uploads)))
+    done.set()
+    await prober
+    return results, probes
+
+
+def report(name, results, probes, elapsed):
+    ok = [seconds for status, seconds in results if status == 200]
+    probe_ok = [seconds for status, seconds in probes if status == 200]
+    print(f"\n{name}: {len(ok)}/{len(results)} uploads succeeded in {elapsed:.1f}s")
+    if ok:
+        stats = summarize(ok)
+        print(f"  upload total   p50 {stats['p50_ms']:>9.0f}ms  p95 {stats['p95_ms']:>9.0f}ms  max {stats['max_ms']:>9.0f}ms")
+    if probe_ok:
+        stats = summarize(probe_ok)
+        print(f"  /get_crops     p50 {stats['p50_ms']:>9.1f}ms  p95 {stats['p95_ms']:>9.1f}ms  max {stats['max_ms']:>9.1f}ms"
+              f"  ({len(probes) - len(probe_ok)} failed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--upload-seconds', type=float, default=5.0, help='time each client takes to send its body')
+    parser.add_argument('--chunks', type=int, default=20, help='pieces each body is sent in')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn worker threads for the Flask app')
+    parser.add_argument('--endpoint', default='/predict', choices=['/predict', '/predict_water'])
+    parser.add_argument('--image-size', type=int, default=512)
+    args = parser.parse_args()
+
+    uploads = [random_image(args.image_size, seed) for seed in range(args.clients)]
+    print(f"{args.clients} clients, each uploading {len(uploads[0]) // 1024}KB to {args.endpoint} "
+          f"over {args.upload_seconds:g}s ({os.cpu_count()} cores)")
+
+    env = dict(os.environ, RESULT_CACHE_SIZE='0', SIMILARITY_INDEX_SIZE='0', ADMISSION_IMAGE_CONCURRENCY='0',
+               MODEL_LOADING='eager')
+    for name, command in SERVERS.items():
+        port = free_port()
+        process = subprocess.Popen(command(port, args.threads), env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_until_ready(port, process))
+            started = time.perf_counter()
+            results, probes = asyncio.run(load(port, uploads, args.endpoint, args.upload_seconds, args.chunks))
+            report(name, results, probes, time.perf_counter() - started)
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Memory and latency of each inference backend.
+
+Usage (from the SMART FARMING folder):
+    python -m benchmarks.backends [--backends keras tflite] [--batch-sizes 1 16] [--repeat 20]
+
+Each backend is measured in a fresh interpreter: RSS after importing the
+app's dependencies, RSS after loading the model (which includes importing
+TensorFlow for Keras) and per-call predict latency for each batch size.
+Backends whose model file or runtime is missing are reported as skipped.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+
+def rss_kb():
+    """Current resident set size of this process in KB (Linux)"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def run_child(kind, batch_sizes, repeat):
+    import numpy as np
+    from inference import BACKENDS, MODEL_PATHS, model_file_ready
+
+    if not model_file_ready(MODEL_PATHS[kind]):
+        print(json.dumps({'skipped': f'{MODEL_PATHS[kind]} is missing or empty'}))
+        return
+
+    baseline = rss_kb()
+    start = time.perf_counter()
+    try:
+        backend = BACKENDS[kind](MODEL_PATHS[kind])
+    except ImportError as e:
+        print(json.dumps({'skipped': f'runtime not installed ({e})'}))
+        return
+    load_seconds = time.perf_counter() - start
+    loaded = rss_kb()
+
+    latency = {}
+    for batch_size in batch_sizes:
+        batch = np.random.default_rng(0).random((batch_size, 128, 128, 3), dtype=np.float32)
+        backend.predict(batch)  # warm-up
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            backend.predict(batch)
+            timings.append(time.perf_counter() - start)
+        latency[batch_size] = float(np.median(timings))
+
+    print(json.dumps({
+        'baseline_rss_mb': baseline / 1024,
+        'model_rss_mb': (loaded - baseline) / 1024,
+        'peak_rss_mb': rss_kb() / 1024,
+        'load_seconds': load_seconds,
+        'latency_ms': {size: seconds * 1000 for size, seconds in latency.items()}
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='+', default=['keras', 'tflite'])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 16])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.batch_sizes, args.repeat)
+        return
+
+    for kind in args.backends:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.backends', '--child', kind, '--repeat', str(args.repeat),
+             '--batch-sizes', *map(str, args.batch_sizes)],
+            capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if 'skipped' in result:
+            print(f"{kind:>7}: skipped, {result['skipped']}")
+            continue
+        latency = ', '.join(f"batch {size}: {ms:.1f}ms" for size, ms in result['latency_ms'].items())
+        print(f"{kind:>7}: load {result['load_seconds']:.2f}s, model RSS {result['model_rss_mb']:.0f}MB, "
+              f"total RSS {result['peak_rss_mb']:.0f}MB, {latency}")
+
+
+if __name__ == '__main__':
+    main()
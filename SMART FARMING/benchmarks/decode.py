@@ -0,0 +1,121 @@
+"""Upload decoding: full decode vs. draft/reduce fast paths.
+
+Usage (from the SMART FARMING folder):
+    python -m benchmarks.decode [--megapixels 1 4 12] [--fixtures DIR] [--repeat 3]
+
+For each upload size and DECODE_QUALITY mode this reports decode time and
+the peak RSS growth of a fresh process decoding one upload. It then checks
+accuracy against full decode over a fixture set (a directory of images, or
+synthetic field photos by default): pixel difference, agreement of the
+water-analysis labels and agreement of the demo disease prediction.
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_photo
+from features import analyze_features, extract_image_features, generate_demo_prediction
+from image_io import OVERSAMPLE, decode_image
+
+TARGET_SIZES = {'predict': (128, 128), 'predict_water': (256, 256)}
+
+
+def max_rss_kb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if os.uname().sysname == 'Darwin' else rss
+
+
+def _measure_peak(data, size, quality, results):
+    baseline = max_rss_kb()
+    decode_image(io.BytesIO(data), size, quality=quality)
+    results.put(max_rss_kb() - baseline)
+
+
+def peak_rss_growth(data, size, quality):
+    """Peak RSS growth (KB) of a fresh process decoding one upload"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_measure_peak, args=(data, size, quality, results))
+    process.start()
+    growth = results.get()
+    process.join()
+    return growth
+
+
+def best_time(data, size, quality, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode_image(io.BytesIO(data), size, quality=quality)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def load_fixtures(directory):
+    if directory:
+        for name in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, name), 'rb') as f:
+                yield name, f.read()
+    else:
+        for seed in range(8):
+            yield f'synthetic-{seed}.jpg', synthetic_photo(2 + seed, seed=seed)
+
+
+def check_accuracy(fixtures):
+    """Compare every fast mode against full decode on the fixture set"""
+    modes = [quality for quality in OVERSAMPLE if quality != 'exact']
+    diffs = {quality: [] for quality in modes}
+    label_matches = {quality: 0 for quality in modes}
+    disease_matches = {quality: 0 for quality in modes}
+    count = 0
+
+    for name, data in fixtures:
+        try:
+            exact = np.asarray(decode_image(io.BytesIO(data), (256, 256), mode='RGB', quality='exact'), dtype=np.float64)
+        except OSError:
+            print(f"  skipping {name}: not an image")
+            continue
+        count += 1
+        exact_labels = analyze_features(extract_image_features(exact))
+        exact_disease = np.argmax(generate_demo_prediction(exact))
+        for quality in modes:
+            fast = np.asarray(decode_image(io.BytesIO(data), (256, 256), mode='RGB', quality=quality), dtype=np.float64)
+            diffs[quality].append(np.mean(np.abs(fast - exact)))
+            label_matches[quality] += analyze_features(extract_image_features(fast)) == exact_labels
+            disease_matches[quality] += np.argmax(generate_demo_prediction(fast)) == exact_disease
+
+    print(f"\nAccuracy vs. full decode over {count} fixtures (256x256):")
+    print(f"{'quality':>10} {'mean |Δpx|':>11} {'labels equal':>13} {'disease equal':>14}")
+    for quality in modes:
+        print(f"{quality:>10} {np.mean(diffs[quality]):>11.3f} "
+              f"{label_matches[quality]:>9}/{count:<3} {disease_matches[quality]:>10}/{count:<3}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[1, 4, 12])
+    parser.add_argument('--fixtures', help='directory of images to compare against full decode')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'upload':>14} {'target':>8} {'quality':>9} {'time':>10} {'peak RSS':>10}")
+    for megapixels in args.megapixels:
+        data = synthetic_photo(megapixels)
+        label = f"{megapixels:g}MP {len(data) // 1024}KB"
+        for endpoint, size in TARGET_SIZES.items():
+            for quality in OVERSAMPLE:
+                seconds = best_time(data, size, quality, args.repeat)
+                growth = peak_rss_growth(data, size, quality)
+                print(f"{label:>14} {size[0]:>8} {quality:>9} {seconds * 1000:>8.1f}ms {growth / 1024:>8.1f}MB")
+
+    check_accuracy(load_fixtures(args.fixtures))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Edge density: original per-pixel loop vs. the vectorized engine.
+
+Usage (from the SMART FARMING folder):
+    python -m benchmarks.edge_density [--sizes 64 128 256 512] [--repeat 5]
+
+Every run first checks that all implementations agree on the same images,
+then reports the best-of-N time for each implementation and image size.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from features import compute_edge_density
+
+
+def edge_density_loop(gray):
+    """Reference implementation: the original nested loop from detect_growth_stage"""
+    height, width = gray.shape
+    edge_density = 0
+    for i in range(1, height-1):
+        for j in range(1, width-1):
+            diff_h = abs(gray[i, j] - gray[i, j-1]) + abs(gray[i, j] - gray[i, j+1])
+            diff_v = abs(gray[i, j] - gray[i-1, j]) + abs(gray[i, j] - gray[i+1, j])
+            edge_density += (diff_h + diff_v) / 255.0
+    return edge_density / (height * width)
+
+
+IMPLEMENTATIONS = {
+    'loop': edge_density_loop,
+    'slice': lambda gray: compute_edge_density(gray, mode='slice'),
+    'separable': lambda gray: compute_edge_density(gray, mode='separable'),
+}
+
+
+def sample_images(size, seed=0):
+    """Grayscale test images: noise, a smooth gradient, a flat field and a checkerboard"""
+    rng = np.random.default_rng(seed)
+    rgb = rng.integers(0, 256, size=(size, size, 3), dtype=np.uint8)
+    ramp = np.linspace(0, 255, size)
+    yield 'noise', np.mean(rgb, axis=2)
+    yield 'gradient', np.add.outer(ramp, ramp) / 2
+    yield 'flat', np.full((size, size), 128.0)
+    yield 'checker', (np.indices((size, size)).sum(axis=0) % 2) * 255.0
+
+
+def check_agreement(sizes):
+    """Fail loudly if any implementation disagrees with the original loop (beyond summation-order rounding)"""
+    for size in sizes + [1, 2, 3]:
+        for name, gray in sample_images(size):
+            expected = edge_density_loop(gray)
+            for impl, fn in IMPLEMENTATIONS.items():
+                actual = fn(gray)
+                if not np.isclose(actual, expected, rtol=1e-9, atol=1e-12):
+                    raise AssertionError(
+                        f"{impl} disagrees on {name} {size}x{size}: {actual!r} != {expected!r}")
+    print("✅ All implementations agree with the original loop")
+
+
+def best_time(fn, gray, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(gray)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 128, 256, 512])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    check_agreement(args.sizes)
+
+    print(f"{'size':>6} " + " ".join(f"{impl:>12}" for impl in IMPLEMENTATIONS) + f" {'speedup':>9}")
+    for size in args.sizes:
+        gray = next(sample_images(size))[1]
+        times = {impl: best_time(fn, gray, args.repeat) for impl, fn in IMPLEMENTATIONS.items()}
+        fastest = min(times['slice'], times['separable'])
+        row = " ".join(f"{times[impl] * 1000:>10.3f}ms" for impl in IMPLEMENTATIONS)
+        print(f"{size:>6} {row} {times['loop'] / fastest:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
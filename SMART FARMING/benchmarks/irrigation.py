@@ -0,0 +1,113 @@
+"""Irrigation scheduling throughput: plots x days simulated per second.
+
+Usage (from the SMART FARMING folder):
+    python -m benchmarks.irrigation [--plots 100 1000 10000 100000] [--days 180] [--repeat 3]
+
+Plots get random crops, soils and planting dates across one month, with one
+random weather feed per location. The vectorized planner is checked against
+a plain per-plot, per-day loop over calculate_water_requirement-style table
+lookups, which is then timed on the smallest size as the baseline.
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+import app
+from irrigation import INITIAL_DEFICIT, MOIST_BELOW, WET_BELOW, WeatherSeries
+
+SOILS = ['sandy', 'loamy', 'clay']
+MOISTURES = ['dry', 'moist', 'wet']
+START = date(2024, 3, 1)
+
+
+def sample_inputs(plots, days, locations=8, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {
+        'crop': rng.integers(0, len(app.water_table.crops), plots).tolist(),
+        'soil_type': [SOILS[i] for i in rng.integers(0, len(SOILS), plots)],
+        'disease_status': ['Healthy'] * plots,
+        'soil_moisture': [MOISTURES[i] for i in rng.integers(0, len(MOISTURES), plots)],
+        'planting_date': [START + timedelta(days=int(d)) for d in rng.integers(0, 30, plots)],
+        'location': rng.integers(0, locations, plots).tolist()
+    }
+    conditions = list(app.weather_impact)
+    records = [{'location': str(loc), 'date': (START + timedelta(days=d)).isoformat(),
+                'weather_condition': conditions[rng.integers(len(conditions))],
+                'rain_in': float(rng.choice([0, 0, 0, 0.5]))}
+               for loc in range(locations) for d in range(days)]
+    weather = WeatherSeries(records, app.water_table).matrices([str(loc) for loc in range(locations)], START, days)
+    return columns, weather
+
+
+def simulate_loop(planner, columns, weather, days, irrigation_depth=1.0):
+    """Reference implementation: one table lookup per plot per day"""
+    table = app.water_table
+    weather_idx, rain = weather
+    need = np.zeros((len(columns['crop']), days))
+    irrigation = np.zeros_like(need)
+    for p, crop in enumerate(columns['crop']):
+        crop_name = table.crops[crop]
+        stages = list(app.growth_stage_days[crop_name].items())
+        planted = (columns['planting_date'][p] - START).days
+        location = columns['location'][p]
+        deficit = INITIAL_DEFICIT[columns['soil_moisture'][p]] * irrigation_depth
+        for d in range(days):
+            age = d - planted
+            if age < 0 or age >= planner.season_days[crop]:
+                continue
+            stage, end = None, 0
+            for stage, length in stages:
+                end += length
+                if age < end:
+                    break
+            fraction = deficit / irrigation_depth
+            moisture = 'wet' if fraction < WET_BELOW else 'moist' if fraction < MOIST_BELOW else 'dry'
+            weather_name = (table.weathers + [None])[weather_idx[location, d]]
+            idx = table.index(crop_name, stage, columns['soil_type'][p], weather_name,
+                              columns['disease_status'][p], moisture)
+            need[p, d] = table.table[idx] / 7
+            deficit = max(deficit + need[p, d] - rain[location, d], 0.0)
+            if deficit >= irrigation_depth:
+                irrigation[p, d] = deficit
+                deficit = 0.0
+    return need, irrigation
+
+
+def best_time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plots', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    planner = app.irrigation_planner
+
+    columns, weather = sample_inputs(min(args.plots), args.days)
+    expected = simulate_loop(planner, columns, weather, args.days)
+    actual = planner.simulate(columns, weather, START, args.days)
+    for name, a, b in zip(('need', 'irrigation'), expected, actual):
+        assert np.allclose(a, b, atol=1e-5), f'vectorized {name} disagrees with the loop'
+    loop_seconds = best_time(lambda: simulate_loop(planner, columns, weather, args.days), 1)
+    loop_rate = min(args.plots) * args.days / loop_seconds
+
+    print(f"{'implementation':>15} {'plots':>8} {'days':>5} {'time':>10} {'plot-days/s':>14} {'speedup':>8}")
+    print(f"{'loop':>15} {min(args.plots):>8} {args.days:>5} {loop_seconds * 1000:>8.1f}ms {loop_rate:>14,.0f} {1:>7.1f}x")
+    for plots in args.plots:
+        columns, weather = sample_inputs(plots, args.days)
+        seconds = best_time(lambda: planner.simulate(columns, weather, START, args.days), args.repeat)
+        rate = plots * args.days / seconds
+        print(f"{'vectorized':>15} {plots:>8} {args.days:>5} {seconds * 1000:>8.1f}ms {rate:>14,.0f} {rate / loop_rate:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Requests/sec of /predict_water with and without the analysis process pool.
+
+Usage (from the SMART FARMING folder):
+    python -m benchmarks.process_pool [--workers 0 1 2 4] [--clients 8] [--requests 200]
+
+Each ANALYSIS_WORKERS setting runs in a fresh interpreter (the setting is
+read at import), with the result cache and near-duplicate index disabled so
+every request is analysed. Concurrent client threads post distinct images
+through the Flask test client, mimicking a threaded server.
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.synthetic import random_image
+
+
+def run_child(clients, requests, endpoint):
+    """Measure throughput in this process (ANALYSIS_WORKERS is already set)"""
+    from app import app, analysis_pool
+
+    uploads = [random_image(512, seed) for seed in range(32)]
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def client():
+        test_client = app.test_client()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            data = {'image': (io.BytesIO(uploads[i % len(uploads)]), f'{i}.png')}
+            response = test_client.post(endpoint, data=data, content_type='multipart/form-data')
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+    # Warm up the pool so worker start-up is not measured
+    test_client = app.test_client()
+    test_client.post(endpoint, data={'image': (io.BytesIO(uploads[0]), 'warmup.png')},
+                     content_type='multipart/form-data')
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if analysis_pool is not None:
+        analysis_pool.shutdown()
+    print(json.dumps({'requests_per_second': requests / elapsed, 'seconds': elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({0, 1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--endpoint', default='/predict_water')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.clients, args.requests, args.endpoint)
+        return
+
+    print(f"{args.endpoint}: {args.requests} requests from {args.clients} client threads "
+          f"({os.cpu_count()} cores)")
+    print(f"{'workers':>8} {'req/s':>9} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        env = dict(os.environ, ANALYSIS_WORKERS=str(workers), RESULT_CACHE_SIZE='0', SIMILARITY_INDEX_SIZE='0')
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.process_pool', '--child',
+             '--clients', str(args.clients), '--requests', str(args.requests), '--endpoint', args.endpoint],
+            env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        rps = result['requests_per_second']
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>9.1f} {rps / baseline:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
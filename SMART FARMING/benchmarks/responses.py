@@ -0,0 +1,71 @@
+"""Bytes on the wire and serialization time of each response format.
+
+Usage (from the SMART FARMING folder):
+    python -m benchmarks.responses [--iterations 2000]
+
+Real /predict, /predict_water and /calculate_water bodies (demo mode is
+fine) are encoded as plain JSON, with codes=1, with a typical fields=
+selection and as MessagePack (when msgpack is installed), each with and
+without gzip. The encode time includes field selection, codes and
+compression, everything the server does after building the body.
+"""
+import argparse
+import io
+
+import app
+from benchmarks.suite import summarize, time_calls
+from benchmarks.synthetic import field_image
+from responses import compact_response, msgpack
+
+# What a field device typically needs from each endpoint
+FIELDS = {
+    '/predict': 'prediction,confidence,severity',
+    '/predict_water': 'water_needed,recommendations,image_analysis.disease_status,image_analysis.soil_moisture',
+    '/calculate_water': 'water_needed,recommendations'
+}
+
+
+def sample_bodies():
+    client = app.app.test_client()
+    image = field_image(1024, 768)
+    bodies = {}
+    for path in ('/predict', '/predict_water'):
+        response = client.post(path, data={'image': (io.BytesIO(image), 'field.jpg')}, content_type='multipart/form-data')
+        bodies[path] = response.get_json()
+    bodies['/calculate_water'] = client.post('/calculate_water', json={
+        'crop_type': 'tomato', 'soil_type': 'sandy', 'growth_stage': 'flowering', 'weather_condition': 'hot',
+        'disease_status': 'Early Blight', 'soil_moisture': 'dry'}).get_json()
+    return bodies
+
+
+def formats(path):
+    variants = [('json', {}), ('json codes', {'codes': True}), ('json fields', {'fields': FIELDS[path]})]
+    if msgpack is not None:
+        variants += [('msgpack', {'accept': 'application/msgpack'}),
+                     ('msgpack codes', {'accept': 'application/msgpack', 'codes': True})]
+    for name, options in variants:
+        yield name, options
+        yield f'{name} + gzip', dict(options, accept_encoding='gzip')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    for path, body in sample_bodies().items():
+        print(f"\n{path}")
+        print(f"{'format':>22} {'bytes':>7} {'vs json':>8} {'encode p50':>11}")
+        baseline = None
+        for name, options in formats(path):
+            # min_bytes=0 so even small bodies show what gzip does to them
+            encode = lambda i: compact_response(body, app.RECOMMENDATION_CODES, min_bytes=0,
+                                                level=app.COMPRESS_LEVEL, **options)
+            size = len(encode(0)[0])
+            baseline = baseline or size
+            stats = summarize(time_calls(encode, args.iterations))
+            print(f"{name:>22} {size:>7} {size / baseline:>7.0%} {stats['p50_ms'] * 1000:>9.1f}µs")
+
+
+if __name__ == '__main__':
+    main()
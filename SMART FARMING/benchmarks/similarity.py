@@ -0,0 +1,115 @@
+"""Near-duplicate index: lookup latency by index size and hit rate by Hamming distance.
+
+Usage (from the SMART FARMING folder):
+    python -m benchmarks.similarity [--sizes 1000 10000 100000 500000] [--lookups 500] [--plants 200] [--color-delta 4]
+
+Lookup latency is measured with random 64-bit signatures. These almost
+never match, so every lookup scans the whole index (the worst case).
+
+For the hit rate, every synthetic plant photo gets burst variants:
+re-encoded at other JPEG qualities and shifted by a few pixels. These are
+the same shot and should reuse the plant's result. Brighter and darker
+exposures of the same plant should not, since soil moisture and weather
+are read from brightness and colour. For each SIMILARITY_MAX_DISTANCE the
+report gives the share of burst variants matched to their own plant, the
+share matched to a different plant, and the share of re-exposed shots that
+reused a result (false reuse).
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from benchmarks.suite import summarize
+from benchmarks.synthetic import PALETTES, encode, field_array
+from image_io import dhash, mean_color
+from similarity import SimilarityIndex
+
+
+def lookup_latency(sizes, lookups, color_delta, seed=0):
+    rng = np.random.default_rng(seed)
+    print(f"{'entries':>9} {'p50':>9} {'p95':>9} {'max':>9}")
+    for size in sizes:
+        index = SimilarityIndex(size, max_distance=4, max_color_delta=color_delta)
+        colors = rng.integers(0, 256, size=(size, 3))
+        for signature, color in zip(rng.integers(0, 2 ** 64, size=size, dtype=np.uint64), colors):
+            index.add('predict', int(signature), color, {})
+        queries = [int(q) for q in rng.integers(0, 2 ** 64, size=lookups, dtype=np.uint64)]
+        samples = []
+        for query, color in zip(queries, rng.integers(0, 256, size=(lookups, 3))):
+            started = time.perf_counter()
+            index.lookup('predict', query, color)
+            samples.append(time.perf_counter() - started)
+        stats = summarize(samples)
+        print(f"{size:>9} {stats['p50_ms']:>7.3f}ms {stats['p95_ms']:>7.3f}ms {stats['max_ms']:>7.3f}ms")
+
+
+def signature(data):
+    # Same size /predict decodes to
+    img = Image.open(io.BytesIO(data)).convert('RGB').resize((128, 128))
+    return dhash(img), mean_color(img)
+
+
+def burst_variants(img_array):
+    """Encoded shots of the same plant a phone burst or a second pass would produce"""
+    img = Image.fromarray(img_array)
+    height, width = img_array.shape[:2]
+    shifted = [img.crop((dx, dy, width - 8 + dx, height - 8 + dy)) for dx, dy in ((0, 0), (4, 2), (8, 8))]
+    return ([encode(img_array, quality=quality) for quality in (70, 80, 95)]
+            + [encode(np.asarray(variant)) for variant in shifted])
+
+
+def exposure_variants(img_array):
+    """The same plant shot under other light, which the water analysis should see afresh"""
+    img = Image.fromarray(img_array)
+    return [encode(np.asarray(ImageEnhance.Brightness(img).enhance(factor))) for factor in (0.6, 0.8, 1.2, 1.5)]
+
+
+def hit_rates(plants, max_distances, color_delta):
+    palettes = list(PALETTES)
+    originals, variants, exposures = [], [], []
+    for plant in range(plants):
+        img_array = field_array(640, 480, palettes[plant % len(palettes)], seed=plant)
+        originals.append(signature(encode(img_array)))
+        variants.append([signature(data) for data in burst_variants(img_array)])
+        exposures.append([signature(data) for data in exposure_variants(img_array)])
+
+    total = sum(len(v) for v in variants)
+    total_exposures = sum(len(v) for v in exposures)
+    print(f"\n{plants} plants, {total // plants} burst variants and {total_exposures // plants} exposures each, "
+          f"colour delta {color_delta}")
+    print(f"{'distance':>9} {'own plant':>10} {'other plant':>12} {'re-exposed':>11}")
+    for max_distance in max_distances:
+        index = SimilarityIndex(plants, max_distance, color_delta)
+        for plant, (hash_value, color) in enumerate(originals):
+            index.add('predict', hash_value, color, plant)
+        own = other = reused = 0
+        for plant, signatures in enumerate(variants):
+            for query in signatures:
+                match, _ = index.lookup('predict', *query)
+                if match is not None:
+                    own += match == plant
+                    other += match != plant
+        for signatures in exposures:
+            for query in signatures:
+                reused += index.lookup('predict', *query)[0] is not None
+        print(f"{max_distance:>9} {own / total:>10.1%} {other / total:>12.1%} {reused / total_exposures:>11.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 500000])
+    parser.add_argument('--lookups', type=int, default=500)
+    parser.add_argument('--plants', type=int, default=200)
+    parser.add_argument('--distances', type=int, nargs='+', default=[0, 2, 4, 6, 8, 10])
+    parser.add_argument('--color-delta', type=int, default=4, help='SIMILARITY_MAX_COLOR_DELTA')
+    args = parser.parse_args()
+
+    lookup_latency(args.sizes, args.lookups, args.color_delta)
+    hit_rates(args.plants, args.distances, args.color_delta)
+
+
+if __name__ == '__main__':
+    main()
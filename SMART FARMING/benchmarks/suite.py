@@ -0,0 +1,213 @@
+"""End-to-end benchmark suite for the API, the heuristics and the water calculation.
+
+Endpoints are exercised either in-process through the Flask test client or
+against a running server over HTTP. Every iteration uploads a different
+synthetic image (distinct seed) so the result cache never short-circuits
+the pipeline. Nothing touches the network beyond the optional local server,
+and without model.h5 the app simply runs in demo mode (recorded in the
+results' metadata).
+"""
+import io
+import json
+import os
+import platform
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.synthetic import FORMATS, field_array, field_image
+
+# (case name, width, height, palette, format)
+IMAGE_CASES = [
+    ('jpeg-640x480-leafy', 640, 480, 'leafy', 'JPEG'),
+    ('jpeg-4000x3000-leafy', 4000, 3000, 'leafy', 'JPEG'),
+    ('jpeg-1024x768-diseased', 1024, 768, 'diseased', 'JPEG'),
+    ('png-1024x768-dry', 1024, 768, 'dry', 'PNG'),
+    ('webp-1024x768-dark', 1024, 768, 'dark', 'WEBP'),
+]
+
+WATER_CASES = [
+    {'crop_type': 'tomato', 'soil_type': 'loamy', 'growth_stage': 'flowering',
+     'weather_condition': 'sunny', 'disease_status': 'Healthy', 'soil_moisture': 'dry'},
+    {'crop_type': 'rice', 'soil_type': 'clay', 'growth_stage': 'grain_filling',
+     'weather_condition': 'rainy', 'disease_status': 'Late Blight', 'soil_moisture': 'wet'},
+]
+
+
+def summarize(samples):
+    """Latency statistics in milliseconds"""
+    ms = np.asarray(samples) * 1000
+    return {
+        'n': len(ms),
+        'mean_ms': round(float(ms.mean()), 4),
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'min_ms': round(float(ms.min()), 4),
+        'max_ms': round(float(ms.max()), 4)
+    }
+
+
+def time_calls(fn, iterations, warmup=2):
+    """Call fn(i) iterations times after a short warm-up and return per-call seconds"""
+    for i in range(warmup):
+        fn(-1 - i)
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def encode_multipart(filename, data, field='image'):
+    """A multipart/form-data body holding one file, and its Content-Type"""
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n').encode() + data + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+class TestClientTarget:
+    """Runs requests in-process through Flask's test client"""
+
+    def __init__(self):
+        # Measure the full pipeline rather than the result cache
+        os.environ.setdefault('RESULT_CACHE_SIZE', '0')
+        os.environ.setdefault('SIMILARITY_INDEX_SIZE', '0')
+        from app import app
+        self.client = app.test_client()
+        self.name = 'test-client'
+
+    def upload(self, path, filename, data):
+        response = self.client.post(path, data={'image': (io.BytesIO(data), filename)},
+                                    content_type='multipart/form-data')
+        return response.status_code, response.get_json()
+
+    def post_json(self, path, payload):
+        response = self.client.post(path, json=payload)
+        return response.status_code, response.get_json()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.get_json()
+
+
+class HttpTarget:
+    """Runs requests against a server, e.g. http://localhost:5000"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.name = self.base_url
+
+    def _send(self, path, body=None, content_type=None):
+        headers = {'Content-Type': content_type} if content_type else {}
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers)
+        try:
+            with urllib.request.urlopen(req) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b'null')
+
+    def upload(self, path, filename, data):
+        return self._send(path, *encode_multipart(filename, data))
+
+    def post_json(self, path, payload):
+        return self._send(path, json.dumps(payload).encode(), 'application/json')
+
+    def get(self, path):
+        return self._send(path)
+
+
+def _checked(status, body, name):
+    if status != 200:
+        raise RuntimeError(f'{name} answered {status}: {body}')
+    return body
+
+
+def bench_endpoints(target, iterations):
+    results = {}
+    for case, width, height, palette, fmt in IMAGE_CASES:
+        # One distinct upload per call, generated up front so encoding is not timed
+        uploads = {i: field_image(width, height, palette, fmt, seed=i + 1000) for i in range(-2, iterations)}
+        filename = 'upload' + FORMATS[fmt]
+        for path in ('/predict', '/predict_water'):
+            name = f'endpoint:{path}:{case}'
+            results[name] = summarize(time_calls(
+                lambda i: _checked(*target.upload(path, filename, uploads[i]), name), iterations))
+
+    for n, payload in enumerate(WATER_CASES):
+        name = f'endpoint:/calculate_water:case{n}'
+        results[name] = summarize(time_calls(
+            lambda i: _checked(*target.post_json('/calculate_water', payload), name), iterations))
+
+    results['endpoint:/get_crops'] = summarize(time_calls(
+        lambda i: _checked(*target.get('/get_crops'), '/get_crops'), iterations))
+    return results
+
+
+def bench_heuristics(iterations):
+    import app
+    from features import extract_image_features, generate_demo_predictions
+
+    results = {}
+    arrays = {case: field_array(256, 256, palette, seed=7) for case, _, _, palette, _ in IMAGE_CASES}
+    for case, img_array in arrays.items():
+        results[f'micro:extract_image_features:{case}'] = summarize(
+            time_calls(lambda i: extract_image_features(img_array), iterations))
+
+    palettes = [palette for _, _, _, palette, _ in IMAGE_CASES]
+    batch = np.stack([field_array(128, 128, palettes[n % len(palettes)], seed=n) for n in range(32)])
+    results['micro:generate_demo_predictions:32'] = summarize(
+        time_calls(lambda i: generate_demo_predictions(batch), iterations))
+
+    features = extract_image_features(next(iter(arrays.values())))
+    for detector in app.DETECTORS.values():
+        results[f'micro:{detector.__name__}'] = summarize(time_calls(lambda i: detector(features), iterations))
+
+    for n, payload in enumerate(WATER_CASES):
+        args = (payload['crop_type'], payload['soil_type'], payload['growth_stage'],
+                payload['weather_condition'], payload['disease_status'], payload['soil_moisture'])
+        results[f'micro:calculate_water_requirement:case{n}'] = summarize(
+            time_calls(lambda i: app.calculate_water_requirement(*args), iterations))
+
+    columns = {key: [WATER_CASES[n % len(WATER_CASES)][key] for n in range(10000)] for key in WATER_CASES[0]}
+    results['micro:water_table.bulk:10000'] = summarize(
+        time_calls(lambda i: app.water_table.bulk(columns), iterations))
+    return results
+
+
+def run(target_url=None, iterations=20):
+    """Run the whole suite and return the results document"""
+    target = HttpTarget(target_url) if target_url else TestClientTarget()
+    _, server_info = target.get('/test')
+
+    results = bench_endpoints(target, iterations)
+    results.update(bench_heuristics(iterations * 5))
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'target': target.name,
+            'iterations': iterations,
+            'model_available': bool(server_info and server_info.get('model_available')),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'results': results
+    }
+
+
+def compare(baseline, candidate, threshold=0.10, stat='p50_ms'):
+    """Rows of (name, baseline, candidate, ratio, regressed) for benchmarks present in both runs"""
+    rows = []
+    for name in sorted(set(baseline['results']) & set(candidate['results'])):
+        before = baseline['results'][name][stat]
+        after = candidate['results'][name][stat]
+        ratio = after / before if before else float('inf')
+        rows.append((name, before, after, ratio, ratio > 1 + threshold))
+    return rows
@@ -0,0 +1,56 @@
+"""In-memory synthetic images for benchmarks (no files or network needed)."""
+import io
+
+import numpy as np
+from PIL import Image
+
+# Dominant colours steering the heuristics towards different detections
+PALETTES = {
+    'leafy': (70, 160, 60),      # bright green canopy
+    'dry': (190, 170, 120),      # pale, sandy field
+    'dark': (50, 60, 40),        # dusk / wet soil
+    'diseased': (120, 100, 50)   # brown, blighted leaves
+}
+
+FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+
+
+def field_array(width, height, palette='leafy', seed=0):
+    """A field-like RGB array: sky gradient, canopy in the palette colour and soil at the bottom"""
+    rng = np.random.default_rng(seed)
+    rows = np.linspace(0, 1, height)[:, None]
+    base = np.array(PALETTES[palette], dtype=np.float64)
+    img = np.empty((height, width, 3))
+    img[...] = base
+    img[:height // 5] = (150, 190, 230)
+    img[int(height * 0.7):] = base * 0.6 + (40, 25, 10)
+    img *= (0.85 + 0.3 * rows)[:, :, None]
+    # Low-frequency "leaf" texture, upsampled cheaply
+    texture = rng.normal(0, 25, size=(height // 16 + 1, width // 16 + 1, 3))
+    img += np.repeat(np.repeat(texture, 16, axis=0), 16, axis=1)[:height, :width]
+    img += rng.normal(0, 6, size=img.shape)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def encode(img_array, fmt='JPEG', quality=90):
+    buffer = io.BytesIO()
+    options = {'quality': quality} if fmt in ('JPEG', 'WEBP') else {}
+    Image.fromarray(img_array).save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+def field_image(width, height, palette='leafy', fmt='JPEG', seed=0):
+    """Encoded bytes of a synthetic field photo"""
+    return encode(field_array(width, height, palette, seed), fmt)
+
+
+def synthetic_photo(megapixels, seed=0, fmt='JPEG'):
+    """A 4:3 field photo of roughly the given size"""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    return field_image(width, int(width * 3 / 4), fmt=fmt, seed=seed)
+
+
+def random_image(size, seed=0, fmt='PNG'):
+    """Uniform noise: worst case for compression and edge density"""
+    rng = np.random.default_rng(seed)
+    return encode(rng.integers(0, 256, size=(size, size, 3), dtype=np.uint8), fmt)
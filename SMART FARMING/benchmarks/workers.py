@@ -0,0 +1,176 @@
+"""Total memory and throughput of multi-worker gunicorn deployments, by serving mode.
+
+Usage (from the SMART FARMING folder, with gunicorn installed):
+    python -m benchmarks.workers [--workers 1 2 4 8] [--modes per-worker preload remote] [--seconds 10]
+
+Each mode and worker count starts gunicorn -c gunicorn.conf.py on a local
+port:
+
+    per-worker - no preload; every worker imports the app and loads the model
+    preload    - INFERENCE_BACKEND=tflite; the app and model are loaded in the master
+                 and shared copy-on-write (a Keras model cannot be preloaded)
+    remote     - INFERENCE_BACKEND=remote; one inference_server.py holds the model
+
+Once the server has warmed up, concurrent clients post distinct images to
+/predict for --seconds. The report gives requests per second, then the
+memory of the whole process tree (master, workers and inference server):
+summed RSS, which counts shared pages once per process, and summed PSS,
+which splits them between the processes sharing them. remote needs a model
+file, since the inference server has nothing to serve in demo mode; preload
+runs in demo mode without model.tflite.
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.asgi import HOST, free_port
+from benchmarks.suite import encode_multipart
+from benchmarks.synthetic import random_image
+from inference import MODEL_PATHS, model_file_ready
+
+MODES = {
+    'per-worker': {'GUNICORN_PRELOAD': '0'},
+    'preload': {'GUNICORN_PRELOAD': '1', 'INFERENCE_BACKEND': 'tflite'},
+    'remote': {'GUNICORN_PRELOAD': '1', 'INFERENCE_BACKEND': 'remote'}
+}
+
+
+def process_tree(pid):
+    """pid and every process descended from it"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # The parent pid follows the parenthesised command name
+                    parent = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def memory_kb(pid):
+    """(RSS, PSS) in KB for one process, from /proc/<pid>/smaps_rollup"""
+    rss = pss = 0
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Rss:'):
+                    rss = int(line.split()[1])
+                elif line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, pss
+
+
+def post(connection, body, content_type):
+    connection.request('POST', '/predict', body, {'Content-Type': content_type})
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def wait_until_ready(port, process, timeout=180):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited during start-up')
+        try:
+            connection = http.client.HTTPConnection(HOST, port, timeout=5)
+            connection.request('GET', '/test')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start in time')
+
+
+def load(port, uploads, clients, seconds):
+    """Requests per second and failures from clients posting to /predict for seconds"""
+    counts = [0] * clients
+    failures = [0] * clients
+    stop = time.perf_counter() + seconds
+
+    def client(n):
+        connection = http.client.HTTPConnection(HOST, port, timeout=60)
+        i = n
+        while time.perf_counter() < stop:
+            try:
+                status = post(connection, *uploads[i % len(uploads)])
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                status = 0
+            if status == 200:
+                counts[n] += 1
+            else:
+                failures[n] += 1
+            i += clients
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - started), sum(failures)
+
+
+def run(mode, workers, uploads, args):
+    port = free_port()
+    socket_path = f'/tmp/smart-farming-bench-{port}.sock'
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_BIND=f'{HOST}:{port}',
+               GUNICORN_THREADS=str(args.threads), RESULT_CACHE_SIZE='0', SIMILARITY_INDEX_SIZE='0',
+               ADMISSION_IMAGE_CONCURRENCY='0', HISTORY_DB='', MODEL_LOADING='eager', INFERENCE_SOCKET=socket_path, **MODES[mode])
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port, process)
+        # Every worker answers a few requests first, so lazily built state is counted
+        load(port, uploads, workers * args.threads, 1.0)
+        rps, failed = load(port, uploads, args.clients, args.seconds)
+        tree = process_tree(process.pid)
+        rss, pss = (sum(values) for values in zip(*(memory_kb(pid) for pid in tree)))
+        print(f"{mode:>11} {workers:>8} {len(tree):>6} {rps:>9.1f} {failed:>7} "
+              f"{rss / 1024:>9.0f}MB {pss / 1024:>9.0f}MB")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--image-size', type=int, default=512)
+    args = parser.parse_args()
+
+    modes = args.modes
+    if 'remote' in modes and not any(model_file_ready(MODEL_PATHS[kind]) for kind in ('keras', 'tflite')):
+        print("⚠️  Skipping remote: no model file for the inference server to load")
+        modes = [mode for mode in modes if mode != 'remote']
+
+    uploads = [encode_multipart(f'{seed}.png', random_image(args.image_size, seed)) for seed in range(64)]
+    print(f"/predict from {args.clients} clients for {args.seconds:g}s per run ({os.cpu_count()} cores)")
+    print(f"{'mode':>11} {'workers':>8} {'procs':>6} {'req/s':>9} {'failed':>7} {'total RSS':>11} {'total PSS':>11}")
+    for mode in modes:
+        for workers in args.workers:
+            run(mode, workers, uploads, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""LRU cache of prediction results keyed on a hash of the uploaded bytes."""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_key(namespace, data):
+    """Cache key for an upload: the endpoint name plus a digest of its bytes"""
+    return f"{namespace}:{hashlib.blake2b(data, digest_size=16).hexdigest()}"
+
+
+def stream_content_key(namespace, stream, chunk_size=1024 * 1024):
+    """Same as content_key, hashing a seekable stream in chunks and rewinding it"""
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return f"{namespace}:{digest.hexdigest()}"
+
+
+class ResultCache:
+    """Thread-safe LRU of JSON-serialisable results with optional TTL and memory cap.
+
+    max_entries=0 disables the cache (get always misses, set is a no-op).
+    Entry sizes are estimated from their JSON encoding.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl_seconds=0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (value, size, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and time.monotonic() - entry[2] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+
+    def check_version(self, version):
+        """Drop every entry when the producer of the results (e.g. the model) changes"""
+        with self._lock:
+            if version == self._version:
+                return
+            changed = self._version is not None
+            self._version = version
+            if changed:
+                self._entries.clear()
+                self._bytes = 0
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
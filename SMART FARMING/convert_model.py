@@ -0,0 +1,89 @@
+"""Convert model.h5 to a TFLite model and check it against the Keras output.
+
+Usage (from the SMART FARMING folder, where TensorFlow is installed):
+    python convert_model.py [model.h5] [model.tflite] [--quantize none|dynamic|float16|int8] [--samples 64]
+
+The conversion needs TensorFlow; serving the result only needs a TFLite
+runtime (tflite_runtime or ai_edge_litert), selected with
+INFERENCE_BACKEND=tflite or picked automatically when model.tflite exists.
+
+After converting, both models classify the same synthetic field images and
+the command reports the largest probability difference and top-1 agreement,
+exiting with status 1 if agreement falls below --min-agreement.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from benchmarks.synthetic import PALETTES, field_array
+from inference import KerasBackend, TFLiteBackend
+
+
+def sample_batch(count, size, seed=0):
+    """Synthetic images in every palette, scaled to 0-1 like the API does"""
+    palettes = list(PALETTES)
+    images = [field_array(size[1], size[0], palettes[i % len(palettes)], seed=seed + i) for i in range(count)]
+    return np.stack(images).astype(np.float32) / 255.0
+
+
+def convert(keras_path, tflite_path, quantize):
+    import tensorflow as tf # pyright: ignore[reportMissingImports]
+
+    keras_model = tf.keras.models.load_model(keras_path)
+    # /predict feeds 128x128 images when the model accepts any size
+    size = tuple(dim or 128 for dim in keras_model.input_shape[1:3])
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+
+    if quantize == 'dynamic':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif quantize == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == 'int8':
+        # Full integer quantization calibrated on synthetic field images
+        calibration = sample_batch(100, size, seed=10_000)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ([image[np.newaxis]] for image in calibration)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+        converter.inference_output_type = tf.uint8
+
+    with open(tflite_path, 'wb') as f:
+        f.write(converter.convert())
+    return size
+
+
+def check_parity(keras_path, tflite_path, size, samples):
+    """Largest absolute probability difference and top-1 agreement between the two models"""
+    batch = sample_batch(samples, size)
+    expected = KerasBackend(keras_path).predict(batch)
+    tflite = TFLiteBackend(tflite_path)
+    actual = np.concatenate([tflite.predict(batch[i:i + 1]) for i in range(len(batch))])
+    max_diff = float(np.max(np.abs(expected - actual)))
+    agreement = float(np.mean(np.argmax(expected, axis=1) == np.argmax(actual, axis=1)))
+    return max_diff, agreement
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('keras_path', nargs='?', default='model.h5')
+    parser.add_argument('tflite_path', nargs='?', default='model.tflite')
+    parser.add_argument('--quantize', choices=['none', 'dynamic', 'float16', 'int8'], default='dynamic')
+    parser.add_argument('--samples', type=int, default=64, help='synthetic images used for the parity check')
+    parser.add_argument('--min-agreement', type=float, default=0.98)
+    args = parser.parse_args()
+
+    size = convert(args.keras_path, args.tflite_path, args.quantize)
+    print(f"✅ Wrote {args.tflite_path} ({args.quantize} quantization)")
+
+    max_diff, agreement = check_parity(args.keras_path, args.tflite_path, size, args.samples)
+    print(f"📊 Parity over {args.samples} images: max |Δp| = {max_diff:.4f}, top-1 agreement = {agreement:.1%}")
+    if agreement < args.min_agreement:
+        print(f"❌ Agreement below {args.min_agreement:.0%}, keep using the Keras backend")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""Crop calendar knowledge base with a precomputed month x crop suitability index.
+
+The data used to live in script.js and was rebuilt on every click. Here it is
+loaded once at startup. Every /crop_calendar answer is serialised ahead of
+time with its ETag, so a request is a dict lookup and repeat clients get
+304 Not Modified. Crops that also appear in water_requirements have their
+water figures (base weekly inches, growth-stage multipliers) attached from
+there, so the two data sets cannot drift apart.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+MONTH_SEASONS = {
+    'january': 'winter', 'february': 'winter', 'march': 'spring', 'april': 'spring',
+    'may': 'spring', 'june': 'summer', 'july': 'summer', 'august': 'summer',
+    'september': 'fall', 'october': 'fall', 'november': 'fall', 'december': 'winter'
+}
+
+SEASONS = ('winter', 'spring', 'summer', 'fall')
+
+CROPS = {
+    'tomato': {
+        'name': 'Tomato',
+        'seasons': ['spring', 'summer'],
+        'planting_time': 'Plant 2-3 weeks after last frost date',
+        'harvest_time': '60-85 days from transplanting',
+        'fertilizer_schedule': [
+            'At planting: Apply balanced fertilizer (10-10-10)',
+            '3 weeks after planting: Apply nitrogen-rich fertilizer',
+            'When flowers appear: Apply phosphorus-rich fertilizer',
+            'Every 2-3 weeks: Apply liquid fertilizer'
+        ],
+        'watering_needs': 'Water deeply 1-2 inches per week. Keep soil consistently moist but not waterlogged.',
+        'climate_needs': 'Full sun (6-8 hours daily). Temperature: 65-85°F (18-29°C).',
+        'growing_tips': 'Stake or cage plants for support. Remove suckers for better fruit production. Mulch to retain moisture.'
+    },
+    'potato': {
+        'name': 'Potato',
+        'seasons': ['spring', 'fall'],
+        'planting_time': 'Plant 2-4 weeks before last frost date',
+        'harvest_time': '80-120 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            'When plants are 6 inches tall: Apply nitrogen fertilizer',
+            'When flowering begins: Apply potassium-rich fertilizer',
+            'Stop fertilizing 2 weeks before harvest'
+        ],
+        'watering_needs': 'Water 1-2 inches per week. Increase during tuber formation.',
+        'climate_needs': 'Full sun. Temperature: 60-70°F (15-21°C). Cool weather crop.',
+        'growing_tips': 'Hill soil around plants as they grow. Keep tubers covered to prevent greening.'
+    },
+    'onion': {
+        'name': 'Onion',
+        'seasons': ['spring', 'fall'],
+        'planting_time': 'Plant in early spring or fall',
+        'harvest_time': '90-160 days depending on variety',
+        'fertilizer_schedule': [
+            'Before planting: Apply phosphorus-rich fertilizer',
+            '3 weeks after planting: Apply nitrogen fertilizer',
+            'When bulbs start forming: Apply balanced fertilizer',
+            'Stop fertilizing 3 weeks before harvest'
+        ],
+        'watering_needs': 'Water 1 inch per week. Reduce watering as bulbs mature.',
+        'climate_needs': 'Full sun. Temperature: 55-75°F (13-24°C).',
+        'growing_tips': 'Plant in loose, well-draining soil. Space bulbs 4-6 inches apart.'
+    },
+    'carrot': {
+        'name': 'Carrot',
+        'seasons': ['spring', 'fall'],
+        'planting_time': 'Plant 2-4 weeks before last frost',
+        'harvest_time': '60-80 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply phosphorus-rich fertilizer',
+            'When tops are 4 inches tall: Apply nitrogen fertilizer',
+            'Avoid high nitrogen fertilizers during root development'
+        ],
+        'watering_needs': 'Water 1 inch per week. Keep soil consistently moist.',
+        'climate_needs': 'Full sun to partial shade. Temperature: 60-70°F (15-21°C).',
+        'growing_tips': 'Plant in loose, sandy soil. Thin seedlings to prevent crowding.'
+    },
+    'cabbage': {
+        'name': 'Cabbage',
+        'seasons': ['spring', 'fall'],
+        'planting_time': 'Plant 4-6 weeks before last frost',
+        'harvest_time': '60-100 days from transplanting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            '3 weeks after planting: Apply nitrogen fertilizer',
+            'When heads start forming: Apply balanced fertilizer'
+        ],
+        'watering_needs': 'Water 1-1.5 inches per week. Keep soil consistently moist.',
+        'climate_needs': 'Full sun. Temperature: 60-65°F (15-18°C). Cool weather crop.',
+        'growing_tips': 'Plant in rich, well-draining soil. Space plants 12-18 inches apart.'
+    },
+    'cauliflower': {
+        'name': 'Cauliflower',
+        'seasons': ['spring', 'fall'],
+        'planting_time': 'Plant 4-6 weeks before last frost',
+        'harvest_time': '55-100 days from transplanting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            '3 weeks after planting: Apply nitrogen fertilizer',
+            'When heads start forming: Apply balanced fertilizer'
+        ],
+        'watering_needs': 'Water 1-1.5 inches per week. Consistent moisture is crucial.',
+        'climate_needs': 'Full sun. Temperature: 60-65°F (15-18°C). Cool weather crop.',
+        'growing_tips': 'Blanch heads by covering with leaves when they reach 2-3 inches.'
+    },
+    'peas': {
+        'name': 'Peas',
+        'seasons': ['spring', 'fall'],
+        'planting_time': 'Plant 4-6 weeks before last frost',
+        'harvest_time': '55-70 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply phosphorus-rich fertilizer',
+            'When plants are 6 inches tall: Apply nitrogen fertilizer',
+            'Peas fix their own nitrogen, so avoid over-fertilizing'
+        ],
+        'watering_needs': 'Water 1 inch per week. Increase during flowering and pod formation.',
+        'climate_needs': 'Full sun to partial shade. Temperature: 55-70°F (13-21°C).',
+        'growing_tips': 'Provide support for climbing varieties. Harvest regularly to encourage more pods.'
+    },
+    'beans': {
+        'name': 'Beans',
+        'seasons': ['spring', 'summer'],
+        'planting_time': 'Plant after last frost date',
+        'harvest_time': '50-65 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            'When plants are 6 inches tall: Apply nitrogen fertilizer',
+            'Beans fix nitrogen, so avoid over-fertilizing'
+        ],
+        'watering_needs': 'Water 1 inch per week. Increase during flowering and pod formation.',
+        'climate_needs': 'Full sun. Temperature: 70-80°F (21-27°C).',
+        'growing_tips': 'Provide support for pole beans. Harvest regularly to encourage more pods.'
+    },
+    'cucumber': {
+        'name': 'Cucumber',
+        'seasons': ['spring', 'summer'],
+        'planting_time': 'Plant 1-2 weeks after last frost',
+        'harvest_time': '50-70 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            'When vines start running: Apply nitrogen fertilizer',
+            'When flowers appear: Apply phosphorus-rich fertilizer'
+        ],
+        'watering_needs': 'Water 1-2 inches per week. Keep soil consistently moist.',
+        'climate_needs': 'Full sun. Temperature: 70-85°F (21-29°C).',
+        'growing_tips': 'Provide support for vining varieties. Harvest regularly to encourage more fruit.'
+    },
+    'pepper': {
+        'name': 'Pepper',
+        'seasons': ['spring', 'summer'],
+        'planting_time': 'Plant 2-3 weeks after last frost',
+        'harvest_time': '60-90 days from transplanting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            '3 weeks after planting: Apply nitrogen fertilizer',
+            'When flowers appear: Apply phosphorus-rich fertilizer',
+            'Every 3-4 weeks: Apply balanced fertilizer'
+        ],
+        'watering_needs': 'Water 1-2 inches per week. Allow soil to dry slightly between watering.',
+        'climate_needs': 'Full sun. Temperature: 70-85°F (21-29°C).',
+        'growing_tips': 'Plant in warm soil. Provide support for heavy fruit. Mulch to retain moisture.'
+    },
+    'lettuce': {
+        'name': 'Lettuce',
+        'seasons': ['spring', 'fall'],
+        'planting_time': 'Plant 4-6 weeks before last frost',
+        'harvest_time': '45-60 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            '2 weeks after planting: Apply nitrogen fertilizer',
+            'Lettuce is a light feeder, avoid over-fertilizing'
+        ],
+        'watering_needs': 'Water 1 inch per week. Keep soil consistently moist.',
+        'climate_needs': 'Partial shade to full sun. Temperature: 60-70°F (15-21°C).',
+        'growing_tips': 'Plant in loose, rich soil. Harvest outer leaves for continuous production.'
+    },
+    'spinach': {
+        'name': 'Spinach',
+        'seasons': ['spring', 'fall'],
+        'planting_time': 'Plant 4-6 weeks before last frost',
+        'harvest_time': '40-50 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            '2 weeks after planting: Apply nitrogen fertilizer',
+            'Spinach is a light feeder, avoid over-fertilizing'
+        ],
+        'watering_needs': 'Water 1 inch per week. Keep soil consistently moist.',
+        'climate_needs': 'Partial shade to full sun. Temperature: 50-70°F (10-21°C).',
+        'growing_tips': 'Plant in rich, well-draining soil. Harvest outer leaves for continuous production.'
+    },
+    'corn': {
+        'name': 'Corn',
+        'seasons': ['spring', 'summer'],
+        'planting_time': 'Plant 2 weeks after last frost',
+        'harvest_time': '60-100 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            'When plants are 12 inches tall: Apply nitrogen fertilizer',
+            'When tassels appear: Apply nitrogen fertilizer',
+            'Stop fertilizing when silks appear'
+        ],
+        'watering_needs': 'Water 1-2 inches per week. Increase during tasseling and silking.',
+        'climate_needs': 'Full sun. Temperature: 60-95°F (15-35°C).',
+        'growing_tips': 'Plant in blocks for better pollination. Plant multiple rows for cross-pollination.'
+    },
+    'wheat': {
+        'name': 'Wheat',
+        'seasons': ['fall', 'spring'],
+        'planting_time': 'Plant in fall (winter wheat) or early spring (spring wheat)',
+        'harvest_time': '110-130 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply phosphorus and potassium',
+            'Early spring: Apply nitrogen fertilizer',
+            'When stems start elongating: Apply nitrogen fertilizer'
+        ],
+        'watering_needs': 'Water 1-2 inches per week during growing season.',
+        'climate_needs': 'Full sun. Temperature: 60-75°F (15-24°C).',
+        'growing_tips': 'Plant in well-draining soil. Monitor for pests and diseases regularly.'
+    },
+    'rice': {
+        'name': 'Rice',
+        'seasons': ['spring', 'summer'],
+        'planting_time': 'Plant in spring after last frost',
+        'harvest_time': '105-150 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            'When plants are 6 inches tall: Apply nitrogen fertilizer',
+            'When panicles form: Apply nitrogen fertilizer'
+        ],
+        'watering_needs': 'Keep soil flooded or very wet throughout growing season.',
+        'climate_needs': 'Full sun. Temperature: 70-85°F (21-29°C).',
+        'growing_tips': 'Requires flooded conditions. Plant in clay soil that holds water well.'
+    },
+    'cotton': {
+        'name': 'Cotton',
+        'seasons': ['spring', 'summer'],
+        'planting_time': 'Plant 2-3 weeks after last frost',
+        'harvest_time': '150-180 days from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            'When plants are 6 inches tall: Apply nitrogen fertilizer',
+            'When flowers appear: Apply nitrogen fertilizer',
+            'When bolls form: Apply potassium fertilizer'
+        ],
+        'watering_needs': 'Water 1-2 inches per week. Increase during flowering and boll formation.',
+        'climate_needs': 'Full sun. Temperature: 70-95°F (21-35°C).',
+        'growing_tips': 'Plant in warm soil. Monitor for pests like boll weevils. Harvest when bolls open.'
+    },
+    'sugarcane': {
+        'name': 'Sugarcane',
+        'seasons': ['spring', 'summer'],
+        'planting_time': 'Plant in spring after last frost',
+        'harvest_time': '12-18 months from planting',
+        'fertilizer_schedule': [
+            'Before planting: Apply balanced fertilizer (10-10-10)',
+            '3 months after planting: Apply nitrogen fertilizer',
+            'Every 3 months: Apply nitrogen and potassium fertilizer',
+            'Stop fertilizing 3 months before harvest'
+        ],
+        'watering_needs': 'Water 2-3 inches per week. Requires consistent moisture.',
+        'climate_needs': 'Full sun. Temperature: 70-95°F (21-35°C). Tropical/subtropical crop.',
+        'growing_tips': 'Plant in rich, well-draining soil. Requires long growing season. Harvest in winter.'
+    }
+}
+
+
+class CropCalendar:
+    """Suitability index and pre-serialised /crop_calendar answers for every month/crop query"""
+
+    def __init__(self, crops, water_requirements=None):
+        self.crops = {}
+        for key, info in crops.items():
+            entry = dict(info)
+            if water_requirements and key in water_requirements:
+                entry['water'] = {
+                    'base_water': water_requirements[key]['base_water'],
+                    'growth_stages': water_requirements[key]['growth_stages']
+                }
+            self.crops[key] = entry
+        self.names = list(self.crops)
+        self.months = list(MONTH_SEASONS)
+
+        # suitable[m, c]: crop c is in season in month m
+        self.suitable = np.array([[MONTH_SEASONS[month] in self.crops[crop]['seasons'] for crop in self.names]
+                                  for month in self.months])
+        self.by_season = {season: [crop for crop in self.names if season in self.crops[crop]['seasons']]
+                          for season in SEASONS}
+
+        self._responses = {}
+        for month in [None] + self.months:
+            for crop in [None] + self.names:
+                body = json.dumps(self._answer(month, crop)).encode()
+                self._responses[(month, crop)] = (body, hashlib.blake2b(body, digest_size=16).hexdigest())
+
+    def months_for(self, crop):
+        c = self.names.index(crop)
+        return [month for month, ok in zip(self.months, self.suitable[:, c]) if ok]
+
+    def crops_for(self, month):
+        m = self.months.index(month)
+        return [crop for crop, ok in zip(self.names, self.suitable[m]) if ok]
+
+    def _answer(self, month, crop):
+        if month and crop:
+            season = MONTH_SEASONS[month]
+            return dict(self.crops[crop], crop=crop, selected_month=month, selected_season=season,
+                        is_good_time=season in self.crops[crop]['seasons'])
+        if crop:
+            return dict(self.crops[crop], crop=crop, planting_months=self.months_for(crop))
+        if month:
+            return {'month': month, 'season': MONTH_SEASONS[month], 'suitable_crops': self.crops_for(month)}
+        return {
+            'months': self.months,
+            'crops': self.names,
+            'seasons': self.by_season,
+            'suitability': self.suitable.astype(int).tolist()
+        }
+
+    def lookup(self, month=None, crop=None):
+        """(JSON body, ETag) for a query, or None for an unknown month or crop"""
+        return self._responses.get((month or None, crop or None))
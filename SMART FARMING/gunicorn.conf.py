@@ -0,0 +1,65 @@
+"""gunicorn settings for multi-worker serving.
+
+Usage (from the SMART FARMING folder):
+    gunicorn -c gunicorn.conf.py app:app
+
+With INFERENCE_BACKEND=tflite or remote, app.py is imported once in the
+master before the workers fork (preload_app), so the water table, crop
+calendar and, with the TFLite backend, the model are shared copy-on-write
+instead of being loaded again by every worker. With remote, the master also
+starts inference_server.py, which holds the only copy of the model, and the
+workers send it their batches over a Unix socket.
+
+TensorFlow is not fork-safe, so preloading is off by default for any other
+backend (each worker imports the app itself), and a preloaded master that
+has imported TensorFlow refuses to start.
+"""
+import os
+import subprocess
+import sys
+import time
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+# Only backends that never import TensorFlow in the master are preloaded by default
+SAFE_TO_PRELOAD = os.environ.get('INFERENCE_BACKEND') in ('tflite', 'remote')
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1' if SAFE_TO_PRELOAD else '0') == '1'
+# Large uploads on slow links take a while to arrive
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+
+REMOTE_INFERENCE = os.environ.get('INFERENCE_BACKEND') == 'remote'
+INFERENCE_SOCKET = os.environ.get('INFERENCE_SOCKET', '/tmp/smart-farming-inference.sock')
+INFERENCE_SERVER_TIMEOUT = float(os.environ.get('INFERENCE_SERVER_TIMEOUT', '120'))
+
+
+def on_starting(server):
+    """Refuse a fork-unsafe preload, then start the shared inference process before any worker needs it"""
+    # Runs after the preloaded app (and whatever model it loaded) has been imported
+    if preload_app and 'tensorflow' in sys.modules:
+        raise RuntimeError('The preloaded app imported TensorFlow, which is not fork-safe: serve Keras '
+                           'models with INFERENCE_BACKEND=remote or as TFLite, or set GUNICORN_PRELOAD=0')
+    if not REMOTE_INFERENCE or os.environ.get('INFERENCE_SERVER_AUTOSTART', '1') != '1':
+        return
+    if os.path.exists(INFERENCE_SOCKET):
+        os.unlink(INFERENCE_SOCKET)
+    server.inference_process = subprocess.Popen(
+        [sys.executable, 'inference_server.py', '--socket', INFERENCE_SOCKET],
+        cwd=os.path.dirname(os.path.abspath(__file__)))
+    deadline = time.monotonic() + INFERENCE_SERVER_TIMEOUT
+    while not os.path.exists(INFERENCE_SOCKET):
+        if server.inference_process.poll() is not None:
+            raise RuntimeError('inference_server.py exited during start-up')
+        if time.monotonic() > deadline:
+            server.inference_process.terminate()
+            raise RuntimeError('inference_server.py did not start in time')
+        time.sleep(0.1)
+    server.log.info('Inference server listening on %s (pid %s)', INFERENCE_SOCKET, server.inference_process.pid)
+
+
+def on_exit(server):
+    process = getattr(server, 'inference_process', None)
+    if process is not None:
+        process.terminate()
+        process.wait()
@@ -0,0 +1,179 @@
+"""Append-only prediction history in SQLite (WAL mode).
+
+Request threads only put a row on a queue. A background writer inserts
+whatever is queued in one transaction per batch, so the request path never
+waits on disk. Readers use their own per-thread connections; in WAL mode they
+never block the writer. Every query is ordered by time and is served by one
+of the indexes, on ts, (crop, ts), (disease, ts) and (image_hash, ts). Pages
+are fetched with a keyset cursor, so queries stay fast at millions of rows.
+"""
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+COLUMNS = ('ts', 'endpoint', 'image_hash', 'crop', 'disease', 'confidence', 'growth_stage', 'soil_type',
+           'soil_moisture', 'weather_condition', 'water_needed', 'probabilities')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    endpoint TEXT NOT NULL,
+    image_hash TEXT NOT NULL,
+    crop TEXT,
+    disease TEXT,
+    confidence REAL,
+    growth_stage TEXT,
+    soil_type TEXT,
+    soil_moisture TEXT,
+    weather_condition TEXT,
+    water_needed REAL,
+    probabilities TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (ts);
+CREATE INDEX IF NOT EXISTS idx_predictions_crop_ts ON predictions (crop, ts);
+CREATE INDEX IF NOT EXISTS idx_predictions_disease_ts ON predictions (disease, ts);
+CREATE INDEX IF NOT EXISTS idx_predictions_image_ts ON predictions (image_hash, ts);
+"""
+
+# Query parameters matched for equality (all but endpoint have an index led by the column)
+FILTERS = ('crop', 'disease', 'image_hash', 'endpoint')
+
+
+class HistoryStore:
+    """Batched, thread-safe writer and indexed reader for the predictions table"""
+
+    def __init__(self, path, batch_size=500, flush_interval=1.0, max_queue=100000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(max_queue)
+        self._local = threading.local()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL with synchronous=NORMAL only risks the last commits on power loss, never corruption
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def record(self, **row):
+        """Queue one prediction; dropped (and counted) if the writer has fallen far behind"""
+        self._ensure_started()
+        row.setdefault('ts', time.time())
+        if isinstance(row.get('probabilities'), dict):
+            row['probabilities'] = json.dumps(row['probabilities'])
+        try:
+            self._queue.put_nowait(tuple(row.get(column) for column in COLUMNS))
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self):
+        # Started lazily so a pre-forking server never forks a live thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        conn = self._connect()
+        insert = f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        while True:
+            rows = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            stop = None in rows
+            rows = [row for row in rows if row is not None]
+            if rows:
+                try:
+                    with conn:
+                        conn.executemany(insert, rows)
+                    self.written += len(rows)
+                    self.batches += 1
+                except sqlite3.Error as e:
+                    self.dropped += len(rows)
+                    print(f"⚠️  Could not write prediction history: {e}")
+            if stop:
+                conn.close()
+                return
+
+    def close(self):
+        """Write everything still queued and stop the writer"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _reader(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    def query(self, start=None, end=None, limit=100, cursor=None, **filters):
+        """Newest-first rows in [start, end) matching the filters, and the cursor for the next page.
+
+        cursor is the 'ts:id' string returned with the previous page.
+        """
+        clauses, params = [], []
+        for name in FILTERS:
+            if filters.get(name) is not None:
+                clauses.append(f'{name} = ?')
+                params.append(filters[name])
+        if start is not None:
+            clauses.append('ts >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('ts < ?')
+            params.append(end)
+        if cursor:
+            ts, row_id = cursor.split(':')
+            clauses.append('(ts < ? OR (ts = ? AND id < ?))')
+            params.extend([float(ts), float(ts), int(row_id)])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._reader().execute(
+            f'SELECT * FROM predictions {where} ORDER BY ts DESC, id DESC LIMIT ?', params + [limit]).fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(row)
+            if record['probabilities']:
+                record['probabilities'] = json.loads(record['probabilities'])
+            records.append(record)
+        next_cursor = f"{rows[-1]['ts']!r}:{rows[-1]['id']}" if len(rows) == limit else None
+        return records, next_cursor
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'batches': self.batches
+        }
+
+
+def open_history(path, **options):
+    """A HistoryStore that is flushed at interpreter exit, or None when path is empty"""
+    if not path:
+        return None
+    store = HistoryStore(path, **options)
+    atexit.register(store.close)
+    return store
@@ -0,0 +1,121 @@
+"""Decoding uploads straight to the resolution the analysis needs.
+
+Phones send 12-megapixel JPEGs that are immediately resized to 128 or 256
+pixels. JPEG draft mode lets libjpeg decode at 1/2, 1/4 or 1/8 scale using
+DCT scaling, and Image.reduce() box-downsamples other formats by an integer
+factor, so only a small fraction of the full-resolution pixels is ever
+materialised before the final resize.
+
+DECODE_QUALITY trades accuracy for speed:
+    exact    - full decode then resize (the original behaviour)
+    balanced - decode to at least 2x the target size, then resize (default)
+    fast     - decode to at least the target size, then resize
+"""
+import os
+
+import numpy as np
+from PIL import Image
+
+DECODE_QUALITY = os.environ.get('DECODE_QUALITY', 'balanced')
+
+# Largest image (width x height, read from the header) accepted for decoding
+MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', str(64_000_000)))
+
+# Most pixels and memory tiled analysis (drone shots, orthomosaics) decodes at
+# once: the draft-mode size of a JPEG, one row of tiles of an uncompressed TIFF
+TILED_MAX_IMAGE_PIXELS = int(os.environ.get('TILED_MAX_IMAGE_PIXELS', str(500_000_000)))
+TILED_MAX_DECODED_MB = float(os.environ.get('TILED_MAX_DECODED_MB', '1024'))
+
+# open_image() and check_decoded_size() enforce the per-endpoint limits; PIL's
+# own decompression-bomb check stays on as a backstop, sized for the largest
+# header any endpoint takes (JPEG draft mode decodes as little as 1/64 of it)
+Image.MAX_IMAGE_PIXELS = max(MAX_IMAGE_PIXELS, 64 * TILED_MAX_IMAGE_PIXELS)
+
+# Smallest intermediate size, as a multiple of the target, kept before the final resize
+OVERSAMPLE = {
+    'exact': None,
+    'balanced': 2,
+    'fast': 1
+}
+
+# reduce() averages pixel values, which is meaningless for palette/bilevel images
+REDUCIBLE_MODES = ('L', 'LA', 'RGB', 'RGBA', 'RGBX', 'I', 'F')
+
+
+class ImageTooLarge(ValueError):
+    """The image would decode to more pixels or memory than the endpoint allows"""
+
+
+def open_image(source, max_pixels=None):
+    """Open an image lazily, rejecting oversized images before any pixel is decoded"""
+    max_pixels = max_pixels or MAX_IMAGE_PIXELS
+    img = Image.open(source)
+    if img.width * img.height > max_pixels:
+        raise ImageTooLarge(f"Image is {img.width}x{img.height} pixels, limit is {max_pixels} pixels")
+    return img
+
+
+def check_decoded_size(size, pixel_bytes, max_pixels, max_mb):
+    """Raise ImageTooLarge unless decoding size (width, height) at once stays within both limits"""
+    pixels = size[0] * size[1]
+    if pixels > max_pixels:
+        raise ImageTooLarge(f"Image decodes to {size[0]}x{size[1]} pixels, limit is {max_pixels} pixels")
+    if pixels * pixel_bytes > max_mb * 1024 * 1024:
+        raise ImageTooLarge(f"Image decodes to {pixels * pixel_bytes / 1024 / 1024:.1f} MB, limit is {max_mb:g} MB")
+
+
+def decode_image(source, size, mode=None, quality=None, max_pixels=None):
+    """Open an image file/stream and return it resized to `size`.
+
+    `source` may be any seekable file object, e.g. the spooled request stream.
+    If `mode` is given the image is converted before the final resize.
+    """
+    quality = quality or DECODE_QUALITY
+    if quality not in OVERSAMPLE:
+        raise ValueError(f"Unknown decode quality '{quality}', expected one of {', '.join(OVERSAMPLE)}")
+
+    img = open_image(source, max_pixels)
+    oversample = OVERSAMPLE[quality]
+
+    if oversample:
+        target = (size[0] * oversample, size[1] * oversample)
+        if img.format == 'JPEG':
+            # Let libjpeg decode at a reduced scale that is still >= target
+            img.draft(img.mode, target)
+        factor = min(img.width // target[0], img.height // target[1])
+        if factor > 1 and img.mode in REDUCIBLE_MODES:
+            img = img.reduce(factor)
+
+    if mode and img.mode != mode:
+        img = img.convert(mode)
+    return img.resize(size)
+
+
+def dhash(img, hash_size=8):
+    """64-bit difference hash: which pixels of a tiny grayscale thumbnail are brighter than their right neighbour.
+
+    Near-identical images (re-encoded, slightly shifted or rescaled) get hashes
+    a few bits apart, see hamming_distance.
+    """
+    if img.mode not in ('L', 'RGB'):
+        img = img.convert('RGB')
+    small = np.asarray(img.resize((hash_size + 1, hash_size), Image.BILINEAR, reducing_gap=2.0).convert('L'),
+                       dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def mean_color(img, size=16):
+    """Mean (R, G, B) of a small thumbnail, rounded to whole levels.
+
+    dhash only sees gradients, so it is blind to exposure and colour: a dark
+    and a bright shot of the same scene, or any two uniform images, hash alike.
+    """
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    small = np.asarray(img.resize((size, size), Image.BILINEAR, reducing_gap=2.0), dtype=np.float32)
+    return tuple(int(round(v)) for v in small.reshape(-1, 3).mean(axis=0))
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
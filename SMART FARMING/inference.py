@@ -0,0 +1,223 @@
+"""Pluggable inference backends for the disease classifier.
+
+Every backend exposes predict(batch) taking a float32 (n, h, w, c) batch
+scaled to 0-1 and returning an (n, classes) array of probabilities.
+
+    keras  - model.h5 through TensorFlow/Keras (heavy import, large RSS)
+    tflite - a converted model.tflite through tflite_runtime / ai_edge_litert,
+             which never imports TensorFlow (see convert_model.py)
+    remote - batches sent over a Unix socket to inference_server.py, so
+             worker processes never load the model themselves
+"""
+import json
+import os
+import socket
+import struct
+import threading
+
+import numpy as np
+
+MODEL_PATHS = {
+    'keras': os.environ.get('MODEL_PATH', 'model.h5'),
+    'tflite': os.environ.get('TFLITE_MODEL_PATH', 'model.tflite'),
+    'remote': os.environ.get('INFERENCE_SOCKET', '/tmp/smart-farming-inference.sock')
+}
+
+# Length prefix of each message header on the inference socket
+_HEADER_LENGTH = struct.Struct('>I')
+
+
+def model_file_ready(path):
+    """A model file exists and is not empty (the repo ships an empty placeholder)"""
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+class InferenceBackend:
+    name = 'base'
+
+    def __init__(self, path):
+        self.path = path
+
+    def predict(self, batch):
+        raise NotImplementedError
+
+    def describe(self):
+        return {'backend': self.name, 'path': self.path, 'file_bytes': os.path.getsize(self.path)}
+
+
+class KerasBackend(InferenceBackend):
+    name = 'keras'
+
+    def __init__(self, path):
+        super().__init__(path)
+        from tensorflow.keras.models import load_model # pyright: ignore[reportMissingImports]
+        self.model = load_model(path)
+
+    def predict(self, batch):
+        return np.asarray(self.model.predict(batch, verbose=0))
+
+
+def _load_tflite_interpreter():
+    """The TensorFlow-free TFLite interpreter class, from whichever runtime is installed"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter # pyright: ignore[reportMissingImports]
+    except ImportError:
+        from tflite_runtime.interpreter import Interpreter # pyright: ignore[reportMissingImports]
+    return Interpreter
+
+
+class TFLiteBackend(InferenceBackend):
+    name = 'tflite'
+
+    def __init__(self, path, num_threads=None):
+        super().__init__(path)
+        Interpreter = _load_tflite_interpreter()
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self._shape = tuple(self.input['shape'])
+        # An interpreter holds one set of tensors, so calls must not overlap
+        self._lock = threading.Lock()
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if batch.shape != self._shape:
+                self.interpreter.resize_tensor_input(self.input['index'], batch.shape)
+                self.interpreter.allocate_tensors()
+                self.input = self.interpreter.get_input_details()[0]
+                self.output = self.interpreter.get_output_details()[0]
+                self._shape = batch.shape
+
+            # Fully quantized models take and return integers
+            scale, zero_point = self.input['quantization']
+            if scale:
+                batch = np.round(batch / scale + zero_point).astype(self.input['dtype'])
+            self.interpreter.set_tensor(self.input['index'], batch)
+            self.interpreter.invoke()
+            result = self.interpreter.get_tensor(self.output['index'])
+
+        scale, zero_point = self.output['quantization']
+        if scale:
+            result = (result.astype(np.float32) - zero_point) * scale
+        return np.asarray(result, dtype=np.float32)
+
+
+def _recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    while view:
+        received = sock.recv_into(view)
+        if not received:
+            raise ConnectionError('Inference socket closed')
+        view = view[received:]
+    return buffer
+
+
+def write_array(sock, array=None, **header):
+    """Send one message: a length-prefixed JSON header, then the raw bytes of array"""
+    if array is not None:
+        array = np.ascontiguousarray(array)
+        header.update(shape=array.shape, dtype=array.dtype.str)
+    encoded = json.dumps(header).encode()
+    sock.sendall(_HEADER_LENGTH.pack(len(encoded)) + encoded)
+    if array is not None:
+        sock.sendall(memoryview(array).cast('B'))
+
+
+def read_array(sock):
+    """Receive one message from write_array as (header, array or None)"""
+    (length,) = _HEADER_LENGTH.unpack(_recv_exactly(sock, _HEADER_LENGTH.size))
+    header = json.loads(bytes(_recv_exactly(sock, length)))
+    if 'shape' not in header:
+        return header, None
+    dtype = np.dtype(header['dtype'])
+    shape = tuple(header['shape'])
+    data = _recv_exactly(sock, int(np.prod(shape)) * dtype.itemsize)
+    return header, np.frombuffer(data, dtype=dtype).reshape(shape)
+
+
+class RemoteBackend(InferenceBackend):
+    """Client of inference_server.py; each thread keeps its own connection to the socket"""
+    name = 'remote'
+
+    def __init__(self, path):
+        # No connection yet: under a pre-forking server this runs in the master
+        super().__init__(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        # A connection inherited across fork would be shared with the parent, so check the pid
+        sock = getattr(self._local, 'sock', None)
+        if sock is None or self._local.pid != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.path)
+            self._local.sock, self._local.pid = sock, os.getpid()
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        # Predictions are idempotent, so a request lost with a dropped connection is sent once more
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                write_array(sock, batch)
+                header, result = read_array(sock)
+                break
+            except OSError:
+                self._close()
+                if attempt:
+                    raise
+        if result is None:
+            raise RuntimeError(header.get('error', 'Inference server sent no result'))
+        return result
+
+    def describe(self):
+        try:
+            sock = self._connection()
+            write_array(sock, info=True)
+            server, _ = read_array(sock)
+        except OSError as e:
+            self._close()
+            server = {'error': str(e)}
+        return {'backend': self.name, 'path': self.path, 'server': server}
+
+
+BACKENDS = {
+    'keras': KerasBackend,
+    'tflite': TFLiteBackend,
+    'remote': RemoteBackend
+}
+
+
+def load_backend(kind='auto'):
+    """Load the configured backend, or None when no usable model file exists.
+
+    'auto' prefers the TensorFlow-free TFLite backend when model.tflite and a
+    TFLite runtime are available, and falls back to Keras for model.h5.
+    """
+    if kind == 'auto':
+        if model_file_ready(MODEL_PATHS['tflite']):
+            try:
+                _load_tflite_interpreter()
+                kind = 'tflite'
+            except ImportError:
+                kind = 'keras'
+        else:
+            kind = 'keras'
+
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{kind}', expected auto, {', '.join(BACKENDS)}")
+    if kind == 'remote':
+        # The server owns the model file; connections are opened on first use
+        return RemoteBackend(MODEL_PATHS['remote'])
+    if not model_file_ready(MODEL_PATHS[kind]):
+        return None
+    return BACKENDS[kind](MODEL_PATHS[kind])
@@ -0,0 +1,101 @@
+"""Serve the disease model to every worker process over a Unix socket.
+
+Usage (from the SMART FARMING folder):
+    python inference_server.py [--socket /tmp/smart-farming-inference.sock] [--backend auto|keras|tflite]
+
+With INFERENCE_BACKEND=remote, app.py workers never load TensorFlow or the
+model. They send each batch here through inference.RemoteBackend instead, so
+a host running N gunicorn workers holds one copy of the model. Requests from
+all workers go through one BatchScheduler and share predict calls.
+gunicorn.conf.py starts this process automatically when
+INFERENCE_BACKEND=remote.
+
+Each message is a 4-byte big-endian header length, a JSON header and, for
+arrays, the raw array bytes (see inference.write_array / read_array).
+"""
+import argparse
+import os
+import socketserver
+import sys
+import time
+
+import numpy as np
+
+from batching import BatchScheduler
+from inference import MODEL_PATHS, load_backend, read_array, write_array
+
+
+class InferenceHandler(socketserver.BaseRequestHandler):
+    """One worker connection: answers predict requests until the worker disconnects"""
+
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                header, batch = read_array(self.request)
+            except (ConnectionError, OSError):
+                return
+            if batch is None:
+                write_array(self.request, **server.info())
+                continue
+            try:
+                # Rows go through the scheduler one by one, so they can join other workers' batches
+                futures = [server.scheduler.submit(row) for row in batch]
+                result = np.stack([future.result() for future in futures])
+            except Exception as e:
+                write_array(self.request, error=f'Prediction failed: {e}')
+                continue
+            server.requests += len(batch)
+            write_array(self.request, result)
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, backend, max_batch_size, max_wait_ms):
+        self.backend = backend
+        self.scheduler = BatchScheduler(lambda stack, key: backend.predict(stack), max_batch_size, max_wait_ms)
+        self.started = time.time()
+        self.requests = 0
+        # A socket file left behind by a previous run would make bind fail
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, InferenceHandler)
+
+    def info(self):
+        return {
+            'pid': os.getpid(),
+            'backend': self.backend.name,
+            'model': self.backend.path,
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'images': self.requests,
+            'batching': self.scheduler.stats()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--socket', default=MODEL_PATHS['remote'])
+    # INFERENCE_BACKEND is 'remote' in the environment this is started from, so it is not read here
+    parser.add_argument('--backend', default=os.environ.get('INFERENCE_SERVER_BACKEND', 'auto'),
+                        choices=['auto', 'keras', 'tflite'])
+    parser.add_argument('--max-batch-size', type=int, default=int(os.environ.get('BATCH_MAX_SIZE', '16')))
+    parser.add_argument('--max-wait-ms', type=float, default=float(os.environ.get('BATCH_MAX_WAIT_MS', '5')))
+    args = parser.parse_args()
+
+    backend = load_backend(args.backend)
+    if backend is None:
+        print("⚠️  Model file is missing or empty; nothing to serve.")
+        sys.exit(1)
+    print(f"✅ Model loaded ({backend.name}: {backend.path})")
+
+    with InferenceServer(args.socket, backend, args.max_batch_size, args.max_wait_ms) as server:
+        print(f"🔌 Serving predictions on {args.socket}")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""Season-long irrigation scheduling on top of the water table.
+
+Every plot is advanced day by day through its crop's growth stages from its
+planting date. Each simulated day handles all plots at once with NumPy: one
+table lookup gives the daily water need (the weekly WaterTable figure / 7)
+for that day's stage, soil, weather and soil-moisture state. The need adds
+to a per-plot soil-water deficit, which rain reduces. When the deficit
+reaches the irrigation depth the plot is watered and the deficit resets. The
+moisture state fed back into the table comes from the deficit, so wet plots
+need less water the next day, just as in calculate_water_requirement.
+"""
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+import numpy as np
+
+# Deficit (as a fraction of the irrigation depth) below which soil counts as wet / moist
+WET_BELOW = 0.25
+MOIST_BELOW = 0.75
+
+# Starting deficit for a plot's initial soil_moisture, as a fraction of the irrigation depth
+INITIAL_DEFICIT = {'wet': 0.0, 'moist': 0.5, 'dry': 0.9}
+
+
+def parse_date(value):
+    """A date from an ISO 'YYYY-MM-DD' string (a time part is ignored)"""
+    return value if isinstance(value, date) else date.fromisoformat(str(value).strip()[:10])
+
+
+def read_records(data, filename=''):
+    """Records from a CSV or JSON (array, or object with a 'records' array) text"""
+    text = data.decode('utf-8-sig') if isinstance(data, bytes) else data
+    if filename.lower().endswith('.json') or text.lstrip().startswith(('[', '{')):
+        records = json.loads(text)
+        return records.get('records', []) if isinstance(records, dict) else records
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+class WeatherSeries:
+    """Daily weather condition and rainfall per location, from date/weather_condition[/rain_in/location] records.
+
+    Days or locations missing from the feed use the table's default weather
+    slot (multiplier 1.0) and no rain.
+    """
+
+    def __init__(self, records, table):
+        self.table = table
+        self.days = {}  # (location, date) -> (weather index, rain inches)
+        self.locations = {''}
+        for record in records:
+            location = str(record.get('location') or '')
+            weather = table.indexes[3].get(record.get('weather_condition'), len(table.indexes[3]))
+            self.days[(location, parse_date(record['date']))] = (weather, float(record.get('rain_in') or 0))
+            self.locations.add(location)
+
+    def matrices(self, locations, start, days):
+        """(weather index, rain) arrays of shape (len(locations), days) starting at start"""
+        weather = np.full((len(locations), days), len(self.table.indexes[3]), dtype=np.intp)
+        rain = np.zeros((len(locations), days))
+        for i, location in enumerate(locations):
+            # Plots at a location the feed doesn't cover use the feed's location-less rows
+            key = location if location in self.locations else ''
+            for d in range(days):
+                entry = self.days.get((key, start + timedelta(days=d)))
+                if entry is not None:
+                    weather[i, d], rain[i, d] = entry
+        return weather, rain
+
+
+class IrrigationPlanner:
+    """Vectorized plots x days irrigation simulation for one set of growth-stage lengths"""
+
+    def __init__(self, table, stage_days):
+        self.table = table
+        crops = table.crops
+        width = max(len(stage_days.get(crop, {})) for crop in crops)
+        unknown_stage = len(table.stages)
+        # ends[c, k]: day after planting on which stage k of crop c ends (padding never ends)
+        self.ends = np.full((len(crops), width), np.iinfo(np.int64).max, dtype=np.int64)
+        # stage_index[c, k]: growth-stage axis of the table for stage k (last column: harvested)
+        self.stage_index = np.full((len(crops), width + 1), unknown_stage, dtype=np.intp)
+        self.stage_names = []
+        for c, crop in enumerate(crops):
+            stages = stage_days.get(crop, {})
+            self.ends[c, :len(stages)] = np.cumsum(list(stages.values()))
+            self.stage_index[c, :len(stages)] = [table.indexes[1].get(stage, unknown_stage) for stage in stages]
+            self.stage_names.append(list(stages))
+        self.season_days = np.array([sum(stage_days.get(crop, {}).values()) for crop in crops], dtype=np.int64)
+
+    def simulate(self, columns, weather, start, days, irrigation_depth=1.0):
+        """Daily water need and irrigation (inches, arrays of shape (plots, days)) for every plot.
+
+        columns holds equal-length sequences: crop index, soil_type,
+        disease_status, soil_moisture (initial), planting_date and a location
+        row of the weather matrices.
+        """
+        table = self.table
+        crop = np.asarray(columns['crop'], dtype=np.intp)
+        plots = len(crop)
+        soil = np.fromiter((table.indexes[2].get(v, len(table.indexes[2])) for v in columns['soil_type']),
+                           dtype=np.intp, count=plots)
+        disease = np.fromiter((table.indexes[4].get(v, len(table.indexes[4])) for v in columns['disease_status']),
+                              dtype=np.intp, count=plots)
+        planted = np.fromiter(((d - start).days for d in columns['planting_date']), dtype=np.int64, count=plots)
+        location = np.asarray(columns['location'], dtype=np.intp)
+        weather_idx, rain = weather
+
+        moisture_index = table.indexes[5]
+        wet, moist, dry = moisture_index['wet'], moisture_index['moist'], moisture_index['dry']
+        deficit = np.array([INITIAL_DEFICIT.get(m, 0.5) for m in columns['soil_moisture']]) * irrigation_depth
+        season = self.season_days[crop]
+        ends = self.ends[crop]
+
+        need = np.zeros((plots, days), dtype=np.float32)
+        irrigation = np.zeros((plots, days), dtype=np.float32)
+        for d in range(days):
+            age = d - planted
+            growing = (age >= 0) & (age < season)
+            position = (age[:, None] >= ends).sum(axis=1)
+            stage = self.stage_index[crop, position]
+
+            fraction = deficit / irrigation_depth
+            moisture = np.where(fraction < WET_BELOW, wet, np.where(fraction < MOIST_BELOW, moist, dry))
+            daily = table.table[crop, stage, soil, weather_idx[location, d], disease, moisture] / 7
+            daily = np.where(growing, daily, 0.0)
+
+            deficit = np.maximum(deficit + daily - rain[location, d], 0.0)
+            water = growing & (deficit >= irrigation_depth)
+            irrigation[water, d] = deficit[water]
+            deficit[water] = 0.0
+            need[:, d] = daily
+        return need, irrigation
+
+    def stages(self, crop, planting_date):
+        """Start date of each growth stage, and the harvest date, for one plot"""
+        names = self.stage_names[crop]
+        starts = [planting_date] + [planting_date + timedelta(days=int(end)) for end in self.ends[crop][:len(names) - 1]]
+        return ([{'stage': name, 'start': day.isoformat()} for name, day in zip(names, starts)],
+                planting_date + timedelta(days=int(self.season_days[crop])))
+
+
+def build_schedule(planner, plots, weather, irrigation_depth=1.0, max_days=366, include_daily=False):
+    """Irrigation schedule for plot records (crop_type, soil_type, planting_date and optional
+    id, location, disease_status, soil_moisture) under a WeatherSeries.
+
+    Returns (schedule, errors); plots with an unknown crop or a bad date are
+    reported in errors and left out of the simulation.
+    """
+    table = planner.table
+    columns = {name: [] for name in ('crop', 'soil_type', 'disease_status', 'soil_moisture', 'planting_date', 'location')}
+    kept, errors = [], []
+    for i, plot in enumerate(plots):
+        crop = table.indexes[0].get(str(plot.get('crop_type') or '').lower())
+        if crop is None or not planner.stage_names[crop]:
+            errors.append({'index': i, 'error': 'Crop type not found in database'})
+            continue
+        try:
+            planting_date = parse_date(plot['planting_date'])
+        except (KeyError, ValueError):
+            errors.append({'index': i, 'error': 'planting_date must be an ISO date (YYYY-MM-DD)'})
+            continue
+        kept.append((i, plot))
+        columns['crop'].append(crop)
+        columns['soil_type'].append(plot.get('soil_type') or 'loamy')
+        columns['disease_status'].append(plot.get('disease_status') or 'Healthy')
+        columns['soil_moisture'].append(plot.get('soil_moisture') or 'moist')
+        columns['planting_date'].append(planting_date)
+        columns['location'].append(str(plot.get('location') or ''))
+
+    if not kept:
+        return {'start': None, 'days': 0, 'plots': [], 'summary': {'plots': 0, 'plot_days': 0}}, errors
+
+    # Simulate from the first planting to the last harvest
+    start = min(columns['planting_date'])
+    end = max(d + timedelta(days=int(planner.season_days[c])) for d, c in zip(columns['planting_date'], columns['crop']))
+    days = min((end - start).days, max_days)
+    locations = sorted(set(columns['location']))
+    row = {location: i for i, location in enumerate(locations)}
+    columns['location'] = [row[location] for location in columns['location']]
+
+    need, irrigation = planner.simulate(columns, weather.matrices(locations, start, days), start, days, irrigation_depth)
+
+    dates = [(start + timedelta(days=d)).isoformat() for d in range(days)]
+    plot_rows, event_days = np.nonzero(irrigation)
+    events = [[] for _ in kept]
+    for p, d in zip(plot_rows.tolist(), event_days.tolist()):
+        events[p].append({'date': dates[d], 'inches': round(float(irrigation[p, d]), 2)})
+
+    results = []
+    for p, (i, plot) in enumerate(kept):
+        crop = columns['crop'][p]
+        stages, harvest = planner.stages(crop, columns['planting_date'][p])
+        result = {
+            'index': i,
+            'id': plot.get('id', i),
+            'crop_type': table.crops[crop],
+            'planting_date': columns['planting_date'][p].isoformat(),
+            'harvest_date': harvest.isoformat(),
+            'stages': stages,
+            'total_water_needed': round(float(need[p].sum()), 2),
+            'total_irrigation': round(float(irrigation[p].sum()), 2),
+            'irrigations': events[p]
+        }
+        if include_daily:
+            result['daily_water_needed'] = np.round(need[p], 3).tolist()
+        results.append(result)
+
+    daily_total = irrigation.sum(axis=0)
+    return {
+        'start': start.isoformat(),
+        'days': days,
+        'irrigation_depth': irrigation_depth,
+        'plots': results,
+        'summary': {
+            'plots': len(kept),
+            'plot_days': len(kept) * days,
+            'total_irrigation': round(float(daily_total.sum()), 2),
+            'irrigation_by_date': {dates[d]: round(float(daily_total[d]), 2) for d in np.flatnonzero(daily_total)}
+        }
+    }, errors
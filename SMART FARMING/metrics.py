@@ -0,0 +1,104 @@
+"""Lightweight request/stage instrumentation exported in Prometheus text format.
+
+Each observation is one perf_counter() pair plus a deque append under a
+lock, cheap enough to leave on in production. Quantiles are computed at
+scrape time over a sliding window of the most recent observations per
+stage; counts and sums cover the whole process lifetime.
+"""
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+def _quantile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class Metrics:
+    """Per-stage latency summaries and labelled counters"""
+
+    def __init__(self, prefix='smartfarm', window=2048, enabled=True):
+        self.prefix = prefix
+        self.window = window
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages = {}  # (endpoint, stage) -> [count, sum, deque of recent seconds]
+        self._counters = Counter()  # (name, sorted label items) -> value
+        self._help = {}
+
+    def observe(self, endpoint, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stages.get((endpoint, stage))
+            if stats is None:
+                stats = self._stages[(endpoint, stage)] = [0, 0.0, deque(maxlen=self.window)]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2].append(seconds)
+
+    @contextmanager
+    def time(self, endpoint, stage):
+        """Time the enclosed block as one observation of endpoint/stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(endpoint, stage, time.perf_counter() - start)
+
+    def inc(self, name, amount=1, description='', **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += amount
+            if description:
+                self._help.setdefault(name, description)
+
+    def render(self, gauges=(), counters=()):
+        """Prometheus text exposition.
+
+        gauges (current values) and counters (lifetime totals kept elsewhere, named
+        with a _total suffix) are iterables of (name, description, {labels tuple: value}).
+        """
+        with self._lock:
+            stages = {key: (count, total, sorted(recent)) for key, (count, total, recent) in self._stages.items()}
+            own_counters = dict(self._counters)
+
+        name = f'{self.prefix}_stage_seconds'
+        lines = [f'# HELP {name} Time spent in each stage of a request',
+                 f'# TYPE {name} summary']
+        for (endpoint, stage), (count, total, recent) in sorted(stages.items()):
+            labels = (('endpoint', endpoint), ('stage', stage))
+            for q in QUANTILES:
+                value = _quantile(recent, q) if recent else float('nan')
+                lines.append(f'{name}{_labels(labels + (("quantile", q),))} {value:.6g}')
+            lines.append(f'{name}_sum{_labels(labels)} {total:.6g}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+
+        for counter in sorted({key[0] for key in own_counters}):
+            full_name = f'{self.prefix}_{counter}'
+            lines.append(f'# HELP {full_name} {self._help.get(counter, counter)}')
+            lines.append(f'# TYPE {full_name} counter')
+            for (key_name, labels), value in sorted(own_counters.items()):
+                if key_name == counter:
+                    lines.append(f'{full_name}{_labels(labels)} {value}')
+
+        for kind, families in (('counter', counters), ('gauge', gauges)):
+            for family, description, values in families:
+                full_name = f'{self.prefix}_{family}'
+                lines.append(f'# HELP {full_name} {description}')
+                lines.append(f'# TYPE {full_name} {kind}')
+                for labels, value in values.items():
+                    lines.append(f'{full_name}{_labels(labels)} {value}')
+
+        return '\n'.join(lines) + '\n'
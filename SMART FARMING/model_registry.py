@@ -0,0 +1,286 @@
+"""Versioned disease models with background hot reload.
+
+Models live under one directory, one folder per model name and one per version:
+
+    models/
+        default/3/model.tflite       the model used when no per-crop model exists
+        tomato/1/model.h5
+        tomato/2/model.tflite
+        tomato/2/classes.json        {"class_names": [...], "disease_info": {...}}
+
+A watcher thread polls the directory. When a newer version appears it loads it
+and runs one warm-up prediction, all off the request path. It then swaps it
+in with a single dict assignment. Requests pick up one ModelVersion and use
+its backend and class list together, so a request that started on the old
+version finishes on it and none of them wait for the swap. The version it
+replaced stays loaded for a rollback until memory runs short. Beyond
+max_memory_mb, retired versions are evicted first, then the least recently
+used per-crop models. An evicted model is reloaded in the background the next
+time a request asks for it, and the default model answers in the meantime.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from inference import BACKENDS
+
+# Model files looked for in a version folder, in order of preference
+MODEL_FILES = ('model.tflite', 'model.h5', 'model.keras')
+SIDECAR = 'classes.json'
+DEFAULT_NAME = 'default'
+
+
+def current_rss_bytes():
+    """Resident memory of this process (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def version_key(version):
+    """Sort key putting '10' after '9' and numbered versions before named ones"""
+    return (0, int(version), '') if version.isdigit() else (1, 0, version)
+
+
+def discover(root):
+    """{name: [(version, model path), ...] oldest first} for every usable version folder"""
+    found = {}
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return found
+    for name in names:
+        model_dir = os.path.join(root, name)
+        if not os.path.isdir(model_dir):
+            continue
+        versions = []
+        for version in os.listdir(model_dir):
+            for filename in MODEL_FILES:
+                path = os.path.join(model_dir, version, filename)
+                if os.path.isfile(path) and os.path.getsize(path) > 0:
+                    versions.append((version, path))
+                    break
+        if versions:
+            found[name] = sorted(versions, key=lambda item: version_key(item[0]))
+    return found
+
+
+class ModelVersion:
+    """One loaded model version: its backend plus the class list and disease_info it answers with"""
+
+    def __init__(self, name, version, backend, class_names, disease_info):
+        self.name = name
+        self.version = version
+        self.backend = backend
+        self.class_names = class_names
+        self.disease_info = disease_info
+        self.key = f'{name}@{version}'
+        self.memory_bytes = 0
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.loaded_at = time.time()
+        self.last_used = time.monotonic()
+        self.requests = 0
+
+    def predict(self, batch):
+        self.last_used = time.monotonic()
+        self.requests += len(batch)
+        return self.backend.predict(batch)
+
+    def describe(self):
+        return {
+            'model': self.key,
+            'name': self.name,
+            'version': self.version,
+            'backend': self.backend.name,
+            'path': self.backend.path,
+            'classes': self.class_names,
+            'memory_mb': round(self.memory_bytes / (1024 * 1024), 2),
+            'load_seconds': self.load_seconds,
+            'warmup_seconds': self.warmup_seconds,
+            'loaded_at': self.loaded_at,
+            'requests': self.requests
+        }
+
+
+class ModelRegistry:
+    """Active and retired model versions under root, kept current by a polling watcher thread"""
+
+    def __init__(self, root, class_names, disease_info, poll_seconds=5.0, max_memory_mb=0,
+                 settle_seconds=2.0, warmup_shape=(1, 128, 128, 3)):
+        self.root = root
+        self.class_names = class_names
+        self.disease_info = disease_info
+        self.poll_seconds = poll_seconds
+        self.max_memory = int(max_memory_mb * 1024 * 1024)
+        self.settle_seconds = settle_seconds
+        self.warmup_shape = warmup_shape
+        self._active = {}  # name -> ModelVersion answering requests
+        self._retired = {}  # name -> the ModelVersion it replaced, kept for rollback
+        self._evicted = set()  # names unloaded for memory, reloaded on next use
+        self._requested = set()  # evicted names a request has asked for since
+        self._failed = {}  # model path -> mtime of the file that failed to load
+        self._wanted = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.swaps = deque(maxlen=50)
+        self.evictions = 0
+
+    def start(self):
+        # Started lazily so a pre-forking server never forks a live thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+                self._thread.start()
+
+    def get(self, name):
+        """The active version of name, or None (an evicted model is queued for reloading)"""
+        self.start()
+        entry = self._active.get(name)
+        if entry is None and name in self._evicted:
+            self._requested.add(name)
+            self._wanted.set()
+        return entry
+
+    def resolve(self, crop=None):
+        """The model for crop, falling back to the default model (None when neither is loaded)"""
+        return (crop and self.get(crop)) or self.get(DEFAULT_NAME)
+
+    def versions(self):
+        """Keys of the active versions; changes whenever a model is swapped in or evicted"""
+        return tuple(sorted(entry.key for entry in list(self._active.values())))
+
+    def _watch(self):
+        while True:
+            self.scan()
+            self._wanted.wait(self.poll_seconds)
+            self._wanted.clear()
+
+    def scan(self):
+        """Load every model whose newest version is not the active one (called by the watcher)"""
+        for name, versions in discover(self.root).items():
+            version, path = versions[-1]
+            active = self._active.get(name)
+            if active is not None and active.version == version:
+                continue
+            if name in self._evicted and name not in self._requested:
+                continue
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            # Skip files still being copied in, and files that already failed unless they changed
+            if time.time() - mtime < self.settle_seconds or self._failed.get(path) == mtime:
+                continue
+            try:
+                self.load(name, version, path)
+            except Exception as e:
+                self._failed[path] = mtime
+                print(f"⚠️  Could not load model {name}@{version}: {e}")
+
+    def load(self, name, version, path):
+        """Load and warm up one version, then swap it in as the active version of name"""
+        detected = time.perf_counter()
+        rss_before = current_rss_bytes()
+        kind = 'tflite' if path.endswith('.tflite') else 'keras'
+        backend = BACKENDS[kind](path)
+        loaded = time.perf_counter()
+        # The first call allocates tensors / traces the graph; pay for it before any request does
+        backend.predict(np.zeros(self.warmup_shape, dtype=np.float32))
+        warmed = time.perf_counter()
+
+        class_names, disease_info = self._read_sidecar(os.path.dirname(path))
+        entry = ModelVersion(name, version, backend, class_names, disease_info)
+        rss_after = current_rss_bytes()
+        # RSS growth is approximate (other threads allocate too); never count less than the file
+        grown = rss_after - rss_before if rss_before is not None and rss_after is not None else 0
+        entry.memory_bytes = max(grown, os.path.getsize(path))
+        entry.load_seconds = round(loaded - detected, 3)
+        entry.warmup_seconds = round(warmed - loaded, 3)
+
+        with self._lock:
+            swap_started = time.perf_counter()
+            previous = self._active.get(name)
+            self._active[name] = entry
+            if previous is not None:
+                self._retired[name] = previous
+            self._evicted.discard(name)
+            self._requested.discard(name)
+            swap_seconds = time.perf_counter() - swap_started
+        self.swaps.append({
+            'model': entry.key,
+            'replaced': previous.key if previous is not None else None,
+            'at': time.time(),
+            'load_seconds': entry.load_seconds,
+            'warmup_seconds': entry.warmup_seconds,
+            'swap_ms': round(swap_seconds * 1000, 4),
+            'ready_seconds': round(time.perf_counter() - detected, 3)
+        })
+        print(f"🔁 Model {entry.key} is live ({backend.name}, "
+              f"{entry.load_seconds + entry.warmup_seconds:.2f}s to load and warm up)")
+        self._evict(keep=name)
+        return entry
+
+    def _read_sidecar(self, directory):
+        """class_names and disease_info from classes.json, or the app's defaults"""
+        try:
+            with open(os.path.join(directory, SIDECAR)) as f:
+                sidecar = json.load(f)
+        except FileNotFoundError:
+            return self.class_names, self.disease_info
+        class_names = sidecar.get('class_names') or self.class_names
+        return class_names, sidecar.get('disease_info') or self.disease_info
+
+    def memory_bytes(self):
+        with self._lock:
+            entries = list(self._active.values()) + list(self._retired.values())
+        return sum(entry.memory_bytes for entry in entries)
+
+    def _evict(self, keep=None):
+        """Unload retired, then least recently used per-crop, models until under max_memory.
+
+        The default model and keep (the model just loaded) are never unloaded.
+        """
+        if not self.max_memory:
+            return
+        with self._lock:
+            while sum(e.memory_bytes for e in list(self._active.values()) + list(self._retired.values())) > self.max_memory:
+                if self._retired:
+                    name = min(self._retired, key=lambda n: self._retired[n].last_used)
+                    entry = self._retired.pop(name)
+                else:
+                    candidates = [n for n in self._active if n not in (DEFAULT_NAME, keep)]
+                    if not candidates:
+                        break
+                    name = min(candidates, key=lambda n: self._active[n].last_used)
+                    entry = self._active.pop(name)
+                    self._evicted.add(name)
+                # Requests still holding the entry finish normally; the memory goes with the last one
+                self.evictions += 1
+                print(f"♻️  Evicted model {entry.key} ({entry.memory_bytes / (1024 * 1024):.1f} MB) to stay "
+                      f"under {self.max_memory / (1024 * 1024):g} MB")
+
+    def stats(self):
+        with self._lock:
+            active = [entry.describe() for entry in self._active.values()]
+            retired = [entry.describe() for entry in self._retired.values()]
+        return {
+            'root': self.root,
+            'poll_seconds': self.poll_seconds,
+            'max_memory_mb': self.max_memory / (1024 * 1024),
+            'memory_mb': round(self.memory_bytes() / (1024 * 1024), 2),
+            'active': active,
+            'retired': retired,
+            'evicted': sorted(self._evicted),
+            'evictions': self.evictions,
+            'swaps': list(self.swaps)
+        }
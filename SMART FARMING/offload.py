@@ -0,0 +1,72 @@
+"""Process-pool execution of CPU-bound image functions.
+
+The image heuristics are NumPy/Python code that holds the GIL, so running
+them in the request thread serialises concurrent requests. AnalysisPool runs
+them in worker processes instead. The decoded array is copied once into a
+shared-memory block and the worker maps it directly, so no pixel data is
+pickled; only the (small) result travels back.
+"""
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _attach(name):
+    """Open an existing shared-memory block without taking ownership of it"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching registers the block again, but spawned workers share
+    # the server's resource tracker, which keeps one entry per name. The server's
+    # unlink() removes it; unregistering here too would make the tracker fail on it.
+    return shared_memory.SharedMemory(name=name)
+
+
+def _run_shared(fn, name, shape, dtype):
+    shm = _attach(name)
+    try:
+        # The view must not outlive the call, or close() fails with exported buffers
+        return fn(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+    finally:
+        shm.close()
+
+
+class AnalysisPool:
+    """Run module-level functions of one array in a pool of worker processes"""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created on first use, and with 'spawn', so workers never inherit
+        # the server's threads or a loaded TensorFlow runtime. A spawned worker
+        # re-imports the main script; app.py skips model loading when imported
+        # that way, so workers stay lightweight.
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def run(self, fn, img_array):
+        """Call fn(img_array) in a worker, passing the array through shared memory"""
+        img_array = np.ascontiguousarray(img_array)
+        shm = shared_memory.SharedMemory(create=True, size=max(img_array.nbytes, 1))
+        try:
+            np.ndarray(img_array.shape, dtype=img_array.dtype, buffer=shm.buf)[...] = img_array
+            future = self._get_executor().submit(_run_shared, fn, shm.name, img_array.shape, img_array.dtype.str)
+            return future.result()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
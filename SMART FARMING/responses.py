@@ -0,0 +1,103 @@
+"""Compact response bodies for clients on slow or metered links.
+
+Chosen per request:
+
+    compact=1                                           compact JSON, gzipped if accepted, with no other change
+    fields=water_needed,image_analysis.disease_status   keep only these keys (dotted paths reach into objects)
+    codes=1                                             recommendation codes instead of sentences, no prose
+    Accept: application/msgpack                         MessagePack instead of JSON (needs msgpack)
+    Accept-Encoding: gzip                               gzip compact bodies of at least min_bytes
+
+Accept-Encoding alone never changes the response (every browser sends it):
+without one of the other options, responses are the app's usual JSON.
+"""
+import gzip
+import json
+
+try:
+    import msgpack # pyright: ignore[reportMissingImports]
+except ImportError:
+    msgpack = None
+
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+# disease_info text and notes left out of code responses; clients look them up once from /codes
+PROSE_FIELDS = ('description', 'recommendation', 'note')
+
+
+def is_set(value):
+    """Whether a flag parameter such as codes=1 is on"""
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+
+def parse_fields(value):
+    """Dotted paths from a comma-separated fields= value, or None to keep everything"""
+    paths = [tuple(part.split('.')) for part in (value or '').replace(' ', '').split(',') if part]
+    return paths or None
+
+
+def select_fields(body, paths):
+    """A copy of body holding only the given key paths (missing keys are skipped)"""
+    selected = {}
+    for path in paths:
+        source, target = body, selected
+        for key in path[:-1]:
+            source = source.get(key) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(key, {})
+        else:
+            if isinstance(source, dict) and path[-1] in source:
+                target[path[-1]] = source[path[-1]]
+    return selected
+
+
+def apply_codes(body, recommendation_codes):
+    """A copy of body with recommendation sentences swapped for their codes and prose fields dropped"""
+    body = {key: value for key, value in body.items() if key not in PROSE_FIELDS}
+    if isinstance(body.get('recommendations'), list):
+        body['recommendations'] = [recommendation_codes.get(text, text) for text in body['recommendations']]
+    return body
+
+
+def wants_msgpack(accept):
+    return msgpack is not None and any(kind in (accept or '').lower() for kind in MSGPACK_TYPES)
+
+
+def accepts_gzip(accept_encoding):
+    """Whether Accept-Encoding allows gzip (an explicit q=0 refuses it)"""
+    for part in (accept_encoding or '').lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def encode_body(body, use_msgpack=False):
+    """(bytes, content type) of body as MessagePack or compact JSON"""
+    if use_msgpack:
+        return msgpack.packb(body, use_bin_type=True), 'application/msgpack'
+    return json.dumps(body, separators=(',', ':')).encode(), 'application/json'
+
+
+def compact_response(body, recommendation_codes, fields=None, codes=False, accept='', accept_encoding='',
+                     min_bytes=512, level=6):
+    """(bytes, headers) of body after field selection, codes, encoding and compression"""
+    if codes:
+        body = apply_codes(body, recommendation_codes)
+    paths = parse_fields(fields)
+    if paths:
+        body = select_fields(body, paths)
+
+    data, content_type = encode_body(body, wants_msgpack(accept))
+    headers = {'Content-Type': content_type, 'Vary': 'Accept, Accept-Encoding'}
+    if len(data) >= min_bytes and accepts_gzip(accept_encoding):
+        # mtime=0 keeps the output identical for identical bodies
+        data = gzip.compress(data, compresslevel=level, mtime=0)
+        headers['Content-Encoding'] = 'gzip'
+    return data, headers
+
+
+def is_compact_request(compact, fields, codes, accept):
+    """Whether a compact format was asked for explicitly (otherwise the usual JSON response is sent)"""
+    return bool(compact or fields or codes or wants_msgpack(accept))
@@ -344,284 +344,24 @@ function getCropInfo() {
   document.getElementById('cropResults').classList.add('hidden');
   document.getElementById('calendarError').classList.add('hidden');
   
-  // Simulate loading delay
-  setTimeout(() => {
-    const cropData = generateCropData(month, crop);
-    displayCropResults(cropData);
+  // Answered from the server's precomputed calendar (cached by the browser through its ETag)
+  fetch(`http://localhost:5000/crop_calendar?month=${encodeURIComponent(month)}&crop=${encodeURIComponent(crop)}`)
+  .then(res => res.json())
+  .then(data => {
     document.getElementById('calendarLoading').classList.add('hidden');
-  }, 1000);
-}
-
-function generateCropData(month, crop) {
-  const cropDatabase = {
-    tomato: {
-      name: 'Tomato',
-      seasons: ['spring', 'summer'],
-      plantingTime: 'Plant 2-3 weeks after last frost date',
-      harvestTime: '60-85 days from transplanting',
-      fertilizerSchedule: [
-        'At planting: Apply balanced fertilizer (10-10-10)',
-        '3 weeks after planting: Apply nitrogen-rich fertilizer',
-        'When flowers appear: Apply phosphorus-rich fertilizer',
-        'Every 2-3 weeks: Apply liquid fertilizer'
-      ],
-      wateringNeeds: 'Water deeply 1-2 inches per week. Keep soil consistently moist but not waterlogged.',
-      climateNeeds: 'Full sun (6-8 hours daily). Temperature: 65-85°F (18-29°C).',
-      growingTips: 'Stake or cage plants for support. Remove suckers for better fruit production. Mulch to retain moisture.'
-    },
-    potato: {
-      name: 'Potato',
-      seasons: ['spring', 'fall'],
-      plantingTime: 'Plant 2-4 weeks before last frost date',
-      harvestTime: '80-120 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        'When plants are 6 inches tall: Apply nitrogen fertilizer',
-        'When flowering begins: Apply potassium-rich fertilizer',
-        'Stop fertilizing 2 weeks before harvest'
-      ],
-      wateringNeeds: 'Water 1-2 inches per week. Increase during tuber formation.',
-      climateNeeds: 'Full sun. Temperature: 60-70°F (15-21°C). Cool weather crop.',
-      growingTips: 'Hill soil around plants as they grow. Keep tubers covered to prevent greening.'
-    },
-    onion: {
-      name: 'Onion',
-      seasons: ['spring', 'fall'],
-      plantingTime: 'Plant in early spring or fall',
-      harvestTime: '90-160 days depending on variety',
-      fertilizerSchedule: [
-        'Before planting: Apply phosphorus-rich fertilizer',
-        '3 weeks after planting: Apply nitrogen fertilizer',
-        'When bulbs start forming: Apply balanced fertilizer',
-        'Stop fertilizing 3 weeks before harvest'
-      ],
-      wateringNeeds: 'Water 1 inch per week. Reduce watering as bulbs mature.',
-      climateNeeds: 'Full sun. Temperature: 55-75°F (13-24°C).',
-      growingTips: 'Plant in loose, well-draining soil. Space bulbs 4-6 inches apart.'
-    },
-    carrot: {
-      name: 'Carrot',
-      seasons: ['spring', 'fall'],
-      plantingTime: 'Plant 2-4 weeks before last frost',
-      harvestTime: '60-80 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply phosphorus-rich fertilizer',
-        'When tops are 4 inches tall: Apply nitrogen fertilizer',
-        'Avoid high nitrogen fertilizers during root development'
-      ],
-      wateringNeeds: 'Water 1 inch per week. Keep soil consistently moist.',
-      climateNeeds: 'Full sun to partial shade. Temperature: 60-70°F (15-21°C).',
-      growingTips: 'Plant in loose, sandy soil. Thin seedlings to prevent crowding.'
-    },
-    cabbage: {
-      name: 'Cabbage',
-      seasons: ['spring', 'fall'],
-      plantingTime: 'Plant 4-6 weeks before last frost',
-      harvestTime: '60-100 days from transplanting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        '3 weeks after planting: Apply nitrogen fertilizer',
-        'When heads start forming: Apply balanced fertilizer'
-      ],
-      wateringNeeds: 'Water 1-1.5 inches per week. Keep soil consistently moist.',
-      climateNeeds: 'Full sun. Temperature: 60-65°F (15-18°C). Cool weather crop.',
-      growingTips: 'Plant in rich, well-draining soil. Space plants 12-18 inches apart.'
-    },
-    cauliflower: {
-      name: 'Cauliflower',
-      seasons: ['spring', 'fall'],
-      plantingTime: 'Plant 4-6 weeks before last frost',
-      harvestTime: '55-100 days from transplanting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        '3 weeks after planting: Apply nitrogen fertilizer',
-        'When heads start forming: Apply balanced fertilizer'
-      ],
-      wateringNeeds: 'Water 1-1.5 inches per week. Consistent moisture is crucial.',
-      climateNeeds: 'Full sun. Temperature: 60-65°F (15-18°C). Cool weather crop.',
-      growingTips: 'Blanch heads by covering with leaves when they reach 2-3 inches.'
-    },
-    peas: {
-      name: 'Peas',
-      seasons: ['spring', 'fall'],
-      plantingTime: 'Plant 4-6 weeks before last frost',
-      harvestTime: '55-70 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply phosphorus-rich fertilizer',
-        'When plants are 6 inches tall: Apply nitrogen fertilizer',
-        'Peas fix their own nitrogen, so avoid over-fertilizing'
-      ],
-      wateringNeeds: 'Water 1 inch per week. Increase during flowering and pod formation.',
-      climateNeeds: 'Full sun to partial shade. Temperature: 55-70°F (13-21°C).',
-      growingTips: 'Provide support for climbing varieties. Harvest regularly to encourage more pods.'
-    },
-    beans: {
-      name: 'Beans',
-      seasons: ['spring', 'summer'],
-      plantingTime: 'Plant after last frost date',
-      harvestTime: '50-65 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        'When plants are 6 inches tall: Apply nitrogen fertilizer',
-        'Beans fix nitrogen, so avoid over-fertilizing'
-      ],
-      wateringNeeds: 'Water 1 inch per week. Increase during flowering and pod formation.',
-      climateNeeds: 'Full sun. Temperature: 70-80°F (21-27°C).',
-      growingTips: 'Provide support for pole beans. Harvest regularly to encourage more pods.'
-    },
-    cucumber: {
-      name: 'Cucumber',
-      seasons: ['spring', 'summer'],
-      plantingTime: 'Plant 1-2 weeks after last frost',
-      harvestTime: '50-70 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        'When vines start running: Apply nitrogen fertilizer',
-        'When flowers appear: Apply phosphorus-rich fertilizer'
-      ],
-      wateringNeeds: 'Water 1-2 inches per week. Keep soil consistently moist.',
-      climateNeeds: 'Full sun. Temperature: 70-85°F (21-29°C).',
-      growingTips: 'Provide support for vining varieties. Harvest regularly to encourage more fruit.'
-    },
-    pepper: {
-      name: 'Pepper',
-      seasons: ['spring', 'summer'],
-      plantingTime: 'Plant 2-3 weeks after last frost',
-      harvestTime: '60-90 days from transplanting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        '3 weeks after planting: Apply nitrogen fertilizer',
-        'When flowers appear: Apply phosphorus-rich fertilizer',
-        'Every 3-4 weeks: Apply balanced fertilizer'
-      ],
-      wateringNeeds: 'Water 1-2 inches per week. Allow soil to dry slightly between watering.',
-      climateNeeds: 'Full sun. Temperature: 70-85°F (21-29°C).',
-      growingTips: 'Plant in warm soil. Provide support for heavy fruit. Mulch to retain moisture.'
-    },
-    lettuce: {
-      name: 'Lettuce',
-      seasons: ['spring', 'fall'],
-      plantingTime: 'Plant 4-6 weeks before last frost',
-      harvestTime: '45-60 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        '2 weeks after planting: Apply nitrogen fertilizer',
-        'Lettuce is a light feeder, avoid over-fertilizing'
-      ],
-      wateringNeeds: 'Water 1 inch per week. Keep soil consistently moist.',
-      climateNeeds: 'Partial shade to full sun. Temperature: 60-70°F (15-21°C).',
-      growingTips: 'Plant in loose, rich soil. Harvest outer leaves for continuous production.'
-    },
-    spinach: {
-      name: 'Spinach',
-      seasons: ['spring', 'fall'],
-      plantingTime: 'Plant 4-6 weeks before last frost',
-      harvestTime: '40-50 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        '2 weeks after planting: Apply nitrogen fertilizer',
-        'Spinach is a light feeder, avoid over-fertilizing'
-      ],
-      wateringNeeds: 'Water 1 inch per week. Keep soil consistently moist.',
-      climateNeeds: 'Partial shade to full sun. Temperature: 50-70°F (10-21°C).',
-      growingTips: 'Plant in rich, well-draining soil. Harvest outer leaves for continuous production.'
-    },
-    corn: {
-      name: 'Corn',
-      seasons: ['spring', 'summer'],
-      plantingTime: 'Plant 2 weeks after last frost',
-      harvestTime: '60-100 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        'When plants are 12 inches tall: Apply nitrogen fertilizer',
-        'When tassels appear: Apply nitrogen fertilizer',
-        'Stop fertilizing when silks appear'
-      ],
-      wateringNeeds: 'Water 1-2 inches per week. Increase during tasseling and silking.',
-      climateNeeds: 'Full sun. Temperature: 60-95°F (15-35°C).',
-      growingTips: 'Plant in blocks for better pollination. Plant multiple rows for cross-pollination.'
-    },
-    wheat: {
-      name: 'Wheat',
-      seasons: ['fall', 'spring'],
-      plantingTime: 'Plant in fall (winter wheat) or early spring (spring wheat)',
-      harvestTime: '110-130 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply phosphorus and potassium',
-        'Early spring: Apply nitrogen fertilizer',
-        'When stems start elongating: Apply nitrogen fertilizer'
-      ],
-      wateringNeeds: 'Water 1-2 inches per week during growing season.',
-      climateNeeds: 'Full sun. Temperature: 60-75°F (15-24°C).',
-      growingTips: 'Plant in well-draining soil. Monitor for pests and diseases regularly.'
-    },
-    rice: {
-      name: 'Rice',
-      seasons: ['spring', 'summer'],
-      plantingTime: 'Plant in spring after last frost',
-      harvestTime: '105-150 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        'When plants are 6 inches tall: Apply nitrogen fertilizer',
-        'When panicles form: Apply nitrogen fertilizer'
-      ],
-      wateringNeeds: 'Keep soil flooded or very wet throughout growing season.',
-      climateNeeds: 'Full sun. Temperature: 70-85°F (21-29°C).',
-      growingTips: 'Requires flooded conditions. Plant in clay soil that holds water well.'
-    },
-    cotton: {
-      name: 'Cotton',
-      seasons: ['spring', 'summer'],
-      plantingTime: 'Plant 2-3 weeks after last frost',
-      harvestTime: '150-180 days from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        'When plants are 6 inches tall: Apply nitrogen fertilizer',
-        'When flowers appear: Apply nitrogen fertilizer',
-        'When bolls form: Apply potassium fertilizer'
-      ],
-      wateringNeeds: 'Water 1-2 inches per week. Increase during flowering and boll formation.',
-      climateNeeds: 'Full sun. Temperature: 70-95°F (21-35°C).',
-      growingTips: 'Plant in warm soil. Monitor for pests like boll weevils. Harvest when bolls open.'
-    },
-    sugarcane: {
-      name: 'Sugarcane',
-      seasons: ['spring', 'summer'],
-      plantingTime: 'Plant in spring after last frost',
-      harvestTime: '12-18 months from planting',
-      fertilizerSchedule: [
-        'Before planting: Apply balanced fertilizer (10-10-10)',
-        '3 months after planting: Apply nitrogen fertilizer',
-        'Every 3 months: Apply nitrogen and potassium fertilizer',
-        'Stop fertilizing 3 months before harvest'
-      ],
-      wateringNeeds: 'Water 2-3 inches per week. Requires consistent moisture.',
-      climateNeeds: 'Full sun. Temperature: 70-95°F (21-35°C). Tropical/subtropical crop.',
-      growingTips: 'Plant in rich, well-draining soil. Requires long growing season. Harvest in winter.'
+    
+    if (data.error) {
+      showCalendarError('Crop information not found. Please try a different crop.');
+      return;
     }
-  };
-  
-  const cropInfo = cropDatabase[crop];
-  if (!cropInfo) {
-    return null;
-  }
-  
-  // Determine if the selected month is good for planting
-  const monthSeasons = {
-    january: 'winter', february: 'winter', march: 'spring', april: 'spring',
-    may: 'spring', june: 'summer', july: 'summer', august: 'summer',
-    september: 'fall', october: 'fall', november: 'fall', december: 'winter'
-  };
-  
-  const selectedSeason = monthSeasons[month];
-  const isGoodTime = cropInfo.seasons.includes(selectedSeason);
-  
-  return {
-    ...cropInfo,
-    selectedMonth: month,
-    selectedSeason: selectedSeason,
-    isGoodTime: isGoodTime
-  };
+    
+    displayCropResults(data);
+  })
+  .catch(err => {
+    document.getElementById('calendarLoading').classList.add('hidden');
+    showCalendarError('Failed to connect to crop calendar service. Please try again.');
+    console.error(err);
+  });
 }
 
 function displayCropResults(cropData) {
@@ -633,20 +373,20 @@ function displayCropResults(cropData) {
   // Set crop title and season badge
   document.getElementById('cropTitle').textContent = cropData.name;
   const seasonBadge = document.getElementById('cropSeason');
-  seasonBadge.textContent = cropData.selectedSeason.toUpperCase();
-  seasonBadge.style.backgroundColor = cropData.isGoodTime ? '#00e600' : '#ff6b6b';
+  seasonBadge.textContent = cropData.selected_season.toUpperCase();
+  seasonBadge.style.backgroundColor = cropData.is_good_time ? '#00e600' : '#ff6b6b';
   
   // Set all the crop details
-  document.getElementById('plantingTime').textContent = cropData.plantingTime;
-  document.getElementById('harvestTime').textContent = cropData.harvestTime;
-  document.getElementById('wateringNeeds').textContent = cropData.wateringNeeds;
-  document.getElementById('climateNeeds').textContent = cropData.climateNeeds;
-  document.getElementById('growingTips').textContent = cropData.growingTips;
+  document.getElementById('plantingTime').textContent = cropData.planting_time;
+  document.getElementById('harvestTime').textContent = cropData.harvest_time;
+  document.getElementById('wateringNeeds').textContent = cropData.watering_needs;
+  document.getElementById('climateNeeds').textContent = cropData.climate_needs;
+  document.getElementById('growingTips').textContent = cropData.growing_tips;
   
   // Create fertilizer schedule list
   const fertilizerDiv = document.getElementById('fertilizerSchedule');
   fertilizerDiv.innerHTML = '';
-  cropData.fertilizerSchedule.forEach(item => {
+  cropData.fertilizer_schedule.forEach(item => {
     const p = document.createElement('p');
     p.textContent = `• ${item}`;
     p.style.marginBottom = '5px';
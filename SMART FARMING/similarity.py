@@ -0,0 +1,144 @@
+"""Nearest-neighbour reuse of results for near-duplicate images.
+
+Burst shots and repeated passes over the same plant decode to images whose
+bytes differ but whose 64-bit difference hash (image_io.dhash) is only a few
+bits apart, so the byte-hash ResultCache misses them. SimilarityIndex keeps
+the signatures of recent results in a fixed-size NumPy uint64 ring buffer,
+oldest overwritten first. A lookup XORs the query against every stored
+signature at once and counts the differing bits with a vectorized popcount,
+which takes about a millisecond at a few hundred thousand entries.
+
+The dHash ignores brightness and colour, which the water analysis depends
+on (a dark and a bright shot of one scene hash alike), so each entry also
+keeps the image's mean colour (image_io.mean_color) and only entries whose
+channel means are all within max_color_delta levels of the query match.
+"""
+import threading
+import time
+
+import numpy as np
+
+# Set bits in every byte value, for NumPy versions without np.bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount64(values):
+    """Number of set bits in each element of a uint64 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return _BYTE_POPCOUNT[values.view(np.uint8)].reshape(len(values), 8).sum(axis=1, dtype=np.uint8)
+
+
+class SimilarityIndex:
+    """Bounded index of (signature, result) pairs searched by Hamming distance.
+
+    Results are only matched within the same namespace (e.g. endpoint and
+    requested crop) and with a mean colour at most max_color_delta levels
+    away per channel. max_distance < 0 disables the index.
+    """
+
+    def __init__(self, capacity=100000, max_distance=4, max_color_delta=4):
+        self.capacity = max(0, int(capacity))
+        self.max_distance = max_distance
+        self.max_color_delta = max_color_delta
+        self.enabled = self.capacity > 0 and max_distance >= 0
+        self._signatures = np.zeros(self.capacity, dtype=np.uint64)
+        self._colors = np.zeros((self.capacity, 3), dtype=np.int16)
+        self._namespaces = np.zeros(self.capacity, dtype=np.int32)
+        self._results = [None] * self.capacity
+        self._namespace_ids = {}
+        self._size = 0
+        self._next = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        self.invalidations = 0
+
+    def _namespace_id(self, namespace):
+        return self._namespace_ids.setdefault(namespace, len(self._namespace_ids))
+
+    def check_version(self, version):
+        """Drop every entry when the producer of the results (e.g. the model) changes"""
+        with self._lock:
+            if version == self._version:
+                return
+            changed = self._version is not None
+            self._version = version
+            if changed:
+                self._clear()
+                self.invalidations += 1
+
+    def _color_matches(self, stored, color):
+        return np.abs(stored - np.asarray(color, dtype=np.int16)).max(axis=-1) <= self.max_color_delta
+
+    def lookup(self, namespace, signature, color):
+        """(result, distance) of the closest stored signature within max_distance and colour tolerance, or (None, None)"""
+        if not self.enabled:
+            return None, None
+        started = time.perf_counter()
+        with self._lock:
+            size = self._size
+            namespace_id = self._namespace_ids.get(namespace)
+        result, distance = None, None
+        if size and namespace_id is not None:
+            # Slots below size are only ever overwritten, so the search needs no lock
+            distances = popcount64(self._signatures[:size] ^ np.uint64(signature))
+            # Namespace and colour are only compared for the few entries close enough by hash
+            candidates = np.flatnonzero(distances <= self.max_distance)
+            candidates = candidates[(self._namespaces[candidates] == namespace_id)
+                                    & self._color_matches(self._colors[candidates], color)]
+            if candidates.size:
+                best = int(candidates[np.argmin(distances[candidates])])
+                with self._lock:
+                    # The slot may have been reused by an insert (or cleared) since the search
+                    found = bin(int(self._signatures[best]) ^ signature).count('1')
+                    if (self._namespaces[best] == namespace_id and found <= self.max_distance
+                            and self._color_matches(self._colors[best], color) and self._results[best] is not None):
+                        result, distance = self._results[best], found
+        with self._lock:
+            self.lookup_seconds += time.perf_counter() - started
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result, distance
+
+    def add(self, namespace, signature, color, result):
+        """Store one result, overwriting the oldest entry once the index is full"""
+        if not self.enabled:
+            return
+        with self._lock:
+            slot = self._next
+            self._signatures[slot] = np.uint64(signature)
+            self._colors[slot] = color
+            self._namespaces[slot] = self._namespace_id(namespace)
+            self._results[slot] = result
+            self._next = (slot + 1) % self.capacity
+            self._size = max(self._size, slot + 1)
+
+    def _clear(self):
+        self._results = [None] * self.capacity
+        self._size = 0
+        self._next = 0
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': self._size,
+                'capacity': self.capacity,
+                'max_distance': self.max_distance,
+                'max_color_delta': self.max_color_delta,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'avg_lookup_ms': round(self.lookup_seconds / lookups * 1000, 4) if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
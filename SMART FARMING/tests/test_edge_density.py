@@ -0,0 +1,22 @@
+"""compute_edge_density matches the original per-pixel loop in both modes."""
+import numpy as np
+import pytest
+
+from benchmarks.edge_density import edge_density_loop, sample_images
+from features import compute_edge_density
+
+
+@pytest.mark.parametrize('mode', ['slice', 'separable'])
+@pytest.mark.parametrize('size', [1, 2, 3, 16, 33])
+def test_matches_loop(mode, size):
+    for name, gray in sample_images(size):
+        expected = edge_density_loop(gray)
+        # Only summation order differs, so agreement is to rounding
+        assert compute_edge_density(gray, mode=mode) == pytest.approx(expected, rel=1e-9, abs=1e-12), name
+
+
+def test_non_square_image():
+    gray = np.random.default_rng(1).integers(0, 256, size=(17, 29)).astype(np.float64)
+    expected = edge_density_loop(gray)
+    for mode in ('slice', 'separable'):
+        assert compute_edge_density(gray, mode=mode) == pytest.approx(expected, rel=1e-9)
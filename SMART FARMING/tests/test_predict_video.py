@@ -0,0 +1,44 @@
+"""/predict_video streams its NDJSON body after the view has returned."""
+import io
+import json
+
+from PIL import Image
+
+import app
+
+
+def gif_bytes(frames=3):
+    images = [Image.new('RGB', (64, 48), (40 * i, 140, 60)) for i in range(frames)]
+    buffer = io.BytesIO()
+    images[0].save(buffer, 'GIF', save_all=True, append_images=images[1:], duration=500)
+    return buffer.getvalue()
+
+
+def png_bytes(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def read_lines(data):
+    client = app.app.test_client()
+    # buffered=True reads the whole streamed body, as a real client would
+    response = client.post('/predict_video', data=data, content_type='multipart/form-data', buffered=True)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_animated_gif_streams_every_sampled_frame():
+    lines = read_lines({'video': (io.BytesIO(gif_bytes()), 'walk.gif'), 'sample_fps': '0', 'dedup_distance': '-1'})
+    assert not any('error' in line for line in lines)
+    summary = lines[-1]
+    assert summary['done'] and summary['frames_sampled'] == 3
+    assert [line['frame'] for line in lines[:-1]] == [0, 1, 2]
+
+
+def test_uploaded_frames_stream_every_frame():
+    frames = [(io.BytesIO(png_bytes((30 * i, 120, 50))), f'{i}.png') for i in range(4)]
+    lines = read_lines({'frames': frames, 'fps': '1', 'sample_fps': '0', 'dedup_distance': '-1'})
+    assert not any('error' in line for line in lines)
+    assert lines[-1]['frames_sampled'] == 4
+    assert lines[-1]['frames_analysed'] == 4
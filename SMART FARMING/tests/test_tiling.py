@@ -0,0 +1,81 @@
+"""Tiles read region by region match tiles cut from a full decode, and decode limits apply after draft mode."""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_io import ImageTooLarge
+from tiling import iter_tile_batches, open_for_tiling, tile_boxes
+
+TILE_SIZE = 256
+ANALYSIS_SIZE = 128
+
+
+def encode(array, fmt, **params):
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, fmt, **params)
+    buffer.seek(0)
+    return buffer
+
+
+def assert_tiles_match(buffer, region_reads):
+    expected = Image.open(io.BytesIO(buffer.getvalue())).convert('RGB')
+    tiles, (width, height) = open_for_tiling(buffer, TILE_SIZE, ANALYSIS_SIZE, 10 ** 9, 1024)
+    assert (tiles.blocks is not None) == region_reads
+    boxes = tile_boxes(width, height, TILE_SIZE, 0.25)
+    for batch in iter_tile_batches(tiles, boxes, ANALYSIS_SIZE, 4):
+        for row, col, box, pixels in batch:
+            assert np.array_equal(pixels, np.asarray(expected.crop(box).resize((ANALYSIS_SIZE, ANALYSIS_SIZE)))), box
+
+
+def sample(bands):
+    pixels = np.random.default_rng(0).integers(0, 256, size=(700, 900, 3), dtype=np.uint8)
+    return {1: pixels[:, :, 0], 3: pixels, 4: np.dstack([pixels, pixels[:, :, :1]])}[bands]
+
+
+@pytest.mark.parametrize('bands', [1, 3, 4])
+def test_uncompressed_tiff_is_read_by_region(bands):
+    assert_tiles_match(encode(sample(bands), 'TIFF'), region_reads=True)
+
+
+@pytest.mark.parametrize('bands', [1, 3])
+def test_ppm_is_read_by_region(bands):
+    assert_tiles_match(encode(sample(bands), 'PPM'), region_reads=True)
+
+
+@pytest.mark.parametrize('layout', [{'tile': (128, 128)}, {'rowsperstrip': 37}])
+@pytest.mark.parametrize('bands', [1, 3, 4])
+def test_tiled_and_striped_tiff_are_read_by_region(layout, bands):
+    tifffile = pytest.importorskip('tifffile')
+    buffer = io.BytesIO()
+    tifffile.imwrite(buffer, sample(bands), **layout)
+    buffer.seek(0)
+    assert_tiles_match(buffer, region_reads=True)
+
+
+@pytest.mark.parametrize('fmt, params', [('PNG', {}), ('TIFF', {'compression': 'tiff_lzw'})])
+def test_compressed_formats_are_decoded_whole(fmt, params):
+    assert_tiles_match(encode(sample(3), fmt, **params), region_reads=False)
+
+
+def test_jpeg_limits_apply_after_draft():
+    jpeg = encode(sample(3).repeat(4, axis=0).repeat(4, axis=1), 'JPEG')
+    # 3600x2800 drafts to 1/8 scale for 1024 pixel tiles, well under the limit
+    tiles, _ = open_for_tiling(jpeg, 1024, ANALYSIS_SIZE, 200_000, 1024)
+    assert tiles.img.size == (450, 350)
+    jpeg.seek(0)
+    with pytest.raises(ImageTooLarge, match='pixels'):
+        open_for_tiling(jpeg, TILE_SIZE, ANALYSIS_SIZE, 200_000, 1024)
+    jpeg.seek(0)
+    with pytest.raises(ImageTooLarge, match='MB'):
+        open_for_tiling(jpeg, 1024, ANALYSIS_SIZE, 200_000, 0.5)
+
+
+def test_uncompressed_limit_covers_one_row_of_tiles():
+    tiff = encode(sample(3), 'TIFF')
+    # 900 pixels wide, one 256-pixel row of tiles at a time
+    open_for_tiling(tiff, TILE_SIZE, ANALYSIS_SIZE, 900 * TILE_SIZE, 1024)
+    tiff.seek(0)
+    with pytest.raises(ImageTooLarge):
+        open_for_tiling(tiff, TILE_SIZE, ANALYSIS_SIZE, 900 * TILE_SIZE - 1, 1024)
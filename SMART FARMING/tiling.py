@@ -0,0 +1,138 @@
+"""Tiled analysis of large field images (drone shots, orthomosaics).
+
+A large image is cut into overlapping square tiles. Tiles are produced lazily
+in small batches, so only one batch of tile arrays is in memory at a time,
+and as little of the source as its format allows is decoded at once:
+
+    uncompressed TIFF (striped or tiled), PPM/PGM - only the rows under the
+        current row of tiles are read from the file
+    JPEG - decoded once through draft mode at the coarsest DCT scale that
+        still leaves every tile at least analysis_size pixels wide
+    other formats - decoded once at full resolution
+
+What would be decoded at once is checked against the pixel and memory limits
+before any pixel is read, so a gigapixel orthomosaic is either read a strip
+at a time or refused, never materialised whole.
+"""
+import math
+
+import numpy as np
+from PIL import Image
+
+from image_io import check_decoded_size
+
+# Bytes per pixel of the uncompressed layouts read directly from the file
+RAW_PIXEL_BYTES = {'L': 1, 'RGB': 3, 'RGBA': 4}
+
+
+def tile_boxes(width, height, tile_size, overlap):
+    """(row, col, (left, top, right, bottom)) for overlapping tiles covering the image.
+
+    The last row/column is shifted back so every tile is full-sized (tiles
+    are clipped to the image when it is smaller than one tile).
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size + 1, stride))
+        if positions[-1] != length - tile_size:
+            positions.append(length - tile_size)
+        return positions
+
+    boxes = []
+    for row, top in enumerate(starts(height)):
+        for col, left in enumerate(starts(width)):
+            boxes.append((row, col, (left, top, min(left + tile_size, width), min(top + tile_size, height))))
+    return boxes
+
+
+def raw_blocks(img):
+    """(extents, offset, row stride) of each uncompressed strip/tile of a lazily opened image.
+
+    None unless every block is stored top-down as plain L, RGB or RGBA bytes,
+    the layouts read_rows() can pull straight from the file.
+    """
+    if img.mode not in RAW_PIXEL_BYTES or not img.tile:
+        return None
+    blocks = []
+    for codec, extents, offset, args in img.tile:
+        if codec != 'raw':
+            return None
+        # A bare rawmode, or (rawmode[, stride[, orientation]]) with stride 0 meaning unpadded rows
+        rawmode, stride, orientation = (args, 0, 1) if isinstance(args, str) else tuple(args) + (0, 1)[len(args) - 1:]
+        if rawmode != img.mode or orientation != 1:
+            return None
+        blocks.append((extents, offset, stride or (extents[2] - extents[0]) * RAW_PIXEL_BYTES[rawmode]))
+    return blocks
+
+
+def read_rows(fp, blocks, width, mode, top, bottom):
+    """Rows top..bottom of an uncompressed image as a (rows, width, bands) array, reading only the blocks that overlap them"""
+    pixel_bytes = RAW_PIXEL_BYTES[mode]
+    rows = np.zeros((bottom - top, width, pixel_bytes), dtype=np.uint8)
+    for (left, y0, right, y1), offset, stride in blocks:
+        first, last = max(y0, top), min(y1, bottom)
+        if first >= last:
+            continue
+        fp.seek(offset + (first - y0) * stride)
+        data = np.frombuffer(fp.read((last - first) * stride), dtype=np.uint8).reshape(last - first, stride)
+        rows[first - top:last - top, left:right] = \
+            data[:, :(right - left) * pixel_bytes].reshape(last - first, right - left, pixel_bytes)
+    return rows
+
+
+class TileSource:
+    """Tiles of an image opened by open_for_tiling, cut by full-resolution box"""
+
+    def __init__(self, img, full_size, blocks):
+        self.img = img
+        self.scale = full_size[0] / img.width
+        self.blocks = blocks
+        # (top, bottom, array) of the row of tiles last read, for uncompressed sources
+        self._rows = None
+
+    def tile(self, box, size):
+        """The RGB tile under box, resized to size x size"""
+        left, top, right, bottom = box
+        if self.blocks is None:
+            tile = self.img.crop(tuple(int(round(v / self.scale)) for v in box))
+        else:
+            if self._rows is None or self._rows[:2] != (top, bottom):
+                self._rows = (top, bottom, read_rows(self.img.fp, self.blocks, self.img.width, self.img.mode, top, bottom))
+            pixels = self._rows[2][:, left:right]
+            tile = Image.fromarray(pixels[:, :, 0] if pixels.shape[2] == 1 else pixels)
+        # Converted per tile, so a palette or RGBA source is never converted whole
+        if tile.mode != 'RGB':
+            tile = tile.convert('RGB')
+        return tile.resize((size, size))
+
+
+def open_for_tiling(source, tile_size, analysis_size, max_pixels, max_mb):
+    """Open a large image for tiling, reading only its header.
+
+    Returns (TileSource, full_size). Raises ImageTooLarge if what would be
+    decoded at once (the draft-mode size of a JPEG, one row of tiles of an
+    uncompressed image) exceeds max_pixels or max_mb.
+    """
+    img = Image.open(source)
+    full_size = img.size
+    blocks = raw_blocks(img)
+    if blocks:
+        decoded, pixel_bytes = (img.width, min(tile_size, img.height)), RAW_PIXEL_BYTES[img.mode]
+    else:
+        if img.format == 'JPEG' and tile_size > analysis_size:
+            reduction = tile_size / analysis_size
+            img.draft('RGB', (math.ceil(img.width / reduction), math.ceil(img.height / reduction)))
+        # Pillow keeps 8-bit single-band images in one byte per pixel and everything else in four
+        decoded, pixel_bytes = img.size, 1 if img.mode in ('1', 'L', 'P') else 4
+    check_decoded_size(decoded, pixel_bytes, max_pixels, max_mb)
+    return TileSource(img, full_size, blocks), full_size
+
+
+def iter_tile_batches(tiles, boxes, analysis_size, batch_size):
+    """Yield lists of (row, col, box, RGB array) with at most batch_size tiles each"""
+    for start in range(0, len(boxes), batch_size):
+        yield [(row, col, box, np.asarray(tiles.tile(box, analysis_size)))
+               for row, col, box in boxes[start:start + batch_size]]
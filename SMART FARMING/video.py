@@ -0,0 +1,107 @@
+"""Streaming frame sources for /predict_video.
+
+Every source yields (frame_index, seconds, PIL image), decoding one frame at
+a time, so memory does not grow with video length. Frames are sampled at
+sample_fps. Frames between samples are skipped without decoding where the
+container allows it (cv2 grab()). iter_distinct_frames then drops frames
+whose difference hash is within max_distance bits of the last kept frame,
+e.g. while the grower stands still.
+
+    videos (.mp4, .mov, ...)         - OpenCV when installed (optional dependency)
+    animated GIF/WebP, multi-page TIFF - PIL ImageSequence, no extra dependency
+    several 'frames' image uploads   - treated as a sequence at a given fps
+"""
+from PIL import Image, ImageSequence
+
+from image_io import dhash, hamming_distance, open_image
+
+try:
+    import cv2 # pyright: ignore[reportMissingImports]
+except ImportError:
+    cv2 = None
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v', '.mpg', '.mpeg', '.3gp')
+
+
+def is_video_file(filename):
+    return (filename or '').lower().endswith(VIDEO_EXTENSIONS)
+
+
+def can_decode_video():
+    """Whether video containers can be decoded (OpenCV is installed)"""
+    return cv2 is not None
+
+
+class _Sampler:
+    """Keeps frames at least 1 / sample_fps seconds apart (every frame when sample_fps <= 0)"""
+
+    def __init__(self, sample_fps):
+        self.interval = 1.0 / sample_fps if sample_fps > 0 else 0.0
+        self.next_time = 0.0
+
+    def take(self, seconds):
+        # A millisecond of slack absorbs rounding in container timestamps
+        if seconds + 1e-3 < self.next_time:
+            return False
+        self.next_time = seconds + self.interval
+        return True
+
+
+def iter_video_frames(path, sample_fps):
+    """Frames of a video file through OpenCV; skipped frames are grabbed but never decoded"""
+    if cv2 is None:
+        raise RuntimeError('Video decoding needs OpenCV (pip install opencv-python-headless)')
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError('Could not open video')
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    sampler = _Sampler(sample_fps)
+    index = 0
+    try:
+        while capture.grab():
+            seconds = index / fps
+            if sampler.take(seconds):
+                ok, frame = capture.retrieve()
+                if ok:
+                    yield index, seconds, Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            index += 1
+    finally:
+        capture.release()
+
+
+def iter_image_sequence(source, sample_fps, max_pixels=None):
+    """Frames of an animated GIF/WebP or multi-page TIFF, timed by each frame's duration"""
+    img = open_image(source, max_pixels)
+    sampler = _Sampler(sample_fps)
+    seconds = 0.0
+    for index, frame in enumerate(ImageSequence.Iterator(img)):
+        if sampler.take(seconds):
+            yield index, seconds, frame.convert('RGB')
+        # Still images and TIFF pages have no duration; count them as one second apart
+        seconds += (frame.info.get('duration') or 1000) / 1000.0
+
+
+def iter_uploaded_frames(sources, sample_fps, fps, max_pixels=None):
+    """Separately uploaded stills (paths or file objects), in upload order, treated as a sequence recorded at fps"""
+    sampler = _Sampler(sample_fps)
+    for index, source in enumerate(sources):
+        seconds = index / fps
+        if sampler.take(seconds):
+            yield index, seconds, open_image(source, max_pixels).convert('RGB')
+
+
+def iter_distinct_frames(frames, max_distance):
+    """Yield (index, seconds, image, signature, duplicate_of) for every frame.
+
+    duplicate_of is the index of the last kept frame when this frame's dHash
+    is within max_distance bits of it (image is then None), else None.
+    max_distance < 0 keeps every frame.
+    """
+    last_index, last_signature = None, None
+    for index, seconds, img in frames:
+        signature = dhash(img)
+        if max_distance >= 0 and last_signature is not None and hamming_distance(signature, last_signature) <= max_distance:
+            yield index, seconds, None, signature, last_index
+            continue
+        last_index, last_signature = index, signature
+        yield index, seconds, img, signature, None
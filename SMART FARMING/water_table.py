@@ -0,0 +1,94 @@
+"""Precomputed water-requirement multipliers.
+
+Every input of calculate_water_requirement is a small enum, so the full
+crop x growth stage x soil x weather x disease x moisture product is
+computed once into a dense NumPy table. Each axis has one extra trailing
+slot for values that are not in the database, whose multiplier is 1.0,
+matching the dict.get(..., 1.0) defaults of the original calculation.
+"""
+import numpy as np
+
+# Order of the table axes and of the record fields used by the bulk calculator
+FACTORS = ('crop_type', 'growth_stage', 'soil_type', 'weather_condition', 'disease_status', 'soil_moisture')
+
+
+def _index(values):
+    return {value: i for i, value in enumerate(values)}
+
+
+class WaterTable:
+    """Dense lookup table of weekly water requirements (inches)"""
+
+    def __init__(self, water_requirements, weather_impact, disease_info, moisture_adjustment):
+        self.crops = list(water_requirements)
+        self.stages = sorted({stage for crop in water_requirements.values() for stage in crop['growth_stages']})
+        self.soils = sorted({soil for crop in water_requirements.values() for soil in crop['soil_preferences']})
+        self.weathers = list(weather_impact)
+        self.diseases = list(disease_info)
+        self.moistures = list(moisture_adjustment)
+        self.indexes = [_index(values) for values in
+                        (self.crops, self.stages, self.soils, self.weathers, self.diseases, self.moistures)]
+
+        # Per-axis multipliers; the last slot of each axis is the "unknown value" default
+        self.base = np.array([water_requirements[crop]['base_water'] for crop in self.crops])
+        self.growth = np.ones((len(self.crops), len(self.stages) + 1))
+        self.soil = np.ones((len(self.crops), len(self.soils) + 1))
+        for c, crop in enumerate(self.crops):
+            for stage, multiplier in water_requirements[crop]['growth_stages'].items():
+                self.growth[c, self.indexes[1][stage]] = multiplier
+            for soil, multiplier in water_requirements[crop]['soil_preferences'].items():
+                self.soil[c, self.indexes[2][soil]] = multiplier
+        self.weather = np.array([weather_impact[w] for w in self.weathers] + [1.0])
+        self.disease = np.array([disease_info[d].get('water_adjustment', 1.0) for d in self.diseases] + [1.0])
+        self.moisture = np.array([moisture_adjustment[m] for m in self.moistures] + [1.0])
+
+        # Multiplied in the same order as the scalar formula so results are bit-identical
+        self.table = (self.base[:, None, None, None, None, None]
+                      * self.growth[:, :, None, None, None, None]
+                      * self.soil[:, None, :, None, None, None]
+                      * self.weather[None, None, None, :, None, None]
+                      * self.disease[None, None, None, None, :, None]
+                      * self.moisture[None, None, None, None, None, :])
+
+    def index(self, crop_type, growth_stage, soil_type, weather_condition, disease_status, soil_moisture):
+        """Table coordinates for one set of conditions, or None for an unknown crop"""
+        crop = self.indexes[0].get(crop_type)
+        if crop is None:
+            return None
+        values = (growth_stage, soil_type, weather_condition, disease_status, soil_moisture)
+        return (crop,) + tuple(index.get(value, len(index)) for index, value in zip(self.indexes[1:], values))
+
+    def factors(self, idx):
+        """Individual multipliers at table coordinates returned by index()"""
+        crop, stage, soil, weather, disease, moisture = idx
+        return {
+            'base_water': float(self.base[crop]),
+            'growth_multiplier': float(self.growth[crop, stage]),
+            'soil_multiplier': float(self.soil[crop, soil]),
+            'weather_multiplier': float(self.weather[weather]),
+            'disease_multiplier': float(self.disease[disease]),
+            'moisture_adjustment': float(self.moisture[moisture])
+        }
+
+    def bulk_indexes(self, columns):
+        """Map columns of condition values (dict of FACTORS -> sequences) to index arrays.
+
+        Unknown crops get index -1; every other unknown value maps to its axis' default slot.
+        """
+        arrays = []
+        for axis, (name, index) in enumerate(zip(FACTORS, self.indexes)):
+            missing = -1 if axis == 0 else len(index)
+            arrays.append(np.fromiter((index.get(value, missing) for value in columns[name]),
+                                      dtype=np.intp, count=len(columns[name])))
+        return arrays
+
+    def bulk(self, columns):
+        """Weekly water needed for every record at once; unknown crops score 0.
+
+        Returns (water_needed, known_crop_mask).
+        """
+        crop, *rest = self.bulk_indexes(columns)
+        known = crop >= 0
+        water_needed = np.zeros(len(crop))
+        water_needed[known] = np.round(self.table[(crop[known],) + tuple(axis[known] for axis in rest)], 2)
+        return water_needed, known